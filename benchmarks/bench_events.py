@@ -0,0 +1,100 @@
+"""
+Memory per event and construction time per million events, for the pydantic
+OktaEvent the pipeline used to carry and the slotted Event it carries now.
+
+    python benchmarks/bench_events.py [--count 200000]
+
+Construction builds each event from the fields event_from_okta extracts, so
+only the event type differs; the event_from_okta rows time the whole ingest
+mapping from a parsed System Log record. Memory is what stays allocated per
+event once a batch of records has been parsed from JSON and turned into
+events (tracemalloc): the event itself plus, unless lean, the record it
+keeps as `raw` (OktaEvent validates it into a copy).
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from okta_soc.core.events import Event
+from okta_soc.core.models import OktaEvent
+from okta_soc.ingest.okta_client import event_from_okta
+
+
+def _record(i: int) -> Dict[str, Any]:
+    return {
+        "uuid": f"evt-{i:08d}",
+        "published": "2025-11-12T09:00:00.000Z",
+        "eventType": "user.session.start",
+        "actor": {"id": f"00u{i % 5000:05d}", "type": "User", "alternateId": f"user{i % 5000}@example.com"},
+        "client": {
+            "ipAddress": "203.0.113.7",
+            "userAgent": {"rawUserAgent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"},
+            "geographicalContext": {
+                "city": "Lisbon",
+                "country": "Portugal",
+                "geolocation": {"lat": 38.72, "lon": -9.14},
+            },
+        },
+        "outcome": {"result": "SUCCESS" if i % 7 else "FAILURE"},
+        "target": [{"id": "0oa-app", "type": "AppInstance"}],
+    }
+
+
+def _fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    event = event_from_okta(record, lean=True)
+    return {name: getattr(event, name) for name in Event.__slots__ if name != "raw"}
+
+
+def _time(build: Callable[[int, Dict[str, Any]], Any], records: List[Dict[str, Any]]) -> float:
+    gc.collect()
+    gc.disable()  # collector pauses would dominate the run-to-run noise
+    try:
+        start = time.perf_counter()
+        for i, record in enumerate(records):
+            build(i, record)
+        return (time.perf_counter() - start) / len(records) * 1_000_000
+    finally:
+        gc.enable()
+
+
+def _memory(build: Callable[[int, Dict[str, Any]], Any], lines: List[str]) -> float:
+    count = len(lines)
+    gc.collect()
+    tracemalloc.start()
+    events: List[Any] = [build(i, json.loads(line)) for i, line in enumerate(lines)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return current / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=200_000)
+    count = parser.parse_args().count
+
+    records = [_record(i) for i in range(count)]
+    lines = [json.dumps(r) for r in records]
+    fields = [_fields(r) for r in records]
+
+    cases = {
+        "OktaEvent (pydantic, raw)": lambda i, record: OktaEvent(**fields[i], raw=record),
+        "Event (slotted, raw)": lambda i, record: Event(**fields[i], raw=record),
+        "Event (slotted, lean)": lambda i, record: Event(**fields[i]),
+        "event_from_okta (raw)": lambda i, record: event_from_okta(record),
+        "event_from_okta (lean)": lambda i, record: event_from_okta(record, lean=True),
+    }
+
+    print(f"{count} events")
+    print(f"{'':28} {'bytes/event':>12} {'s per 1M':>10}")
+    for name, build in cases.items():
+        seconds = _time(build, records)
+        per_event = _memory(build, lines)
+        print(f"{name:28} {per_event:12.0f} {seconds:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
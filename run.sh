@@ -1,4 +1,27 @@
 #!/bin/zsh
-rm -f data/*.jsonl
+# Start from a clean slate: remove every artifact and state file the settings point at
+uv run python - <<'PY'
+import shutil
+from pathlib import Path
+
+from okta_soc.core.config import STATE_PATHS, load_settings
+from okta_soc.storage.repositories import JsonlStore
+from okta_soc.storage.segments import ARTIFACT_KINDS
+
+settings = load_settings()
+data_dir = Path(settings.data_dir)
+paths = [data_dir / JsonlStore.JOURNAL_NAME]
+for kind in ARTIFACT_KINDS:
+    paths += [data_dir / kind, data_dir / f"{kind}.jsonl"]
+for name in STATE_PATHS:
+    path = Path(getattr(settings, name))
+    # SQLite databases keep -wal/-shm files beside them
+    paths += [path, *path.parent.glob(f"{path.name}-*")]
+for path in paths:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+PY
 uv run python -m okta_soc.interface.cli --hours 24
 uv run python -m okta_soc.interface.cli show-all
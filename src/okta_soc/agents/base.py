@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+import asyncio
 from typing import Any, Dict, List
 
 
@@ -12,6 +13,9 @@ class AgentContract:
     phase_hint: str               # "ingest", "analysis", "response" — advisory
     actions: List[str] = field(default_factory=list)
     requires_human_approval: bool = False
+    deterministic: bool = False   # No LLM calls and no side effects; safe to run speculatively
+    max_batch_size: int = 1       # >1 means run_batch() accepts chunks of up to this many items
+    preferred_batch_size: int = 1 # Chunk size the orchestrator uses when iterating
 
 
 class BaseAgent(ABC):
@@ -24,3 +28,11 @@ class BaseAgent(ABC):
         Return output keyed by type name (from contract.produces).
         """
         ...
+
+    async def run_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run a chunk of per-item inputs, returning one output dict per input in
+        the same order. Batch-capable agents override this to amortize LLM and
+        I/O overhead; the default simply runs each item.
+        """
+        return list(await asyncio.gather(*(self.run(inputs) for inputs in batch)))
@@ -12,6 +12,7 @@ class CommandAgent(BaseAgent):
         consumes=["ResponsePlan"],
         produces=["List[CommandSuggestion]"],
         phase_hint="response",
+        deterministic=True,
     )
 
     def __init__(self, okta_org_url: Optional[str] = None):
@@ -39,6 +40,7 @@ class CommandAgent(BaseAgent):
                 suggestions.append(
                     CommandSuggestion(
                         step_id=sid,
+                        incident_id=plan.incident_id,
                         description="Suspend the Okta user account.",
                         command=cmd,
                         system="okta_api",
@@ -58,6 +60,7 @@ class CommandAgent(BaseAgent):
                 suggestions.append(
                     CommandSuggestion(
                         step_id=sid,
+                        incident_id=plan.incident_id,
                         description="Force user password reset and send email.",
                         command=cmd,
                         system="okta_api",
@@ -76,6 +79,7 @@ class CommandAgent(BaseAgent):
                 suggestions.append(
                     CommandSuggestion(
                         step_id=sid,
+                        incident_id=plan.incident_id,
                         description="Revoke all active sessions for the user.",
                         command=cmd,
                         system="okta_api",
@@ -97,6 +101,7 @@ class CommandAgent(BaseAgent):
                 suggestions.append(
                     CommandSuggestion(
                         step_id=sid,
+                        incident_id=plan.incident_id,
                         description="Enable MFA for the user (template, adjust factorType/provider).",
                         command=cmd,
                         system="okta_api",
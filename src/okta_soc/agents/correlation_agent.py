@@ -0,0 +1,117 @@
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .base import BaseAgent, AgentContract
+from okta_soc.core.ids import finding_id
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import DetectionFinding, FindingType
+
+
+class CorrelationAgent(BaseAgent):
+    """
+    Clusters the findings of one run into one finding per actor episode.
+
+    Findings are sorted by (user, time) and swept once: a finding joins the
+    current episode of its user when it comes within `gap` of that episode's
+    latest finding, and starts a new episode otherwise. An episode of two or
+    more findings is replaced by one composite finding (type "correlated")
+    carrying every member's events and a summary of the members, so risk
+    scoring, planning and escalation run once per episode instead of once
+    per detector hit. Single findings and findings without a user pass
+    through unchanged.
+
+    Composite ids are content-addressed like any finding's, but only the
+    composite is scored, never its members, so the detector's `known` check
+    cannot recognise an episode seen before. With `known`, composites an
+    earlier run already analyzed are dropped here instead.
+    """
+
+    contract = AgentContract(
+        name="correlation_agent",
+        description="Groups DetectionFindings for the same user that occur close together "
+        "into one composite finding per attack episode. Run it right after detector_agent "
+        "and before risk_agent so each episode is scored and handled once.",
+        consumes=["List[DetectionFinding]"],
+        produces=["List[DetectionFinding]"],
+        phase_hint="ingest",
+        deterministic=True,
+    )
+
+    def __init__(
+        self,
+        gap: timedelta = timedelta(minutes=30),
+        known: Optional[Callable[[List[DetectionFinding]], Set[str]]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.gap = gap
+        self.known = known
+        metrics = metrics or MetricsRegistry()
+        self._skipped = metrics.counter(
+            "correlation_known_findings_total",
+            "Composite findings dropped because an earlier run already analyzed them.",
+        )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        findings = [DetectionFinding.model_validate(f) if isinstance(f, dict) else f
+                    for f in input_data["List[DetectionFinding]"]]
+        return {"List[DetectionFinding]": self._screen(self.correlate(findings))}
+
+    def _screen(self, findings: List[DetectionFinding]) -> List[DetectionFinding]:
+        composites = [f for f in findings if f.finding_type == FindingType.CORRELATED]
+        if self.known is None or not composites:
+            return findings
+        known = self.known(composites)
+        if known:
+            self._skipped.inc(len(known))
+        return [f for f in findings if f.id not in known]
+
+    def correlate(self, findings: List[DetectionFinding]) -> List[DetectionFinding]:
+        unattributed = [f for f in findings if f.user_id is None]
+        ordered = sorted((f for f in findings if f.user_id is not None),
+                         key=lambda f: (f.user_id, f.created_at))
+
+        episodes: List[List[DetectionFinding]] = []
+        for finding in ordered:
+            current = episodes[-1] if episodes else None
+            if (
+                current is not None
+                and current[-1].user_id == finding.user_id
+                and finding.created_at - current[-1].created_at <= self.gap
+            ):
+                current.append(finding)
+            else:
+                episodes.append([finding])
+
+        result = [members[0] if len(members) == 1 else self._composite(members) for members in episodes]
+        result.sort(key=lambda f: f.created_at)
+        return result + unattributed
+
+    @staticmethod
+    def _composite(members: List[DetectionFinding]) -> DetectionFinding:
+        user_id = members[0].user_id
+        first, last = members[0].created_at, members[-1].created_at
+        types = sorted({m.finding_type.value for m in members})
+        event_ids = list(dict.fromkeys(e for m in members for e in m.okta_event_ids))
+        return DetectionFinding(
+            id=finding_id(FindingType.CORRELATED.value, user_id, event_ids),
+            finding_type=FindingType.CORRELATED,
+            description=(
+                f"{len(members)} findings for actor {user_id} between {first.isoformat()} and "
+                f"{last.isoformat()} ({', '.join(types)}): "
+                + " ".join(m.description for m in members)
+            ),
+            okta_event_ids=event_ids,
+            user_id=user_id,
+            created_at=last,
+            metadata={
+                "finding_types": "+".join(types),
+                "count": len(members),
+                "span_seconds": (last - first).total_seconds(),
+                "member_finding_ids": [m.id for m in members],
+                "members": [
+                    {"finding_type": m.finding_type.value, "created_at": m.created_at.isoformat(),
+                     **m.metadata}
+                    for m in members
+                ],
+            },
+        )
@@ -1,10 +1,36 @@
-from typing import Any, Dict, List
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
 from .base import BaseAgent, AgentContract
-from okta_soc.core.models import OktaEvent, DetectionFinding
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.profiling import Profiler, maybe_span
+from okta_soc.core.events import Event, as_event
+from okta_soc.core.models import DetectionFinding
+from okta_soc.core.shedding import LoadShedder
 from okta_soc.detectors.registry import get_all_detectors
 
 
 class DetectorAgent(BaseAgent):
+    """
+    Runs every registered detector over the input events.
+
+    With a lookback, the agent remembers the events of earlier calls that
+    fall within `lookback` of the newest one, so a long-running process that
+    feeds it only the new events of each poll still catches patterns that
+    straddle two polls. Only findings involving at least one new event are
+    returned. Calling run() again with the same events (as happens when a
+    speculative run is discarded) gives the same result.
+
+    Finding ids are content-addressed, so with `known` (returning the ids an
+    earlier run already analyzed; see Pipeline._analyzed) findings seen
+    before, e.g. when overlapping windows are re-processed, are dropped
+    here, before they reach correlation and the LLM.
+
+    With a LoadShedder, an oversized batch of events is sampled down before
+    detection and oversized per-actor groups of findings are collapsed after
+    it, so a flood of events cannot turn into unbounded findings.
+    """
+
     contract = AgentContract(
         name="detector_agent",
         description="Analyzes Okta events to detect anomalies like impossible travel, "
@@ -12,12 +38,88 @@ class DetectorAgent(BaseAgent):
         consumes=["List[OktaEvent]"],
         produces=["List[DetectionFinding]"],
         phase_hint="ingest",
+        deterministic=True,
     )
 
+    def __init__(
+        self,
+        lookback: Optional[timedelta] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        profiler: Optional[Profiler] = None,
+        known: Optional[Callable[[List[DetectionFinding]], Set[str]]] = None,
+        shedder: Optional[LoadShedder] = None,
+    ):
+        self.lookback = lookback
+        self.profiler = profiler
+        self.known = known
+        self.shedder = shedder
+        metrics = metrics or MetricsRegistry()
+        self._events = metrics.counter("detector_events_total", "Events given to the detectors.")
+        self._findings = metrics.counter(
+            "detector_findings_total", "Findings reported, by finding type (one per detector).", ["finding_type"]
+        )
+        self._skipped = metrics.counter(
+            "detector_known_findings_total", "Findings dropped because an earlier run already analyzed them."
+        )
+        self._latency = metrics.histogram(
+            "detector_seconds", "Time one detector takes over one batch.", ["detector"]
+        )
+        self._history: List[Event] = []
+        self._current: List[Event] = []
+        self._current_ids: FrozenSet[str] = frozenset()
+
     async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        events = [OktaEvent.model_validate(e) if isinstance(e, dict) else e
-                  for e in input_data["List[OktaEvent]"]]
+        events = [as_event(e) for e in input_data["List[OktaEvent]"]]
+        self._events.inc(len(events))
+        if self.shedder is not None:
+            events = self.shedder.sample_events(events)
+        if self.lookback is None:
+            findings = self._screen(self._detect(events))
+            self._count(findings)
+            return {"List[DetectionFinding]": findings}
+
+        ids = frozenset(e.id for e in events)
+        if ids != self._current_ids:
+            # A new batch: the previous one becomes history.
+            self._history = self._trim(self._history + self._current)
+            self._current, self._current_ids = events, ids
+
+        seen = {e.id for e in self._history}
+        new_ids = {e.id for e in events if e.id not in seen}
+        window = self._history + [e for e in events if e.id in new_ids]
+        findings = self._screen([
+            f for f in self._detect(window)
+            if any(event_id in new_ids for event_id in f.okta_event_ids)
+        ])
+        self._count(findings)
+        return {"List[DetectionFinding]": findings}
+
+    def _detect(self, events: List[Event]) -> List[DetectionFinding]:
         findings: List[DetectionFinding] = []
         for detector in get_all_detectors():
-            findings.extend(detector.detect(events))
-        return {"List[DetectionFinding]": findings}
+            start = time.perf_counter()
+            with maybe_span(self.profiler, f"detector-{detector.name}"):
+                findings.extend(detector.detect(events))
+            self._latency.observe(time.perf_counter() - start, detector=detector.name)
+        return findings
+
+    def _screen(self, findings: List[DetectionFinding]) -> List[DetectionFinding]:
+        if self.shedder is not None:
+            findings = self.shedder.collapse_findings(findings)
+        if self.known is None or not findings:
+            return findings
+        known = self.known(findings)
+        if known:
+            self._skipped.inc(len(known))
+        return [f for f in findings if f.id not in known]
+
+    def _count(self, findings: List[DetectionFinding]) -> None:
+        for finding in findings:
+            self._findings.inc(finding_type=finding.finding_type.value)
+
+    def _trim(self, events: List[Event]) -> List[Event]:
+        if not events:
+            return events
+        newest = max(e.timestamp for e in events)
+        unique = {e.id: e for e in events if newest - e.timestamp <= self.lookback}
+        return list(unique.values())
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from .base import BaseAgent, AgentContract
 from okta_soc.core.models import SecurityIncident, Severity, EscalationResult
@@ -21,15 +21,36 @@ class EscalationAgent(BaseAgent):
         produces=["EscalationResult"],
         phase_hint="response",
         actions=["slack_notification"],
+        max_batch_size=50,
+        preferred_batch_size=20,
     )
 
     CHANNEL = "#soc-critical-alerts"
 
     async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        result = self._build_result(self._parse(input_data))
+        if result.sent:
+            self._send(result.message)
+        return {"EscalationResult": result}
+
+    async def run_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Build per-incident results but post a single digest message for the chunk."""
+        results = [self._build_result(self._parse(inputs)) for inputs in batch]
+        to_send = [r.message for r in results if r.sent]
+        if len(to_send) == 1:
+            self._send(to_send[0])
+        elif to_send:
+            self._send(f"{len(to_send)} incidents need attention:\n\n" + "\n\n".join(to_send))
+        return [{"EscalationResult": r} for r in results]
+
+    @staticmethod
+    def _parse(input_data: Dict[str, Any]) -> SecurityIncident:
         incident = input_data["SecurityIncident"]
         if isinstance(incident, dict):
             incident = SecurityIncident.model_validate(incident)
+        return incident
 
+    def _build_result(self, incident: SecurityIncident) -> EscalationResult:
         should_send = incident.severity in ESCALATION_SEVERITIES
 
         message = (
@@ -38,18 +59,17 @@ class EscalationAgent(BaseAgent):
             f"{incident.description}"
         )
 
-        if should_send:
-            print(f"\n\U0001f4e2 [SIMULATED SLACK] {self.CHANNEL}\n{message}\n")
-            logger.info(
-                "[SIMULATED SLACK] #%s \u2192 %s",
-                self.CHANNEL,
-                message,
-            )
-
-        result = EscalationResult(
+        return EscalationResult(
             incident_id=incident.id,
             channel=self.CHANNEL,
             message=message,
             sent=should_send,
         )
-        return {"EscalationResult": result}
+
+    def _send(self, message: str) -> None:
+        print(f"\n\U0001f4e2 [SIMULATED SLACK] {self.CHANNEL}\n{message}\n")
+        logger.info(
+            "[SIMULATED SLACK] #%s \u2192 %s",
+            self.CHANNEL,
+            message,
+        )
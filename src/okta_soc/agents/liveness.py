@@ -0,0 +1,23 @@
+from typing import Dict
+
+from okta_soc.core.router_models import RoutePlan
+from okta_soc.agents.registry import AgentRegistry
+
+
+def last_uses(plan: RoutePlan, registry: AgentRegistry) -> Dict[str, int]:
+    """
+    Map each data type key to the index of the last plan step that reads it.
+
+    An iterated step reads only its iterate_over list; any other step reads
+    its contract's consumes. Keys missing from the result are never read by
+    the plan, so they are dead as soon as they are produced.
+    """
+    last: Dict[str, int] = {}
+    for index, step in enumerate(plan.steps):
+        agent = registry.get(step.agent_name)
+        if agent is None:
+            continue
+        reads = [step.iterate_over] if step.iterate_over else agent.contract.consumes
+        for key in reads:
+            last[key] = index
+    return last
@@ -1,6 +1,15 @@
-from typing import Any, Dict, List
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple
 
+from okta_soc.core.checkpoint import Checkpoint, CheckpointState
+from okta_soc.core.metrics import LLM_BUCKETS, MetricsRegistry
+from okta_soc.core.profiling import Profiler, maybe_span
 from okta_soc.core.pipeline_context import PipelineContext, StepResult
+from okta_soc.core.router_models import RoutePlan
+from okta_soc.core.spill import SpillStore
+from okta_soc.agents.base import BaseAgent
+from okta_soc.agents.liveness import last_uses
 from okta_soc.agents.registry import AgentRegistry
 
 
@@ -10,58 +19,380 @@ class Orchestrator:
 
     Asks the router to compose a pipeline of agents, then executes each step.
     Agents read from and write to a shared PipelineContext.
-    Supports iterate_over for agents that process individual items from a list.
+    Supports iterate_over for agents that process individual items from a list;
+    those items are fanned out concurrently and collected in input order.
+    Agents whose contract declares a max_batch_size above 1 receive the items
+    in chunks of preferred_batch_size via run_batch() instead.
+
+    With speculate=True, a deterministic agent whose inputs are already in the
+    initial context runs while the router is still deciding. Its outputs are
+    kept only if the returned plan runs that agent before anything could have
+    changed its inputs; otherwise they are discarded.
+
+    With a Checkpoint, the initial context, the plan and every completed step
+    and iterate_over item are journaled as they finish, and resume() picks an
+    interrupted run back up without repeating completed work.
+
+    With release_dead=True, each data type is dropped from the context once
+    the last step that reads it has run. Types listed in `retain` are needed
+    after the run; they are moved to the spill store if one is given and
+    otherwise kept in memory.
+
+    With a sink (anything with an async publish(outputs), such as
+    storage.background.BackgroundWriter), each step's outputs, and each
+    iterate_over item's outputs, are published as soon as they are produced.
+    Steps restored on resume are published again, so delivery is at least once.
+
+    With max_in_flight, at most that many iterate_over items (or chunks) run
+    at once: a fixed set of workers pulls the next one as each finishes, so
+    a step over thousands of findings holds a bounded number of tasks and
+    LLM requests instead of starting them all.
+
+    With a MetricsRegistry, runs, router and per-agent latency, agent errors
+    and the records each agent produces are recorded. With a Profiler, routing
+    and each step run in their own profiling span.
     """
 
-    def __init__(self, router: Any, registry: AgentRegistry):
+    def __init__(
+        self,
+        router: Any,
+        registry: AgentRegistry,
+        speculate: bool = False,
+        checkpoint: Optional[Checkpoint] = None,
+        release_dead: bool = False,
+        retain: Iterable[str] = (),
+        spill: Optional[SpillStore] = None,
+        sink: Optional[Any] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        profiler: Optional[Profiler] = None,
+        max_in_flight: Optional[int] = None,
+    ):
         self.router = router
         self.registry = registry
+        self.speculate = speculate
+        self.checkpoint = checkpoint
+        self.release_dead = release_dead
+        self.retain = set(retain)
+        self.spill = spill
+        self.sink = sink
+        self.profiler = profiler
+        self.max_in_flight = max_in_flight
+
+        metrics = metrics or MetricsRegistry()
+        self._runs = metrics.counter("pipeline_runs_total", "Pipeline runs by mode and outcome.", ["mode", "outcome"])
+        self._run_latency = metrics.histogram(
+            "pipeline_run_seconds", "Duration of a pipeline run.", buckets=LLM_BUCKETS
+        )
+        self._route_latency = metrics.histogram(
+            "router_seconds", "Time for the router to return a plan.", buckets=LLM_BUCKETS
+        )
+        self._agent_runs = metrics.counter(
+            "agent_runs_total", "Agent invocations (per step, item or batch) by outcome.", ["agent", "outcome"]
+        )
+        self._agent_latency = metrics.histogram(
+            "agent_seconds", "Latency of one agent invocation.", ["agent"], buckets=LLM_BUCKETS
+        )
+        self._outputs = metrics.counter(
+            "agent_outputs_total",
+            "Records produced by agents, by type (SecurityIncident counts promoted incidents).",
+            ["type"],
+        )
 
     async def run(
         self, initial_data: Dict[str, Any], metadata: Dict[str, Any]
     ) -> PipelineContext:
-        context = PipelineContext(data=initial_data, metadata=metadata)
+        context = PipelineContext(data=initial_data, metadata=metadata, spill=self.spill)
+
+        async def run() -> PipelineContext:
+            start = time.perf_counter()
+            with maybe_span(self.profiler, "route"):
+                if self.speculate:
+                    plan, speculated = await self._route_with_speculation(context)
+                else:
+                    plan, speculated = await self.router.run(context), None
+            self._route_latency.observe(time.perf_counter() - start)
+
+            if self.checkpoint is not None:
+                self.checkpoint.start(context, plan)
+
+            return await self._execute(context, plan, speculated=speculated)
+
+        return await self._measure_run("run", run())
 
-        plan = await self.router.run(context)
+    async def resume(self) -> Optional[PipelineContext]:
+        """
+        Continue the run recorded in the checkpoint, skipping completed steps
+        and items. Returns None when there is nothing to resume.
+        """
+        if self.checkpoint is None:
+            return None
+        state = self.checkpoint.resume()
+        if state is None:
+            return None
+        context = PipelineContext(data=state.data, metadata=state.metadata, spill=self.spill)
+        return await self._measure_run("resume", self._execute(context, state.plan, state=state))
 
-        for step in plan.steps:
+    async def _measure_run(self, mode: str, run: Awaitable[PipelineContext]) -> PipelineContext:
+        start = time.perf_counter()
+        try:
+            context = await run
+        except BaseException:
+            self._runs.inc(mode=mode, outcome="error")
+            raise
+        finally:
+            self._run_latency.observe(time.perf_counter() - start)
+        self._runs.inc(mode=mode, outcome="ok")
+        return context
+
+    async def _call(self, agent: BaseAgent, call: Awaitable[Any]) -> Any:
+        """Await one agent invocation, recording its latency and outcome."""
+        name = agent.contract.name
+        start = time.perf_counter()
+        try:
+            result = await call
+        except BaseException:
+            self._agent_runs.inc(agent=name, outcome="error")
+            raise
+        finally:
+            self._agent_latency.observe(time.perf_counter() - start, agent=name)
+        self._agent_runs.inc(agent=name, outcome="ok")
+        return result
+
+    def _count(self, outputs: Dict[str, Any]) -> None:
+        for key, value in outputs.items():
+            if isinstance(value, list):
+                if value:
+                    self._outputs.inc(len(value), type=key[5:-1] if key.startswith("List[") else key)
+            elif value is not None:
+                self._outputs.inc(type=key)
+
+    async def _execute(
+        self,
+        context: PipelineContext,
+        plan: RoutePlan,
+        speculated: Optional[Tuple[str, Dict[str, Any]]] = None,
+        state: Optional[CheckpointState] = None,
+    ) -> PipelineContext:
+        adopt_at = self._speculation_adoption_index(plan, speculated)
+        last_use = last_uses(plan, self.registry)
+
+        for index, step in enumerate(plan.steps):
+            self._release_dead(context, last_use, index)
             agent = self.registry.get(step.agent_name)
             if agent is None:
                 continue
 
-            if step.iterate_over:
-                if step.iterate_over not in context.data:
-                    # The list to iterate over doesn't exist (prior step produced nothing)
-                    continue
-                items = context.data[step.iterate_over]
-                if not items:
+            with maybe_span(self.profiler, f"step{index + 1:02d}-{step.agent_name}"):
+                if state is not None and index in state.steps:
+                    # Completed before the interruption: restore instead of rerunning.
+                    done_items = state.items.get(index, {})
+                    restored = state.step_outputs.get(index)
+                    if restored is None:
+                        restored = self._collect([done_items[i] for i in sorted(done_items)])
+                    context.data.update(restored)
+                    context.history.append(state.steps[index])
+                    if state.step_outputs.get(index) is None:
+                        for i in sorted(done_items):
+                            await self._publish(done_items[i])
+                    else:
+                        await self._publish(restored)
                     continue
 
-                # Run agent once per item in the list
-                collected: Dict[str, List[Any]] = {}
+                step_outputs: Optional[Dict[str, Any]]
+                if step.iterate_over:
+                    if step.iterate_over not in context.data:
+                        # The list to iterate over doesn't exist (prior step produced nothing)
+                        continue
+                    items = context.data[step.iterate_over]
+                    if not items:
+                        continue
 
-                for item in items:
-                    inputs = {t: item for t in agent.contract.consumes}
-                    outputs = await agent.run(inputs)
+                    done_items = state.items.get(index, {}) if state is not None else {}
 
-                    for key, value in outputs.items():
-                        list_key = f"List[{key}]"
-                        if list_key not in collected:
-                            collected[list_key] = []
-                        collected[list_key].append(value)
+                    # Run agent once per item (or per chunk, for batch-capable agents).
+                    # Items run concurrently; LLM-backed agents are throttled by the
+                    # client's limiter.
+                    results = await self._run_items(index, agent, items, done_items)
 
-                context.data.update(collected)
-            else:
-                # Run agent once with full context data
-                inputs = {t: context.data[t] for t in agent.contract.consumes if t in context.data}
-                outputs = await agent.run(inputs)
-                context.data.update(outputs)
+                    context.data.update(self._collect(results))
+                    step_outputs = None  # rebuilt from the per-item records on resume
+                elif index == adopt_at:
+                    # The router agreed with the speculative run; reuse its outputs.
+                    step_outputs = speculated[1]
+                    self._count(step_outputs)
+                    context.data.update(step_outputs)
+                    await self._publish(step_outputs)
+                else:
+                    # Run agent once with full context data
+                    inputs = {t: context.data[t] for t in agent.contract.consumes if t in context.data}
+                    step_outputs = await self._call(agent, agent.run(inputs))
+                    fresh = self._fresh(step_outputs, inputs)
+                    self._count(fresh)
+                    context.data.update(step_outputs)
+                    await self._publish(fresh)
 
-            context.history.append(
-                StepResult(
+                result = StepResult(
                     agent=step.agent_name,
                     outputs=list(agent.contract.produces),
+                    speculative=index == adopt_at,
                 )
-            )
+                context.history.append(result)
+                if self.checkpoint is not None:
+                    self.checkpoint.record_step(index, result, step_outputs)
 
+        self._release_dead(context, last_use, len(plan.steps))
         return context
+
+    def _release_dead(
+        self, context: PipelineContext, last_use: Dict[str, int], next_step: int
+    ) -> None:
+        """Release every key that no step from next_step onwards reads."""
+        if not self.release_dead:
+            return
+        for key in list(context.data):
+            if last_use.get(key, -1) >= next_step:
+                continue
+            if key in self.retain:
+                if context.spill is not None:
+                    context.release(key, keep=True)
+            else:
+                context.release(key)
+
+    async def _run_items(
+        self,
+        step_index: int,
+        agent: BaseAgent,
+        items: List[Any],
+        done_items: Dict[int, Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Run the agent over every item not already done, returning outputs in item order."""
+        results: Dict[int, Dict[str, Any]] = dict(done_items)
+        for i in sorted(done_items):
+            await self._publish(done_items[i])
+        pending = [i for i in range(len(items)) if i not in done_items]
+
+        contract = agent.contract
+        size = min(contract.preferred_batch_size, contract.max_batch_size)
+        if contract.max_batch_size > 1 and size > 1:
+            chunks = [pending[i : i + size] for i in range(0, len(pending), size)]
+        else:
+            chunks = [[i] for i in pending]
+
+        async def run_chunk(chunk: List[int]) -> None:
+            inputs = [{t: items[i] for t in contract.consumes} for i in chunk]
+            if len(chunk) == 1:
+                outputs = [await self._call(agent, agent.run(inputs[0]))]
+            else:
+                outputs = await self._call(agent, agent.run_batch(inputs))
+                if len(outputs) != len(chunk):
+                    raise ValueError(
+                        f"Agent '{contract.name}' returned {len(outputs)} results "
+                        f"for a batch of {len(chunk)}"
+                    )
+            for i, out in zip(chunk, outputs):
+                self._count(out)
+                results[i] = out
+                if self.checkpoint is not None:
+                    self.checkpoint.record_item(step_index, i, out)
+                await self._publish(out)
+
+        if self.max_in_flight is None:
+            await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        else:
+            remaining = iter(chunks)
+
+            async def worker() -> None:
+                for chunk in remaining:
+                    await run_chunk(chunk)
+
+            await asyncio.gather(*(worker() for _ in range(min(self.max_in_flight, len(chunks)))))
+        return [results[i] for i in range(len(items))]
+
+    @staticmethod
+    def _fresh(outputs: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The outputs minus records an agent passed through unchanged under the
+        key it read them from (as a correlation stage does with findings it
+        leaves alone); the step that produced them already published them.
+        """
+        fresh: Dict[str, Any] = {}
+        for key, value in outputs.items():
+            before = inputs.get(key)
+            if isinstance(value, list) and isinstance(before, list):
+                passed = {id(r) for r in before}
+                fresh[key] = [r for r in value if id(r) not in passed]
+            elif value is None or value is not before:
+                fresh[key] = value
+        return fresh
+
+    async def _publish(self, outputs: Dict[str, Any]) -> None:
+        if self.sink is not None:
+            await self.sink.publish(outputs)
+
+    @staticmethod
+    def _collect(results: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        collected: Dict[str, List[Any]] = {}
+        for outputs in results:
+            for key, value in outputs.items():
+                list_key = f"List[{key}]"
+                if list_key not in collected:
+                    collected[list_key] = []
+                collected[list_key].append(value)
+        return collected
+
+    async def _route_with_speculation(
+        self, context: PipelineContext
+    ) -> Tuple[RoutePlan, Optional[Tuple[str, Dict[str, Any]]]]:
+        candidate = self._speculation_candidate(context)
+        route_task = asyncio.create_task(self.router.run(context))
+        if candidate is None:
+            return await route_task, None
+
+        # Let the router reach its LLM call before the candidate takes the loop.
+        await asyncio.sleep(0)
+
+        inputs = {t: context.data[t] for t in candidate.contract.consumes}
+        try:
+            outputs: Optional[Dict[str, Any]] = await self._call(candidate, candidate.run(inputs))
+        except Exception:
+            # Speculation is best-effort; the step reruns normally if planned.
+            outputs = None
+
+        plan = await route_task
+        if outputs is None:
+            return plan, None
+        return plan, (candidate.contract.name, outputs)
+
+    def _speculation_candidate(self, context: PipelineContext) -> Optional[BaseAgent]:
+        for agent in self.registry.agents.values():
+            contract = agent.contract
+            if not contract.deterministic or contract.actions:
+                continue
+            if all(t in context.data for t in contract.consumes):
+                return agent
+        return None
+
+    def _speculation_adoption_index(
+        self,
+        plan: RoutePlan,
+        speculated: Optional[Tuple[str, Dict[str, Any]]],
+    ) -> Optional[int]:
+        """Index of the plan step that may reuse the speculative outputs, if any."""
+        if speculated is None:
+            return None
+        name = speculated[0]
+        agent = self.registry.get(name)
+        consumed = set(agent.contract.consumes)
+
+        for index, step in enumerate(plan.steps):
+            if step.agent_name == name and not step.iterate_over:
+                return index
+            other = self.registry.get(step.agent_name)
+            if other is None:
+                continue
+            produced = set(other.contract.produces)
+            produced |= {f"List[{t}]" for t in other.contract.produces}
+            if produced & consumed:
+                # An earlier step may change the candidate's inputs.
+                return None
+        return None
@@ -1,37 +1,24 @@
-from typing import Any, Dict
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
 from .base import BaseAgent, AgentContract
 from okta_soc.core.models import SecurityIncident, ResponsePlan, ResponseStep
+from okta_soc.core.budget import LLMBudgetExceeded
 from okta_soc.core.llm import LLMClient
+from okta_soc.core.memo import SignatureMemo, incident_signature
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.shedding import shed_counter
+from okta_soc.storage.backlog import FindingBacklog
 
+logger = logging.getLogger(__name__)
 
-class PlannerAgent(BaseAgent):
-    contract = AgentContract(
-        name="planner_agent",
-        description="Creates a ResponsePlan (steps, rationale) for a given SecurityIncident.",
-        consumes=["SecurityIncident"],
-        produces=["ResponsePlan"],
-        phase_hint="response",
-    )
 
-    def __init__(self, llm: LLMClient):
-        self.llm = llm
-
-    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        incident = input_data["SecurityIncident"]
-        if isinstance(incident, dict):
-            incident = SecurityIncident.model_validate(incident)
-
-        system_prompt = (
-            "You are an incident response planner for Okta security incidents. "
-            "You design step-by-step response plans that are safe and appropriate."
-        )
-
-        user_prompt = f"""
-SecurityIncident (JSON):
-{incident.model_dump_json(indent=2)}
-
-Design a concise but clear response plan.
+PLANNER_SYSTEM_PROMPT = (
+    "You are an incident response planner for Okta security incidents. "
+    "You design step-by-step response plans that are safe and appropriate."
+)
 
+PLANNER_RULES = """\
 Rules:
 - Focus on containment, eradication, recovery, and communication as appropriate.
 - Assume actions will be reviewed by a human analyst before execution.
@@ -47,25 +34,210 @@ Rules:
   - "forensic_review"
   - "update_incident_status"
 - You may still add other step_ids if needed, but prefer the canonical ones above.
+"""
 
-Return ONLY JSON:
-{{
+PLAN_SCHEMA = """\
   "overall_goal": "string",
   "steps": [
-    {{
+    {
       "step_id": "string",
       "description": "string",
       "rationale": "string",
       "requires_human_approval": true,
       "dependencies": ["optional_step_id"]
-    }}
+    }
   ],
-  "notes": "string or null"
+  "notes": "string or null\""""
+
+
+class PlannerAgent(BaseAgent):
+    """
+    Plans incidents with the LLM. An incident that cannot be planned because
+    the run's LLM budget is spent produces no plan. With a FindingBacklog it
+    is deferred there, and the pipeline plans it at the start of its next
+    run; without one it is only logged, and stays stored and open. Incidents
+    a full backlog refuses are counted as shed_total{policy="drop"}.
+    """
+
+    contract = AgentContract(
+        name="planner_agent",
+        description="Creates a ResponsePlan (steps, rationale) for a given SecurityIncident.",
+        consumes=["SecurityIncident"],
+        produces=["ResponsePlan"],
+        phase_hint="response",
+        max_batch_size=10,
+        preferred_batch_size=5,
+    )
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        memo: Optional[SignatureMemo] = None,
+        backlog: Optional[FindingBacklog] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.llm = llm
+        self.memo = memo
+        self.backlog = backlog
+        self._shed = shed_counter(metrics or MetricsRegistry())
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        incident = self._parse(input_data)
+
+        try:
+            if self.memo is None:
+                plan = await self._plan_with_llm(incident)
+            else:
+                async def compute() -> Dict[str, Any]:
+                    planned = await self._plan_with_llm(incident)
+                    return planned.model_dump(mode="json", exclude={"incident_id"})
+
+                # Re-bind the (possibly cached) plan template to this incident.
+                template = await self.memo.get_or_compute(incident_signature(incident), compute)
+                plan = ResponsePlan(incident_id=incident.id, **template)
+        except LLMBudgetExceeded:
+            self._defer([incident])
+            return {}
+
+        return {"ResponsePlan": plan}
+
+    async def run_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Plan a chunk of incidents with one LLM call. Memoized shapes are served
+        from the memo, and incidents sharing a signature are planned once.
+        """
+        incidents = [self._parse(inputs) for inputs in batch]
+
+        def key(incident: SecurityIncident) -> str:
+            return incident_signature(incident) if self.memo is not None else incident.id
+
+        templates: Dict[str, Dict[str, Any]] = {}
+        to_plan: Dict[str, SecurityIncident] = {}
+        for incident in incidents:
+            k = key(incident)
+            if k in templates or k in to_plan:
+                continue
+            cached = self.memo.get(k) if self.memo is not None else None
+            if cached is not None:
+                templates[k] = cached
+            else:
+                to_plan[k] = incident
+
+        if to_plan:
+            try:
+                planned = await self._plan_batch_with_llm(list(to_plan.values()))
+            except LLMBudgetExceeded:
+                planned = {}
+            # Only what the budget left unplanned is deferred; paid-for plans are kept
+            unplanned = {k for k, incident in to_plan.items() if incident.id not in planned}
+            if unplanned:
+                self._defer([i for i in incidents if key(i) in unplanned])
+            for k, incident in to_plan.items():
+                if incident.id not in planned:
+                    continue
+                templates[k] = planned[incident.id].model_dump(mode="json", exclude={"incident_id"})
+                if self.memo is not None:
+                    self.memo.put(k, templates[k])
+
+        return [
+            {"ResponsePlan": ResponsePlan(incident_id=incident.id, **templates[key(incident)])}
+            if key(incident) in templates else {}
+            for incident in incidents
+        ]
+
+    def _defer(self, incidents: List[SecurityIncident]) -> None:
+        if self.backlog is None:
+            logger.warning("LLM budget spent; %d incident(s) left unplanned", len(incidents))
+            return
+        refused = self.backlog.defer_incidents(incidents)
+        self._shed.inc(refused, policy="drop")
+        logger.warning(
+            "LLM budget spent; %d incident(s) deferred to the next run, %d refused by the full backlog",
+            len(incidents) - refused, refused,
+        )
+
+    @staticmethod
+    def _parse(input_data: Dict[str, Any]) -> SecurityIncident:
+        incident = input_data["SecurityIncident"]
+        if isinstance(incident, dict):
+            incident = SecurityIncident.model_validate(incident)
+        return incident
+
+    async def _plan_batch_with_llm(
+        self, incidents: List[SecurityIncident]
+    ) -> Dict[str, ResponsePlan]:
+        if len(incidents) == 1:
+            return {incidents[0].id: await self._plan_with_llm(incidents[0])}
+
+        incidents_json = ",\n".join(i.model_dump_json(indent=2) for i in incidents)
+        schema = PLAN_SCHEMA.replace("\n", "\n    ")
+        user_prompt = f"""
+SecurityIncidents (JSON array):
+[
+{incidents_json}
+]
+
+Design a concise but clear response plan for EACH incident.
+
+{PLANNER_RULES}
+Return ONLY JSON, with one plan per incident, echoing its id:
+{{
+  "plans": [
+    {{
+      "incident_id": "string",
+    {schema}
+    }}
+  ]
+}}
+"""
+
+        raw = await self.llm.achat_json(PLANNER_SYSTEM_PROMPT, user_prompt)
+
+        by_id = {i.id: i for i in incidents}
+        planned: Dict[str, ResponsePlan] = {}
+        for entry in raw.get("plans", []):
+            incident_id = entry.get("incident_id")
+            if incident_id not in by_id or incident_id in planned:
+                continue
+            try:
+                planned[incident_id] = self._plan_from_raw(incident_id, entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        # Anything the model dropped or mangled is planned on its own. A retry
+        # the budget refuses is left out, so the caller defers just that one.
+        async def retry(incident: SecurityIncident) -> Optional[ResponsePlan]:
+            try:
+                return await self._plan_with_llm(incident)
+            except LLMBudgetExceeded:
+                return None
+
+        missing = [i for i in incidents if i.id not in planned]
+        retried = await asyncio.gather(*(retry(i) for i in missing))
+        for incident, plan in zip(missing, retried):
+            if plan is not None:
+                planned[incident.id] = plan
+        return planned
+
+    async def _plan_with_llm(self, incident: SecurityIncident) -> ResponsePlan:
+        user_prompt = f"""
+SecurityIncident (JSON):
+{incident.model_dump_json(indent=2)}
+
+Design a concise but clear response plan.
+
+{PLANNER_RULES}
+Return ONLY JSON:
+{{
+{PLAN_SCHEMA}
 }}
 """
 
-        raw = self.llm.chat_json(system_prompt, user_prompt)
+        raw = await self.llm.achat_json(PLANNER_SYSTEM_PROMPT, user_prompt)
+        return self._plan_from_raw(incident.id, raw)
 
+    @staticmethod
+    def _plan_from_raw(incident_id: str, raw: Dict[str, Any]) -> ResponsePlan:
         steps = [
             ResponseStep(
                 step_id=s["step_id"],
@@ -77,10 +249,9 @@ Return ONLY JSON:
             for s in raw.get("steps", [])
         ]
 
-        plan = ResponsePlan(
-            incident_id=incident.id,
+        return ResponsePlan(
+            incident_id=incident_id,
             overall_goal=raw.get("overall_goal", "Respond to Okta security incident."),
             steps=steps,
             notes=raw.get("notes"),
         )
-        return {"ResponsePlan": plan}
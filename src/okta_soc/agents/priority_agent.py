@@ -0,0 +1,126 @@
+import math
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from .base import BaseAgent, AgentContract
+from okta_soc.core.budget import LLMBudget
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import DetectionFinding, FindingType
+from okta_soc.core.shedding import shed_counter
+from okta_soc.storage.backlog import FindingBacklog
+
+# Base pre-score per finding type. A correlated finding takes its most
+# serious member type plus a bonus for each further type in the episode.
+TYPE_WEIGHTS: Dict[str, float] = {
+    FindingType.IMPOSSIBLE_TRAVEL.value: 0.6,
+    FindingType.MFA_FATIGUE.value: 0.5,
+    FindingType.FAILED_LOGIN_BURST.value: 0.3,
+    FindingType.OTHER.value: 0.1,
+}
+CORRELATION_BONUS = 0.1
+PRIVILEGED_BONUS = 0.4
+
+
+def pre_score(finding: DetectionFinding, privileged_users: FrozenSet[str] = frozenset()) -> float:
+    """
+    Cheap heuristic urgency of a finding, used only to order LLM work: the
+    finding type, how many events it covers, and whether the actor is
+    privileged (listed in `privileged_users`, or an id containing "admin").
+    """
+    if finding.finding_type == FindingType.CORRELATED:
+        types = str(finding.metadata.get("finding_types", "")).split("+")
+    else:
+        types = [finding.finding_type.value]
+    score = max(TYPE_WEIGHTS.get(t, 0.1) for t in types) + CORRELATION_BONUS * (len(types) - 1)
+
+    count = finding.metadata.get("count")
+    if not isinstance(count, (int, float)):
+        count = len(finding.okta_event_ids)
+    score += min(0.2, 0.01 * count)
+
+    user = finding.user_id or ""
+    if user in privileged_users or "admin" in user.lower():
+        score += PRIVILEGED_BONUS
+    return score
+
+
+class PriorityAgent(BaseAgent):
+    """
+    Orders findings for LLM analysis and cuts the list to what the run's
+    budget can pay for.
+
+    Findings deferred by earlier runs are taken from the backlog and ranked
+    together with the new ones by pre_score() (older first on ties), so the
+    most urgent findings are scored, promoted and planned first. A finding
+    is admitted while the number admitted stays within `max_findings` and,
+    when the LLMBudget caps calls, within its remaining calls divided by
+    `calls_per_finding` (about one call each: a share of a batched risk call
+    plus a plan if promoted). The rest go back to the backlog, most urgent
+    first; what a bounded backlog cannot hold is dropped and counted as
+    shed_total{policy="drop"}.
+    """
+
+    contract = AgentContract(
+        name="priority_agent",
+        description="Orders DetectionFindings by a cheap urgency pre-score, adds findings "
+        "deferred by earlier runs, and defers whatever the run's LLM budget cannot cover. "
+        "Run it right before risk_agent (after correlation_agent) so the most urgent "
+        "findings are analyzed first.",
+        consumes=["List[DetectionFinding]"],
+        produces=["List[DetectionFinding]"],
+        phase_hint="analysis",
+    )
+
+    def __init__(
+        self,
+        budget: Optional[LLMBudget] = None,
+        backlog: Optional[FindingBacklog] = None,
+        max_findings: Optional[int] = None,
+        calls_per_finding: float = 1.0,
+        privileged_users: Iterable[str] = (),
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.budget = budget
+        self.backlog = backlog
+        self.max_findings = max_findings
+        self.calls_per_finding = calls_per_finding
+        self.privileged_users = frozenset(privileged_users)
+        metrics = metrics or MetricsRegistry()
+        self._admitted = metrics.counter("priority_admitted_total", "Findings admitted to LLM analysis.")
+        self._deferred = metrics.counter("priority_deferred_total", "Findings deferred to the backlog.")
+        self._backlog_size = metrics.gauge("priority_backlog_findings", "Findings waiting in the backlog.")
+        self._shed = shed_counter(metrics)
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        findings = [DetectionFinding.model_validate(f) if isinstance(f, dict) else f
+                    for f in input_data["List[DetectionFinding]"]]
+        admitted, deferred = self.prioritize(findings)
+        if self.backlog is not None:
+            self._shed.inc(self.backlog.defer(deferred), policy="drop")
+            self._backlog_size.set(len(self.backlog))
+        self._admitted.inc(len(admitted))
+        self._deferred.inc(len(deferred))
+        return {"List[DetectionFinding]": admitted}
+
+    def prioritize(self, findings: List[DetectionFinding]) -> Tuple[List[DetectionFinding], List[DetectionFinding]]:
+        """Rank the new and backlogged findings and split them into (admitted, deferred)."""
+        candidates = {f.id: f for f in (self.backlog.take() if self.backlog is not None else [])}
+        candidates.update((f.id, f) for f in findings)
+        ranked = sorted(
+            candidates.values(),
+            key=lambda f: (-pre_score(f, self.privileged_users), f.created_at),
+        )
+        limit = self._limit()
+        if limit is None or self.backlog is None:
+            # Without a backlog nothing can be deferred; the client-side cap still holds.
+            return ranked, []
+        return ranked[:limit], ranked[limit:]
+
+    def _limit(self) -> Optional[int]:
+        if self.budget is not None and self.budget.exhausted:
+            return 0
+        limits = []
+        if self.max_findings is not None:
+            limits.append(self.max_findings)
+        remaining = self.budget.remaining_calls if self.budget is not None else None
+        if remaining is not None:
+            limits.append(math.floor(remaining / self.calls_per_finding))
+        return min(limits) if limits else None
@@ -1,46 +1,225 @@
-from typing import Any, Dict
+import logging
+from typing import Any, Callable, Dict, List, Optional
 from .base import BaseAgent, AgentContract
 from okta_soc.core.models import DetectionFinding, RiskScore, Severity, SecurityIncident
+from okta_soc.core.budget import LLMBudgetExceeded
+from okta_soc.core.clock import wall_clock
+from okta_soc.core.ids import incident_id
 from okta_soc.core.llm import LLMClient
-from datetime import datetime, timezone
-import uuid
+from okta_soc.core.memo import SignatureMemo, finding_signature
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.shedding import shed_counter
+from okta_soc.storage.backlog import FindingBacklog
+from okta_soc.storage.open_incidents import OpenIncidentIndex, finding_family
+from datetime import datetime
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+RISK_SYSTEM_PROMPT = (
+    "You are a security risk analyst for Okta authentication events. "
+    "Given a detection finding, you assign severity, likelihood, impact, "
+    "and a numeric risk score between 0 and 1."
+)
+
+RISK_INSTRUCTIONS = """\
+1. Decide severity: low, medium, high, or critical.
+2. Estimate likelihood and impact (0.0-1.0).
+3. Compute an overall risk score (0.0-1.0).
+4. Explain your reasoning briefly.
+"""
 
 
 class LLMRiskAgent(BaseAgent):
+    """
+    Scores findings with the LLM and promotes serious ones to incidents.
+
+    With an OpenIncidentIndex, a finding for a user who already has an open
+    incident of the same finding family is attached to that incident rather
+    than opening a new one, whether or not it would have been promoted. The
+    updated incident is output as "SecurityIncident" (planned and escalated
+    again) only when its severity escalated, and as "IncidentUpdate" (stored
+    only) otherwise.
+
+    With a FindingBacklog, a finding that cannot be scored because the run's
+    LLM budget is spent is deferred to the backlog and produces no output;
+    without one, LLMBudgetExceeded propagates. Findings a full backlog
+    refuses are dropped, logged and counted as shed_total{policy="drop"}.
+    """
+
     contract = AgentContract(
         name="risk_agent",
         description="Assigns severity and risk scores to DetectionFindings, "
-        "deciding how serious each one is. Promotes high-risk findings to SecurityIncidents.",
+        "deciding how serious each one is. Promotes high-risk findings to SecurityIncidents. "
+        "IncidentUpdates are findings attached to an already-open incident and need no response.",
         consumes=["DetectionFinding"],
-        produces=["RiskScore", "SecurityIncident"],
+        produces=["RiskScore", "SecurityIncident", "IncidentUpdate"],
         phase_hint="analysis",
+        max_batch_size=20,
+        preferred_batch_size=10,
     )
 
-    def __init__(self, llm: LLMClient, promotion_threshold: float = 0.6):
+    def __init__(
+        self,
+        llm: LLMClient,
+        promotion_threshold: float = 0.6,
+        memo: Optional[SignatureMemo] = None,
+        clock: Callable[[], datetime] = wall_clock,
+        open_incidents: Optional[OpenIncidentIndex] = None,
+        backlog: Optional[FindingBacklog] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         self.llm = llm
         self.promotion_threshold = promotion_threshold
+        self.memo = memo
+        self.clock = clock  # stamps incidents; simulated during replays
+        self.open_incidents = open_incidents
+        self.backlog = backlog
+        self._shed = shed_counter(metrics or MetricsRegistry())
 
     async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        finding = self._parse(input_data)
+
+        try:
+            if self.memo is None:
+                risk = await self._score_with_llm(finding)
+            else:
+                async def compute() -> Dict[str, Any]:
+                    scored = await self._score_with_llm(finding)
+                    return scored.model_dump(mode="json", exclude={"finding_id"})
+
+                template = await self.memo.get_or_compute(finding_signature(finding), compute)
+                risk = RiskScore(finding_id=finding.id, **template)
+        except LLMBudgetExceeded:
+            self._defer([finding])
+            return {}
+
+        return self._build_outputs(finding, risk)
+
+    async def run_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score a chunk of findings with one LLM call. Memoized shapes are served
+        from the memo, and findings sharing a signature are sent only once.
+        """
+        findings = [self._parse(inputs) for inputs in batch]
+
+        def key(finding: DetectionFinding) -> str:
+            return finding_signature(finding) if self.memo is not None else finding.id
+
+        templates: Dict[str, Dict[str, Any]] = {}
+        to_score: Dict[str, DetectionFinding] = {}
+        for finding in findings:
+            k = key(finding)
+            if k in templates or k in to_score:
+                continue
+            cached = self.memo.get(k) if self.memo is not None else None
+            if cached is not None:
+                templates[k] = cached
+            else:
+                to_score[k] = finding
+
+        if to_score:
+            try:
+                scored = await self._score_batch_with_llm(list(to_score.values()))
+            except LLMBudgetExceeded:
+                scored = {}
+            # Only what the budget left unscored is deferred; paid-for scores are kept
+            unscored = {k for k, finding in to_score.items() if finding.id not in scored}
+            if unscored:
+                self._defer([f for f in findings if key(f) in unscored])
+            for k, finding in to_score.items():
+                if finding.id not in scored:
+                    continue
+                templates[k] = scored[finding.id].model_dump(mode="json", exclude={"finding_id"})
+                if self.memo is not None:
+                    self.memo.put(k, templates[k])
+
+        return [
+            self._build_outputs(finding, RiskScore(finding_id=finding.id, **templates[key(finding)]))
+            if key(finding) in templates else {}
+            for finding in findings
+        ]
+
+    def _defer(self, findings: List[DetectionFinding]) -> None:
+        if self.backlog is None:
+            raise LLMBudgetExceeded("LLM budget spent and no backlog to defer findings to")
+        refused = self.backlog.defer(findings)
+        if refused:
+            self._shed.inc(refused, policy="drop")
+            logger.warning("Backlog full; %d unscored finding(s) dropped", refused)
+
+    @staticmethod
+    def _parse(input_data: Dict[str, Any]) -> DetectionFinding:
         finding = input_data["DetectionFinding"]
         if isinstance(finding, dict):
             finding = DetectionFinding.model_validate(finding)
+        return finding
 
-        system_prompt = (
-            "You are a security risk analyst for Okta authentication events. "
-            "Given a detection finding, you assign severity, likelihood, impact, "
-            "and a numeric risk score between 0 and 1."
-        )
+    async def _score_batch_with_llm(
+        self, findings: List[DetectionFinding]
+    ) -> Dict[str, RiskScore]:
+        if len(findings) == 1:
+            return {findings[0].id: await self._score_with_llm(findings[0])}
+
+        findings_json = ",\n".join(f.model_dump_json(indent=2) for f in findings)
+        user_prompt = f"""
+DetectionFindings (JSON array):
+[
+{findings_json}
+]
+
+For EACH finding:
+{RISK_INSTRUCTIONS}
+Return ONLY JSON, with one result per finding, echoing its id:
+{{
+  "results": [
+    {{
+      "finding_id": "string",
+      "severity": "low|medium|high|critical",
+      "likelihood": 0.0,
+      "impact": 0.0,
+      "score": 0.0,
+      "rationale": "string"
+    }}
+  ]
+}}
+"""
 
+        raw = await self.llm.achat_json(RISK_SYSTEM_PROMPT, user_prompt)
+
+        by_id = {f.id: f for f in findings}
+        scored: Dict[str, RiskScore] = {}
+        for result in raw.get("results", []):
+            finding_id = result.get("finding_id")
+            if finding_id not in by_id or finding_id in scored:
+                continue
+            try:
+                scored[finding_id] = self._risk_from_result(finding_id, result)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        # Anything the model dropped or mangled is scored on its own. A retry
+        # the budget refuses is left out, so the caller defers just that one.
+        async def retry(finding: DetectionFinding) -> Optional[RiskScore]:
+            try:
+                return await self._score_with_llm(finding)
+            except LLMBudgetExceeded:
+                return None
+
+        missing = [f for f in findings if f.id not in scored]
+        retried = await asyncio.gather(*(retry(f) for f in missing))
+        for finding, risk in zip(missing, retried):
+            if risk is not None:
+                scored[finding.id] = risk
+        return scored
+
+    async def _score_with_llm(self, finding: DetectionFinding) -> RiskScore:
         user_prompt = f"""
 DetectionFinding (JSON):
 {finding.model_dump_json(indent=2)}
 
 Your job:
-1. Decide severity: low, medium, high, or critical.
-2. Estimate likelihood and impact (0.0-1.0).
-3. Compute an overall risk score (0.0-1.0).
-4. Explain your reasoning briefly.
-
+{RISK_INSTRUCTIONS}
 Return ONLY JSON:
 {{
   "severity": "low|medium|high|critical",
@@ -51,34 +230,47 @@ Return ONLY JSON:
 }}
 """
 
-        result = self.llm.chat_json(system_prompt, user_prompt)
+        # The client call runs in its worker pool so fan-out stays concurrent.
+        result = await self.llm.achat_json(RISK_SYSTEM_PROMPT, user_prompt)
+        return self._risk_from_result(finding.id, result)
 
-        severity = Severity(result["severity"].lower())
-        risk = RiskScore(
-            finding_id=finding.id,
-            severity=severity,
+    @staticmethod
+    def _risk_from_result(finding_id: str, result: Dict[str, Any]) -> RiskScore:
+        return RiskScore(
+            finding_id=finding_id,
+            severity=Severity(result["severity"].lower()),
             likelihood=float(result["likelihood"]),
             impact=float(result["impact"]),
             score=float(result["score"]),
             rationale=result["rationale"],
         )
 
+    def _build_outputs(self, finding: DetectionFinding, risk: RiskScore) -> Dict[str, Any]:
         promote = (
             risk.score >= self.promotion_threshold
-            or severity in {Severity.HIGH, Severity.CRITICAL}
+            or risk.severity in {Severity.HIGH, Severity.CRITICAL}
         )
 
         outputs: Dict[str, Any] = {"RiskScore": risk}
 
-        if promote:
+        family = finding_family(finding)
+        if (
+            self.open_incidents is not None
+            and finding.user_id is not None
+            and self.open_incidents.get(finding.user_id, family) is not None
+        ):
+            incident, escalated = self.open_incidents.attach(family, finding, risk)
+            outputs["SecurityIncident" if escalated else "IncidentUpdate"] = incident
+        elif promote:
             incident = SecurityIncident(
-                id=str(uuid.uuid4()),
+                id=incident_id(finding.id),
                 finding_id=finding.id,
-                title=f"Incident from {finding.finding_type.value}",
+                user_id=finding.user_id,
+                title=f"Incident from {finding.metadata.get('finding_types', finding.finding_type.value)}",
                 description=finding.description,
                 severity=risk.severity,
                 risk_score=risk.score,
-                created_at=datetime.now(timezone.utc),
+                created_at=self.clock(),
                 status="open",
                 metadata={
                     "finding_type": finding.finding_type.value,
@@ -86,5 +278,7 @@ Return ONLY JSON:
                 },
             )
             outputs["SecurityIncident"] = incident
+            if self.open_incidents is not None:
+                self.open_incidents.open(incident, family)
 
         return outputs
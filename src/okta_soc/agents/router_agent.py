@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Set, Tuple
 
 from okta_soc.core.llm import LLMClient
 from okta_soc.core.router_models import RoutePlan, RouteStep
@@ -27,14 +27,28 @@ Rules:
 
 
 class RouterAgent:
-    def __init__(self, llm: LLMClient, registry: AgentRegistry):
+    """
+    Asks the LLM to compose a pipeline for the data in the context.
+
+    With cache_plans=True a validated plan is reused for later runs that
+    start from the same data types with the same registered agents, which is
+    what a long-running process polling for new events sees on every cycle.
+    """
+
+    def __init__(self, llm: LLMClient, registry: AgentRegistry, cache_plans: bool = False):
         self.llm = llm
         self.registry = registry
+        self.cache_plans = cache_plans
+        self._plans: Dict[Tuple[Tuple[str, ...], str], RoutePlan] = {}
 
     async def run(self, context: PipelineContext) -> RoutePlan:
         catalog = self.registry.catalog_for_llm()
         available_types = context.available_types()
 
+        key = (tuple(sorted(available_types)), catalog)
+        if self.cache_plans and key in self._plans:
+            return self._plans[key].model_copy(deep=True)
+
         user_prompt = f"""
 Available agents:
 {catalog}
@@ -58,7 +72,8 @@ Return ONLY JSON:
 }}
 """
 
-        raw = self.llm.chat_json(ROUTER_SYSTEM_PROMPT, user_prompt, temperature=0.1)
+        # Run the blocking LLM call off the event loop so speculative work can overlap it.
+        raw = await self.llm.achat_json(ROUTER_SYSTEM_PROMPT, user_prompt, temperature=0.1)
         raw_steps = raw.get("steps", [])
         steps = [
             RouteStep(
@@ -72,6 +87,8 @@ Return ONLY JSON:
 
         # Validate type compatibility
         plan = self._validate_type_compatibility(plan, context)
+        if self.cache_plans:
+            self._plans[key] = plan.model_copy(deep=True)
         return plan
 
     def _validate_type_compatibility(
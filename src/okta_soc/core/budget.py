@@ -0,0 +1,71 @@
+import threading
+from typing import Dict, Optional
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """Raised instead of making an LLM call once the run's budget is spent."""
+
+
+class LLMBudget:
+    """
+    Cap on the LLM calls and tokens one pipeline run may spend.
+
+    LLMClient reserves a call before every request and charges its tokens
+    afterwards, so the cap holds however the calls are spread over agents
+    and worker threads. A token cap can be overshot by the calls in flight
+    when it is crossed; calls after that are refused. None means no cap. The pipeline calls
+    reset() at the start of each run.
+    """
+
+    def __init__(self, max_calls: Optional[int] = None, max_tokens: Optional[int] = None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.calls = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.tokens = 0
+
+    @property
+    def remaining_calls(self) -> Optional[int]:
+        """Calls left before the cap, or None when calls are not capped."""
+        if self.max_calls is None:
+            return None
+        with self._lock:
+            return max(0, self.max_calls - self.calls)
+
+    def _exhausted(self) -> bool:
+        return (self.max_calls is not None and self.calls >= self.max_calls) or (
+            self.max_tokens is not None and self.tokens >= self.max_tokens
+        )
+
+    @property
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self._exhausted()
+
+    def reserve(self) -> None:
+        """Count one call about to be made, or raise LLMBudgetExceeded if none are left."""
+        with self._lock:
+            if self._exhausted():
+                raise LLMBudgetExceeded(
+                    f"LLM budget for this run is spent ({self.calls} calls, {self.tokens} tokens)"
+                )
+            self.calls += 1
+
+    def charge(self, tokens: int) -> None:
+        """Record the tokens a reserved call used."""
+        with self._lock:
+            self.tokens += tokens
+
+    def snapshot(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "tokens": self.tokens,
+                "max_calls": self.max_calls,
+                "max_tokens": self.max_tokens,
+            }
@@ -0,0 +1,120 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from okta_soc.core.pipeline_context import PipelineContext, StepResult
+from okta_soc.core.router_models import RoutePlan
+from okta_soc.core.serialization import encode, decode
+
+
+class NoCheckpointError(ValueError):
+    """Raised when a resume is requested but no usable checkpoint exists."""
+
+
+@dataclass
+class CheckpointState:
+    data: Dict[str, Any]
+    metadata: Dict[str, Any]
+    plan: RoutePlan
+    steps: Dict[int, StepResult] = field(default_factory=dict)
+    step_outputs: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    items: Dict[int, Dict[int, Dict[str, Any]]] = field(default_factory=dict)
+
+
+class Checkpoint:
+    """
+    Append-only JSONL journal of a pipeline run.
+
+    The first records hold the initial context and the validated RoutePlan.
+    After that each completed iterate_over item and each completed step adds
+    one record carrying only the data it produced, so the file grows with the
+    work done and a crash loses at most the item in flight. Iterated steps are
+    rebuilt from their item records rather than written twice.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def start(self, context: PipelineContext, plan: RoutePlan) -> None:
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w")
+        self._write({"kind": "start", "metadata": context.metadata, "data": encode(context.data)})
+        self._write({"kind": "plan", "plan": plan.model_dump(mode="json")})
+
+    def resume(self) -> Optional[CheckpointState]:
+        """Load the journal (if any) and reopen it so further progress is appended."""
+        state = self.load()
+        if state is not None:
+            self.close()
+            self._file = self.path.open("a")
+        return state
+
+    def record_item(self, step_index: int, item_index: int, outputs: Dict[str, Any]) -> None:
+        self._write({"kind": "item", "step": step_index, "item": item_index, "outputs": encode(outputs)})
+
+    def record_step(
+        self, step_index: int, result: StepResult, outputs: Optional[Dict[str, Any]]
+    ) -> None:
+        self._write({
+            "kind": "step",
+            "step": step_index,
+            "agent": result.agent,
+            "produces": result.outputs,
+            "speculative": result.speculative,
+            "outputs": encode(outputs) if outputs is not None else None,
+        })
+
+    def load(self) -> Optional[CheckpointState]:
+        if not self.path.exists():
+            return None
+
+        records = []
+        with self.path.open() as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn trailing write from a crash; everything before it is intact.
+                    break
+
+        if len(records) < 2 or records[0]["kind"] != "start" or records[1]["kind"] != "plan":
+            return None
+
+        state = CheckpointState(
+            data=decode(records[0]["data"]),
+            metadata=records[0]["metadata"],
+            plan=RoutePlan.model_validate(records[1]["plan"]),
+        )
+        for record in records[2:]:
+            if record["kind"] == "item":
+                state.items.setdefault(record["step"], {})[record["item"]] = decode(record["outputs"])
+            elif record["kind"] == "step":
+                state.steps[record["step"]] = StepResult(
+                    agent=record["agent"],
+                    outputs=record["produces"],
+                    speculative=record["speculative"],
+                )
+                if record["outputs"] is not None:
+                    state.step_outputs[record["step"]] = decode(record["outputs"])
+        return state
+
+    def clear(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
@@ -0,0 +1,48 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+
+def wall_clock() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class SimulatedClock:
+    """
+    Event-time clock for replays: a `Callable[[], datetime]` like the clocks
+    watch() and the storage layer take, that starts at `start` and runs
+    `speed` times faster than the wall clock.
+
+    With speed=math.inf (as fast as possible) sleep_until() jumps straight
+    to its target, and in between time runs at the wall rate, so work still
+    takes the time it really takes and shows up as detection lag.
+    """
+
+    def __init__(
+        self,
+        start: datetime,
+        speed: float = 1.0,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self._rate = 1.0 if math.isinf(speed) else speed
+        self._monotonic = monotonic
+        self._origin = start
+        self._wall_origin = monotonic()
+
+    def __call__(self) -> datetime:
+        elapsed = (self._monotonic() - self._wall_origin) * self._rate
+        return self._origin + timedelta(seconds=elapsed)
+
+    async def sleep_until(self, when: datetime) -> None:
+        remaining = (when - self()).total_seconds()
+        if remaining <= 0:
+            return
+        if math.isinf(self.speed):
+            self._origin += timedelta(seconds=remaining)
+            return
+        await asyncio.sleep(remaining / self.speed)
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter for blocking LLM calls.
+
+    The limit grows additively (roughly +1 per `limit` successful calls) while
+    the p90 latency of recent calls stays within `tolerance` times the
+    baseline, and is cut multiplicatively by `backoff` when p90 climbs above
+    that or a call fails. The baseline is a slow moving average (weight
+    `smoothing`) of the window's median, so one unusually fast call cannot pin
+    it, and it follows the inference server if its normal latency changes.
+
+    Thread-safe: callers run chat requests in worker threads and block in
+    acquire() until a slot is free.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        window: int = 20,
+        min_samples: int = 5,
+        tolerance: float = 2.0,
+        backoff: float = 0.5,
+        smoothing: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.min_samples = min_samples
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.clock = clock
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.calls = 0
+        self.errors = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, error: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self.calls += 1
+            if error:
+                self.errors += 1
+                self._decrease()
+            else:
+                self._observe(latency)
+            self._cond.notify_all()
+
+    def abandon(self) -> None:
+        """Free a slot whose call was interrupted, without judging the server by it."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        start = self.clock()
+        try:
+            yield
+        except Exception:
+            self.release(self.clock() - start, error=True)
+            raise
+        except BaseException:
+            # Cancelled or interrupted, not a server failure
+            self.abandon()
+            raise
+        self.release(self.clock() - start)
+
+    def _observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+        if len(self._latencies) < self.min_samples:
+            return
+        samples = list(self._latencies)
+        median = _percentile(samples, 0.5)
+        if self.baseline is None:
+            self.baseline = median
+        if _percentile(samples, 0.9) > self.baseline * self.tolerance:
+            self._decrease()
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        self.baseline += (median - self.baseline) * self.smoothing
+
+    def _decrease(self) -> None:
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        # Judge the new limit on fresh samples only.
+        self._latencies.clear()
+
+    def metrics(self) -> Dict[str, float]:
+        with self._cond:
+            samples = list(self._latencies)
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "errors": self.errors,
+                "baseline_latency_seconds": self.baseline or 0.0,
+                "p50_latency_seconds": _percentile(samples, 0.5) if samples else 0.0,
+                "p90_latency_seconds": _percentile(samples, 0.9) if samples else 0.0,
+            }
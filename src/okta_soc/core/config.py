@@ -10,6 +10,57 @@ class Settings(BaseModel):
     okta_api_token: str = os.getenv("OKTA_API_TOKEN", "REPLACE_ME")
     llm_base_url: str = os.getenv("LLM_BASE_URL", "http://100.113.108.1:1234/v1")
     llm_model: str = os.getenv("LLM_MODEL", "gpt-oss-20b")
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    llm_max_calls_per_run: int = int(os.getenv("LLM_MAX_CALLS_PER_RUN", "0"))  # 0 = no cap
+    llm_max_tokens_per_run: int = int(os.getenv("LLM_MAX_TOKENS_PER_RUN", "0"))  # 0 = no cap
+    max_findings_per_run: int = int(os.getenv("MAX_FINDINGS_PER_RUN", "0"))  # 0 = no cap
+    backlog_path: str = os.getenv("BACKLOG_PATH", "data/backlog.json")
+    backlog_max_findings: int = int(os.getenv("BACKLOG_MAX_FINDINGS", "10000"))  # 0 = unbounded
+    max_events_per_run: int = int(os.getenv("MAX_EVENTS_PER_RUN", "50000"))  # 0 = no sampling
+    max_findings_per_actor: int = int(os.getenv("MAX_FINDINGS_PER_ACTOR", "20"))  # 0 = no collapsing
+    lean_events: bool = os.getenv("LEAN_EVENTS", "false").lower() in ("1", "true", "yes")
+    max_items_in_flight: int = int(os.getenv("MAX_ITEMS_IN_FLIGHT", "64"))  # 0 = unbounded
+    privileged_users: str = os.getenv("PRIVILEGED_USERS", "")  # comma-separated user ids
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "jsonl")  # jsonl / sqlite
+    data_dir: str = os.getenv("DATA_DIR", "data")  # JSONL artifact directories
+    sqlite_path: str = os.getenv("SQLITE_PATH", "data/okta_soc.db")
+    segment_max_bytes: int = int(os.getenv("ARTIFACT_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+    retention_days: int = int(os.getenv("ARTIFACT_RETENTION_DAYS", "90"))
+    storage_fsync: bool = os.getenv("STORAGE_FSYNC", "false").lower() in ("1", "true", "yes")
+    entity_index_path: str = os.getenv("ENTITY_INDEX_PATH", "data/entity_index.db")
+    watch_interval_seconds: float = float(os.getenv("WATCH_INTERVAL_SECONDS", "60"))
+    watch_jitter: float = float(os.getenv("WATCH_JITTER", "0.1"))
+    correlation_gap_minutes: float = float(os.getenv("CORRELATION_GAP_MINUTES", "30"))
+    detector_lookback_minutes: float = float(os.getenv("DETECTOR_LOOKBACK_MINUTES", "60"))
+    api_host: str = os.getenv("API_HOST", "127.0.0.1")
+    api_port: int = int(os.getenv("API_PORT", "8080"))
+    api_max_pending_events: int = int(os.getenv("API_MAX_PENDING_EVENTS", "10000"))
+    api_max_body_bytes: int = int(os.getenv("API_MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+    push_max_attempts: int = int(os.getenv("PUSH_MAX_ATTEMPTS", "3"))
+    push_dead_letter_path: str = os.getenv("PUSH_DEAD_LETTER_PATH", "data/push_dead_letter.jsonl")
+    metrics_path: str = os.getenv("METRICS_PATH", "data/metrics.prom")
+    profile_dir: str = os.getenv("PROFILE_DIR", "data/profiles")
+    checkpoint_path: str = os.getenv("PIPELINE_CHECKPOINT_PATH", "data/checkpoint.jsonl")
+    open_incidents_path: str = os.getenv("OPEN_INCIDENTS_PATH", "data/open_incidents.json")
+    open_incident_ttl_hours: float = float(os.getenv("OPEN_INCIDENT_TTL_HOURS", "72"))
+    memo_path: str = os.getenv("LLM_MEMO_PATH", "data/llm_memo.json")
+    memo_ttl_seconds: float = float(os.getenv("LLM_MEMO_TTL_SECONDS", "86400"))
+    memo_max_reuses: int = int(os.getenv("LLM_MEMO_MAX_REUSES", "50"))
+
+
+# Settings naming a file or directory the pipeline keeps state in (besides
+# data_dir); a replay moves all of them to a directory of its own.
+STATE_PATHS = (
+    "sqlite_path",
+    "entity_index_path",
+    "metrics_path",
+    "profile_dir",
+    "checkpoint_path",
+    "open_incidents_path",
+    "memo_path",
+    "backlog_path",
+    "push_dead_letter_path",
+)
 
 
 def load_settings() -> Settings:
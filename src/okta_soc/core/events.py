@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+from okta_soc.core.models import OktaEvent
+
+
+@dataclass(slots=True, kw_only=True)
+class Event:
+    """
+    Internal form of an OktaEvent, used from ingest through detection.
+
+    A slotted dataclass with the same fields as the pydantic OktaEvent: no
+    per-instance __dict__, no validation on construction and plain attribute
+    reads, which matters at millions of events per run. Records are checked
+    once where they enter (event_from_okta); pydantic is used only when an
+    event crosses a trust boundary as data, such as a checkpoint read back
+    from disk (from_dict). `raw` holds the original System Log record, or
+    None in lean mode (LEAN_EVENTS), where it is dropped at ingest.
+    """
+
+    id: str
+    event_type: str
+    actor_id: Optional[str] = None
+    actor_type: Optional[str] = None
+    target_id: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    outcome: Optional[str] = None  # SUCCESS / FAILURE
+    timestamp: datetime
+    raw: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_model(cls, model: OktaEvent) -> "Event":
+        fields = {name: getattr(model, name) for name in cls.__slots__}
+        fields["raw"] = fields["raw"] or None  # the model's empty default means "not kept"
+        return cls(**fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Event":
+        """Validate a serialized event (see to_dict) through the OktaEvent schema."""
+        return cls.from_model(OktaEvent.model_validate(data))
+
+    def to_model(self) -> OktaEvent:
+        return OktaEvent(**{name: getattr(self, name) for name in self.__slots__ if name != "raw"},
+                         raw=self.raw or {})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe form, readable by from_dict."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["timestamp"] = self.timestamp.isoformat()
+        if data["raw"] is None:
+            del data["raw"]
+        return data
+
+
+# Either form of an event, for code that records events whichever it gets.
+EVENT_TYPES = (Event, OktaEvent)
+
+
+def as_event(value: Union[Event, OktaEvent, Dict[str, Any]]) -> Event:
+    """Normalize what an agent may receive (internal event, model, or dict) to an Event."""
+    if isinstance(value, Event):
+        return value
+    if isinstance(value, OktaEvent):
+        return Event.from_model(value)
+    return Event.from_dict(value)
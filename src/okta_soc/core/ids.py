@@ -0,0 +1,21 @@
+import uuid
+from typing import Iterable, Optional
+
+# Fixed namespace so ids are stable across processes and versions.
+NAMESPACE = uuid.UUID("6f1c0b3e-8a52-4c1e-9a7d-2b0f5d4e6a91")
+
+
+def finding_id(source: str, actor_id: Optional[str], event_ids: Iterable[str]) -> str:
+    """
+    Content-addressed finding id: the same detector (or correlation) firing
+    for the same actor on the same events always yields the same id, so
+    re-processing an overlapping window produces findings the store already
+    knows instead of new ones.
+    """
+    key = "|".join([source, actor_id or "", ",".join(sorted(event_ids))])
+    return str(uuid.uuid5(NAMESPACE, key))
+
+
+def incident_id(finding_id: str) -> str:
+    """The id of the incident opened for a finding."""
+    return str(uuid.uuid5(NAMESPACE, f"incident|{finding_id}"))
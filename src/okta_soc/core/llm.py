@@ -1,8 +1,15 @@
-from typing import Any, Dict
-from openai import OpenAI
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
 import json
 import os
 
+from okta_soc.core.budget import LLMBudget, LLMBudgetExceeded
+from okta_soc.core.concurrency import AdaptiveLimiter
+from okta_soc.core.metrics import LLM_BUCKETS, MetricsRegistry
+
 
 class LLMClient:
     def __init__(
@@ -10,13 +17,35 @@ class LLMClient:
         base_url: str | None = None,
         api_key: str | None = None,
         model: str | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        metrics: Optional[MetricsRegistry] = None,
+        budget: Optional[LLMBudget] = None,
     ):
         base_url = base_url or os.getenv("LLM_BASE_URL", "http://100.113.108.1:1234/v1")
         api_key = api_key or os.getenv("LLM_API_KEY", "lm-studio")
         model = model or os.getenv("LLM_MODEL", "gpt-oss-20b")
 
+        # openai is slow to import; only pay for it when a client is built
+        from openai import OpenAI
+
         self.client = OpenAI(base_url=base_url, api_key=api_key)
         self.model = model
+        self.limiter = limiter or AdaptiveLimiter()
+        self.budget = budget
+        # Calls block a thread while they wait for a slot and for the server, so
+        # they get their own pool, sized so the limiter decides how many run,
+        # instead of holding threads the writer and the API need.
+        self.executor = ThreadPoolExecutor(max_workers=self.limiter.max_limit, thread_name_prefix="llm")
+
+        metrics = metrics or MetricsRegistry()
+        self._calls = metrics.counter("llm_calls_total", "LLM chat calls by outcome.", ["outcome"])
+        self._latency = metrics.histogram(
+            "llm_call_seconds", "Latency of LLM chat calls, including time waiting for a slot.",
+            buckets=LLM_BUCKETS,
+        )
+        self._tokens = metrics.counter("llm_tokens_total", "Tokens reported by the LLM server.", ["kind"])
+        self._limit = metrics.gauge("llm_concurrency_limit", "Current adaptive limit on in-flight LLM calls.")
+        self._in_flight = metrics.gauge("llm_in_flight", "LLM calls currently in flight.")
 
     def chat(
         self,
@@ -24,14 +53,39 @@ class LLMClient:
         user_prompt: str,
         temperature: float = 0.1,
     ) -> str:
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=temperature,
-        )
+        if self.budget is not None:
+            try:
+                self.budget.reserve()
+            except LLMBudgetExceeded:
+                self._calls.inc(outcome="over_budget")
+                raise
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with self.limiter.slot():
+                self._in_flight.set(self.limiter.in_flight)
+                resp = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=temperature,
+                )
+            outcome = "ok"
+        finally:
+            self._calls.inc(outcome=outcome)
+            self._latency.observe(time.perf_counter() - start)
+            self._limit.set(int(self.limiter.limit))
+            self._in_flight.set(self.limiter.in_flight)
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            self._tokens.inc(prompt_tokens, kind="prompt")
+            self._tokens.inc(completion_tokens, kind="completion")
+            if self.budget is not None:
+                self.budget.charge(prompt_tokens + completion_tokens)
         return resp.choices[0].message.content or ""
 
     def chat_json(
@@ -51,3 +105,15 @@ class LLMClient:
         if first_brace != -1 and last_brace != -1:
             content = content[first_brace : last_brace + 1]
         return json.loads(content)
+
+    async def achat_json(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """chat_json() in the client's worker pool, off the event loop."""
+        call = functools.partial(self.chat_json, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+    def metrics(self) -> Dict[str, float]:
+        """Current concurrency limit and observed latency of chat calls."""
+        return self.limiter.metrics()
@@ -0,0 +1,191 @@
+import asyncio
+import copy
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import DetectionFinding, SecurityIncident
+
+
+def _bucket(value: Any) -> Any:
+    """
+    Collapse a metadata value into a coarse bucket so that findings of the
+    same shape share a signature. Numbers are rounded up to the next power of
+    two (5, 6, 7 and 8 failed logins all land in the 8 bucket); strings and
+    booleans are kept as-is; anything else is ignored.
+    """
+    if isinstance(value, bool) or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        if value <= 1:
+            return 1 if value > 0 else 0
+        return 2 ** math.ceil(math.log2(value))
+    return None
+
+
+def _features(metadata: Dict[str, Any], exclude: tuple = ()) -> Dict[str, Any]:
+    features = {}
+    for key, value in metadata.items():
+        if key in exclude:
+            continue
+        bucket = _bucket(value)
+        if bucket is not None:
+            features[key] = bucket
+    return features
+
+
+def finding_signature(finding: DetectionFinding) -> str:
+    """Normalized signature of a finding: type plus bucketed metadata."""
+    return json.dumps(
+        ["finding", finding.finding_type.value, _features(finding.metadata)],
+        sort_keys=True,
+    )
+
+
+def incident_signature(incident: SecurityIncident) -> str:
+    """Normalized signature of an incident: finding type, severity and bucketed metadata."""
+    return json.dumps(
+        [
+            "incident",
+            incident.metadata.get("finding_type"),
+            incident.severity.value,
+            _features(incident.metadata, exclude=("finding_type",)),
+        ],
+        sort_keys=True,
+    )
+
+
+@dataclass
+class MemoEntry:
+    value: Dict[str, Any]
+    stored_at: float
+    reuses: int = 0
+
+
+class SignatureMemo:
+    """
+    Cache of LLM answers keyed by finding/incident signature.
+
+    An entry is served until it is older than ttl_seconds or has been reused
+    max_reuses times; after that get() reports a miss so the caller asks the
+    LLM again and put() refreshes the entry. get_or_compute() additionally
+    collapses concurrent misses for one signature into a single computation,
+    so a fan-out of identical findings costs one LLM call. When a path is
+    given the memo is loaded from and saved to that JSON file so reuse
+    carries across runs.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 24 * 3600,
+        max_reuses: int = 50,
+        path: Path | None = None,
+        clock: Callable[[], float] = time.time,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_reuses = max_reuses
+        self.path = path
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, MemoEntry] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._lookups = (metrics or MetricsRegistry()).counter(
+            "llm_memo_lookups_total", "Memoized LLM answer lookups: hit, miss, or coalesced (a miss then served by a concurrent identical call).", ["result"]
+        )
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(signature)
+        if entry is None:
+            return self._miss()
+        if self.clock() - entry.stored_at > self.ttl_seconds:
+            del self._entries[signature]
+            return self._miss()
+        if entry.reuses >= self.max_reuses:
+            # Re-validate with the LLM; the caller's put() resets the counter.
+            return self._miss()
+        entry.reuses += 1
+        self.hits += 1
+        self._lookups.inc(result="hit")
+        return copy.deepcopy(entry.value)
+
+    def _miss(self) -> None:
+        self.misses += 1
+        self._lookups.inc(result="miss")
+
+    def put(self, signature: str, value: Dict[str, Any]) -> None:
+        self._entries[signature] = MemoEntry(value=copy.deepcopy(value), stored_at=self.clock())
+
+    async def get_or_compute(
+        self,
+        signature: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        cached = self.get(signature)
+        if cached is not None:
+            return cached
+
+        pending = self._pending.get(signature)
+        if pending is not None:
+            try:
+                value = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                return await compute()
+            except Exception:
+                # The leader failed; compute on our own rather than share the error.
+                return await compute()
+            # Served by the leader's call after all
+            self.misses -= 1
+            self.hits += 1
+            self._lookups.inc(result="coalesced")
+            return copy.deepcopy(value)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[signature] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody is waiting
+            raise
+        finally:
+            del self._pending[signature]
+        self.put(signature, value)
+        future.set_result(value)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        now = self.clock()
+        live = {
+            sig: asdict(entry)
+            for sig, entry in self._entries.items()
+            if now - entry.stored_at <= self.ttl_seconds
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w") as f:
+            json.dump(live, f)
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        with self.path.open() as f:
+            raw = json.load(f)
+        self._entries = {sig: MemoEntry(**entry) for sig, entry in raw.items()}
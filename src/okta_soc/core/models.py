@@ -15,6 +15,7 @@ class FindingType(str, Enum):
     IMPOSSIBLE_TRAVEL = "impossible_travel"
     FAILED_LOGIN_BURST = "failed_login_burst"
     MFA_FATIGUE = "mfa_fatigue"
+    CORRELATED = "correlated"  # several findings for one actor episode
     OTHER = "other"
 
 
@@ -57,6 +58,7 @@ class RiskScore(BaseModel):
 class SecurityIncident(BaseModel):
     id: str
     finding_id: str
+    user_id: Optional[str] = None
     title: str
     description: str
     severity: Severity
@@ -83,6 +85,7 @@ class ResponsePlan(BaseModel):
 
 class CommandSuggestion(BaseModel):
     step_id: str
+    incident_id: Optional[str] = None
     description: str
     command: str
     system: str  # e.g. "okta_api", "okta_cli", "siem", "email"
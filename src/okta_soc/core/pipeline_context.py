@@ -1,11 +1,14 @@
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from okta_soc.core.spill import SpillStore
 
 
 @dataclass
 class StepResult:
     agent: str
     outputs: List[str]
+    speculative: bool = False
 
 
 @dataclass
@@ -13,6 +16,21 @@ class PipelineContext:
     data: Dict[str, Any]
     metadata: Dict[str, Any]
     history: List[StepResult] = field(default_factory=list)
+    spill: Optional[SpillStore] = None
 
     def available_types(self) -> List[str]:
         return list(self.data.keys())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up a data type in memory, falling back to spilled entries."""
+        if key in self.data:
+            return self.data[key]
+        if self.spill is not None:
+            return self.spill.get(key, default)
+        return default
+
+    def release(self, key: str, keep: bool = False) -> None:
+        """Drop a data type from memory; with keep=True move it to the spill store instead."""
+        value = self.data.pop(key)
+        if keep and self.spill is not None:
+            self.spill.put(key, value)
@@ -0,0 +1,182 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_PACKAGE_DIR = str(Path(__file__).resolve().parent.parent)
+
+
+@dataclass
+class SpanRecord:
+    seq: int
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    allocated_bytes: int
+
+
+@dataclass
+class _Span:
+    name: str
+    profile: cProfile.Profile
+
+
+class Profiler:
+    """
+    Opt-in profiling for a pipeline run (`okta-soc --profile`).
+
+    span(name) wraps a block in its own cProfile profile and a tracemalloc
+    snapshot diff, and writes `<seq>-<name>.pstats` (open it with pstats or
+    snakeviz) and `<seq>-<name>.alloc.txt` (the top allocation sites by net
+    growth) into a directory per run. Spans nest: a nested span's calls are
+    profiled in its own file rather than its parent's, while the parent's
+    allocation diff includes the child's.
+
+    Only spans opened on the thread that created the profiler are profiled
+    (cProfile is per thread); elsewhere span() does nothing. A sampling
+    thread meanwhile records the stacks of the main thread, tagged with the
+    open span, and of every thread running package code (LLM calls in
+    worker threads), and close() writes them to `stacks.collapsed` for
+    flamegraph.pl or speedscope, plus `summary.txt` with every span's wall
+    time, CPU time and net allocation.
+    """
+
+    def __init__(self, directory: Path, sample_interval: float = 0.005, top: int = 25):
+        self.directory = directory / time.strftime("%Y%m%dT%H%M%S")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_interval = sample_interval
+        self.top = top
+        self.spans: List[SpanRecord] = []
+        self._owner = threading.get_ident()
+        self._stack: List[_Span] = []
+        self._seq = 0
+        self._samples: Counter = Counter()
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if threading.get_ident() != self._owner or self._stop.is_set():
+            yield
+            return
+
+        self._seq += 1
+        seq = self._seq
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent.profile.disable()
+
+        before = tracemalloc.take_snapshot()
+        span = _Span(name=name, profile=cProfile.Profile())
+        self._stack.append(span)
+        wall, cpu = time.perf_counter(), time.process_time()
+        span.profile.enable()
+        try:
+            yield
+        finally:
+            span.profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self._stack.remove(span)
+            after = tracemalloc.take_snapshot()
+            allocated = self._write(seq, span, before, after)
+            self.spans.append(SpanRecord(seq, name, wall, cpu, allocated))
+            if parent is not None and self._stack and self._stack[-1] is parent:
+                parent.profile.enable()
+
+    def close(self) -> Path:
+        """Stop sampling and write the collapsed stacks and summary. Returns the run directory."""
+        if self._stop.is_set():
+            return self.directory
+        self._stop.set()
+        self._sampler.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        with (self.directory / "stacks.collapsed").open("w") as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+        with (self.directory / "summary.txt").open("w") as f:
+            f.write(f"{'seq':>4}  {'span':<40} {'wall_s':>9} {'cpu_s':>9} {'alloc_kib':>11}\n")
+            for s in self.spans:
+                f.write(
+                    f"{s.seq:>4}  {s.name:<40} {s.wall_seconds:>9.3f} {s.cpu_seconds:>9.3f} "
+                    f"{s.allocated_bytes / 1024:>11.1f}\n"
+                )
+        return self.directory
+
+    # -- internals -------------------------------------------------------
+
+    def _write(self, seq: int, span: _Span, before, after) -> int:
+        stem = f"{seq:03d}-{''.join(c if c.isalnum() or c in '-_' else '_' for c in span.name)}"
+        span.profile.dump_stats(str(self.directory / f"{stem}.pstats"))
+
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        growth = [d for d in diff if d.size_diff > 0]
+        growth.sort(key=lambda d: d.size_diff, reverse=True)
+        with (self.directory / f"{stem}.alloc.txt").open("w") as f:
+            f.write(f"Top allocation sites by net growth during '{span.name}'\n\n")
+            for stat in growth[: self.top]:
+                frame = stat.traceback[0]
+                f.write(
+                    f"{stat.size_diff / 1024:>10.1f} KiB {stat.count_diff:>+8} blocks  "
+                    f"{frame.filename}:{frame.lineno}\n"
+                )
+        return sum(d.size_diff for d in diff)
+
+    def _sample_loop(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            names: Dict[int, str] = {t.ident: t.name for t in threading.enumerate()}
+            span = self._stack[-1].name if self._stack else None
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack, in_package = self._collapse(frame)
+                if ident == self._owner:
+                    root = names.get(ident, "main") + (f";[{span}]" if span else "")
+                elif in_package:
+                    root = names.get(ident, str(ident))
+                else:
+                    continue  # idle pool threads and other noise
+                self._samples[";".join([root] + stack)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> Tuple[List[str], bool]:
+        """Root-first frames as 'func (file.py:line)', and whether any is package code."""
+        stack: List[str] = []
+        in_package = False
+        while frame is not None:
+            code = frame.f_code
+            in_package = in_package or code.co_filename.startswith(_PACKAGE_DIR)
+            name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            stack.append(name.replace(";", ":"))
+            frame = frame.f_back
+        stack.reverse()
+        return stack, in_package
+
+
+@contextmanager
+def maybe_span(profiler: Optional[Profiler], name: str) -> Iterator[None]:
+    """profiler.span(name), or nothing when profiling is off."""
+    if profiler is None:
+        yield
+    else:
+        with profiler.span(name):
+            yield
+
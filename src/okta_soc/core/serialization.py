@@ -0,0 +1,58 @@
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+from okta_soc.core.events import Event
+from okta_soc.core.models import (
+    OktaEvent,
+    DetectionFinding,
+    RiskScore,
+    SecurityIncident,
+    ResponseStep,
+    ResponsePlan,
+    CommandSuggestion,
+    EscalationResult,
+)
+from okta_soc.core.router_models import RouteStep, RoutePlan
+
+MODEL_TYPES: Dict[str, Type[BaseModel]] = {
+    cls.__name__: cls
+    for cls in (
+        OktaEvent,
+        DetectionFinding,
+        RiskScore,
+        SecurityIncident,
+        ResponseStep,
+        ResponsePlan,
+        CommandSuggestion,
+        EscalationResult,
+        RouteStep,
+        RoutePlan,
+    )
+}
+
+
+def encode(value: Any) -> Any:
+    """Turn pipeline data (models, lists, dicts) into JSON-safe values, tagging models by type."""
+    if isinstance(value, BaseModel):
+        return {"__model__": type(value).__name__, "data": value.model_dump(mode="json")}
+    if isinstance(value, Event):
+        return {"__model__": "Event", "data": value.to_dict()}
+    if isinstance(value, (list, tuple)):
+        return [encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: encode(v) for k, v in value.items()}
+    return value
+
+
+def decode(value: Any) -> Any:
+    """Inverse of encode(): rebuild tagged models, recursing through lists and dicts."""
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    if isinstance(value, dict):
+        if set(value) == {"__model__", "data"} and value["__model__"] == "Event":
+            return Event.from_dict(value["data"])
+        if set(value) == {"__model__", "data"} and value["__model__"] in MODEL_TYPES:
+            return MODEL_TYPES[value["__model__"]].model_validate(value["data"])
+        return {k: decode(v) for k, v in value.items()}
+    return value
@@ -0,0 +1,121 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from okta_soc.core.ids import finding_id
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.events import Event
+from okta_soc.core.models import DetectionFinding
+
+
+def shed_counter(metrics: MetricsRegistry):
+    """The counter every shedding policy reports to, labelled by policy."""
+    return metrics.counter(
+        "shed_total",
+        "Records shed under load, by policy: sample and truncate drop events, "
+        "collapse merges findings, drop discards findings the full backlog cannot hold.",
+        ["policy"],
+    )
+
+
+def _stable_rank(event: Event) -> int:
+    # Deterministic across processes, so re-processing a window sheds the same events.
+    return zlib.crc32(event.id.encode())
+
+
+class LoadShedder:
+    """
+    Keeps one run's work bounded when volume spikes.
+
+    sample_events() caps the events handed to detection at `max_events`.
+    Events that carry signal for the detectors are kept: failures, and each
+    actor's first event and every event where the actor's country changes.
+    The rest (repeat successes from the same place, events with no actor)
+    are sampled down to fit, by a stable hash of the event id. If the
+    signal events alone exceed the cap, the newest `max_events` of them are
+    kept ("truncate").
+
+    collapse_findings() caps each actor at `max_findings_per_actor` findings
+    of one type; a larger group (one failed-login burst seen from every
+    window start, say) is merged into a single finding over all its events.
+
+    A limit of None turns its policy off. Every shed record is counted in
+    shed_total by policy.
+    """
+
+    def __init__(
+        self,
+        max_events: Optional[int] = None,
+        max_findings_per_actor: Optional[int] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.max_events = max_events
+        self.max_findings_per_actor = max_findings_per_actor
+        self._shed = shed_counter(metrics or MetricsRegistry())
+
+    def sample_events(self, events: List[Event]) -> List[Event]:
+        if self.max_events is None or len(events) <= self.max_events:
+            return events
+
+        signal: List[int] = []
+        low: List[int] = []
+        last_country: Dict[str, Optional[str]] = {}
+        order = sorted(range(len(events)), key=lambda i: (events[i].actor_id or "", events[i].timestamp))
+        for i in order:
+            event = events[i]
+            actor = event.actor_id
+            if actor is None:
+                low.append(i)
+            elif event.outcome == "FAILURE" or actor not in last_country or event.country != last_country[actor]:
+                signal.append(i)
+            else:
+                low.append(i)
+            if actor is not None:
+                last_country[actor] = event.country
+
+        room = self.max_events - len(signal)
+        if room <= 0:
+            signal.sort(key=lambda i: events[i].timestamp)
+            keep = set(signal[-self.max_events:])
+            self._shed.inc(len(low), policy="sample")
+            self._shed.inc(len(signal) - len(keep), policy="truncate")
+        else:
+            low.sort(key=lambda i: _stable_rank(events[i]))
+            keep = set(signal) | set(low[:room])
+            self._shed.inc(len(low) - room, policy="sample")
+        return [e for i, e in enumerate(events) if i in keep]
+
+    def collapse_findings(self, findings: List[DetectionFinding]) -> List[DetectionFinding]:
+        if self.max_findings_per_actor is None:
+            return findings
+
+        groups: Dict[Tuple[Optional[str], str], List[DetectionFinding]] = {}
+        for finding in findings:
+            groups.setdefault((finding.user_id, finding.finding_type.value), []).append(finding)
+
+        oversized = [
+            key for key, group in groups.items()
+            if key[0] is not None and len(group) > self.max_findings_per_actor
+        ]
+        if not oversized:
+            return findings
+        for key in oversized:
+            group = groups[key]
+            groups[key] = [self._collapse(group)]
+            self._shed.inc(len(group) - 1, policy="collapse")
+        return sorted((f for group in groups.values() for f in group), key=lambda f: f.created_at)
+
+    @staticmethod
+    def _collapse(group: List[DetectionFinding]) -> DetectionFinding:
+        widest = max(group, key=lambda f: len(f.okta_event_ids))
+        user_id, kind = widest.user_id, widest.finding_type
+        event_ids = list(dict.fromkeys(e for f in group for e in f.okta_event_ids))
+        return DetectionFinding(
+            id=finding_id(f"{kind.value}-collapsed", user_id, event_ids),
+            finding_type=kind,
+            description=f"{len(group)} {kind.value} findings for actor {user_id} collapsed under load. "
+            + widest.description,
+            okta_event_ids=event_ids,
+            user_id=user_id,
+            created_at=max(f.created_at for f in group),
+            metadata={**widest.metadata, "count": len(event_ids), "collapsed_findings": len(group)},
+        )
@@ -0,0 +1,42 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+from okta_soc.core.serialization import encode, decode
+
+
+class SpillStore:
+    """
+    On-disk home for pipeline data that no later step reads but that is
+    still needed after the run (e.g. for persistence). Values are written
+    once with the checkpoint encoding and read back on demand.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._files: Dict[str, Path] = {}
+
+    def put(self, key: str, value: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{len(self._files)}.json"
+        with path.open("w") as f:
+            json.dump(encode(value), f, separators=(",", ":"))
+        self._files[key] = path
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._files.get(key)
+        if path is None:
+            return default
+        with path.open() as f:
+            return decode(json.load(f))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._files
+
+    def keys(self) -> List[str]:
+        return list(self._files)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._files.clear()
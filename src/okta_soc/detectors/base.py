@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import List
-from okta_soc.core.models import OktaEvent, DetectionFinding
+from okta_soc.core.events import Event
+from okta_soc.core.models import DetectionFinding
 
 
 class BaseDetector(ABC):
     name: str
 
     @abstractmethod
-    def detect(self, events: List[OktaEvent]) -> List[DetectionFinding]:
+    def detect(self, events: List[Event]) -> List[DetectionFinding]:
         ...
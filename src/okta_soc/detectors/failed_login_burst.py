@@ -1,8 +1,9 @@
 from datetime import timedelta
 from typing import List
-import uuid
 
-from okta_soc.core.models import OktaEvent, DetectionFinding, FindingType
+from okta_soc.core.ids import finding_id
+from okta_soc.core.events import Event
+from okta_soc.core.models import DetectionFinding, FindingType
 from .base import BaseDetector
 
 
@@ -13,9 +14,9 @@ class FailedLoginBurstDetector(BaseDetector):
         self.threshold = threshold
         self.window = timedelta(minutes=window_minutes)
 
-    def detect(self, events: List[OktaEvent]) -> List[DetectionFinding]:
+    def detect(self, events: List[Event]) -> List[DetectionFinding]:
         findings: List[DetectionFinding] = []
-        events_by_actor: dict[str, List[OktaEvent]] = {}
+        events_by_actor: dict[str, List[Event]] = {}
         for e in events:
             if not e.actor_id:
                 continue
@@ -34,7 +35,7 @@ class FailedLoginBurstDetector(BaseDetector):
                     j += 1
                 if len(window_events) >= self.threshold:
                     finding = DetectionFinding(
-                        id=str(uuid.uuid4()),
+                        id=finding_id(self.name, actor_id, [e.id for e in window_events]),
                         finding_type=FindingType.FAILED_LOGIN_BURST,
                         description=f"{len(window_events)} failed logins for actor {actor_id} within {self.window}.",
                         okta_event_ids=[e.id for e in window_events],
@@ -1,17 +1,18 @@
 from datetime import timedelta
 from typing import List
-import uuid
 
-from okta_soc.core.models import OktaEvent, DetectionFinding, FindingType
+from okta_soc.core.ids import finding_id
+from okta_soc.core.events import Event
+from okta_soc.core.models import DetectionFinding, FindingType
 from .base import BaseDetector
 
 
 class ImpossibleTravelDetector(BaseDetector):
     name = "impossible_travel"
 
-    def detect(self, events: List[OktaEvent]) -> List[DetectionFinding]:
+    def detect(self, events: List[Event]) -> List[DetectionFinding]:
         findings: List[DetectionFinding] = []
-        events_by_actor: dict[str, List[OktaEvent]] = {}
+        events_by_actor: dict[str, List[Event]] = {}
         for e in events:
             if not e.actor_id:
                 continue
@@ -29,7 +30,7 @@ class ImpossibleTravelDetector(BaseDetector):
                 dt = b.timestamp - a.timestamp
                 if dt < timedelta(hours=1):
                     finding = DetectionFinding(
-                        id=str(uuid.uuid4()),
+                        id=finding_id(self.name, actor_id, [a.id, b.id]),
                         finding_type=FindingType.IMPOSSIBLE_TRAVEL,
                         description=(
                             f"Possible impossible travel for actor {actor_id}: "
@@ -1,10 +1,12 @@
 from typing import List
 from .base import BaseDetector
-from .impossible_travel import ImpossibleTravelDetector
-from .failed_login_burst import FailedLoginBurstDetector
 
 
 def get_all_detectors() -> List[BaseDetector]:
+    # Imported on first use so loading the registry stays cheap
+    from .impossible_travel import ImpossibleTravelDetector
+    from .failed_login_burst import FailedLoginBurstDetector
+
     return [
         ImpossibleTravelDetector(),
         FailedLoginBurstDetector(),
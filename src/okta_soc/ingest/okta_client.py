@@ -1,9 +1,11 @@
 import json
+import time
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from okta_soc.core.models import OktaEvent
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.events import Event
 
 
 class OktaClient:
@@ -15,11 +17,28 @@ class OktaClient:
     This simulates Okta System Log events for the agentic pipeline.
     """
 
-    def __init__(self, org_url: str, api_token: str):
+    def __init__(
+        self,
+        org_url: str,
+        api_token: str,
+        metrics: Optional[MetricsRegistry] = None,
+        lean: bool = False,
+    ):
         self.org_url = org_url.rstrip("/")
         self.api_token = api_token
+        self.lean = lean  # drop each event's raw record at ingest
+        metrics = metrics or MetricsRegistry()
+        self._fetched = metrics.counter("okta_events_fetched_total", "System Log events fetched from Okta.")
+        self._latency = metrics.histogram("okta_fetch_seconds", "Time to fetch one window of System Log events.")
 
-    async def fetch_events_since(self, since: datetime) -> List[OktaEvent]:
+    async def fetch_events_since(self, since: datetime) -> List[Event]:
+        start = time.perf_counter()
+        events = await self._fetch(since)
+        self._latency.observe(time.perf_counter() - start)
+        self._fetched.inc(len(events))
+        return events
+
+    async def _fetch(self, since: datetime) -> List[Event]:
         # Demo mode: ignore the real Okta API, just read from a local file.
         demo_path = Path("tests/demo_okta_system_logs.json")
         if not demo_path.exists():
@@ -28,31 +47,91 @@ class OktaClient:
         with demo_path.open() as f:
             raw_events = json.load(f)
 
-        events: List[OktaEvent] = []
+        events: List[Event] = []
         for e in raw_events:
-            # Parse as aware datetime and normalize to UTC
-            ts = datetime.fromisoformat(e["timestamp"].replace("Z", "+00:00"))
-            ts_utc = ts.astimezone(timezone.utc)
-
+            event = event_from_okta(e, lean=self.lean)
             # basic filter so you can control window with --hours
-            if ts_utc < since:
+            if event.timestamp < since:
                 continue
-
-            events.append(
-                OktaEvent(
-                    id=e["id"],
-                    event_type=e["event_type"],
-                    actor_id=e.get("actor_id"),
-                    actor_type=e.get("actor_type"),
-                    target_id=e.get("target_id"),
-                    ip_address=e.get("ip_address"),
-                    user_agent=e.get("user_agent"),
-                    city=e.get("city"),
-                    country=e.get("country"),
-                    outcome=e.get("outcome"),
-                    timestamp=ts_utc,
-                    raw=e,
-                )
-            )
+            events.append(event)
 
         return events
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # Parse as aware datetime and normalize to UTC
+    if not isinstance(value, str):
+        raise TypeError(f"timestamp must be a string, got {type(value).__name__}")
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _str(value: Any, name: str) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    raise TypeError(f"{name} must be a string, got {type(value).__name__}")
+
+
+def _required_str(value: Any, name: str) -> str:
+    if value is None:
+        raise KeyError(name)
+    return _str(value, name)
+
+
+def _float(value: Any, name: str) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError(f"{name} must be a number, got {type(value).__name__}")
+    return float(value)
+
+
+def event_from_okta(e: Dict[str, Any], lean: bool = False) -> Event:
+    """
+    Map one System Log record to an Event. Accepts both the Okta API shape
+    (uuid, eventType, published, nested actor/client/outcome) and the
+    flattened shape of the demo file. This is where records enter the
+    pipeline, so it checks them here, once: it raises KeyError, TypeError or
+    ValueError when a required field is missing or a field has the wrong
+    type. With lean=True the original record is not kept on the event.
+    """
+    raw = None if lean else e
+    if "uuid" not in e and "eventType" not in e:
+        return Event(
+            id=_required_str(e["id"], "id"),
+            event_type=_required_str(e["event_type"], "event_type"),
+            actor_id=_str(e.get("actor_id"), "actor_id"),
+            actor_type=_str(e.get("actor_type"), "actor_type"),
+            target_id=_str(e.get("target_id"), "target_id"),
+            ip_address=_str(e.get("ip_address"), "ip_address"),
+            user_agent=_str(e.get("user_agent"), "user_agent"),
+            city=_str(e.get("city"), "city"),
+            country=_str(e.get("country"), "country"),
+            outcome=_str(e.get("outcome"), "outcome"),
+            timestamp=_parse_timestamp(e["timestamp"]),
+            raw=raw,
+        )
+
+    actor = e.get("actor") or {}
+    client = e.get("client") or {}
+    geo = client.get("geographicalContext") or {}
+    location = geo.get("geolocation") or {}
+    targets = e.get("target") or []
+    return Event(
+        id=_required_str(e["uuid"], "uuid"),
+        event_type=_required_str(e["eventType"], "eventType"),
+        actor_id=_str(actor.get("id"), "actor.id"),
+        actor_type=_str(actor.get("type"), "actor.type"),
+        target_id=_str(targets[0].get("id"), "target.id") if targets else None,
+        ip_address=_str(client.get("ipAddress"), "client.ipAddress"),
+        user_agent=_str((client.get("userAgent") or {}).get("rawUserAgent"), "client.userAgent"),
+        city=_str(geo.get("city"), "city"),
+        country=_str(geo.get("country"), "country"),
+        latitude=_float(location.get("lat"), "lat"),
+        longitude=_float(location.get("lon"), "lon"),
+        outcome=_str((e.get("outcome") or {}).get("result"), "outcome.result"),
+        timestamp=_parse_timestamp(e["published"]),
+        raw=raw,
+    )
@@ -1,11 +1,27 @@
-from datetime import datetime
-from typing import List
+import asyncio
+import logging
+import random
+import signal
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
 
-from okta_soc.core.models import OktaEvent
-from okta_soc.core.config import load_settings
+from okta_soc.core.clock import wall_clock
+from okta_soc.core.events import Event
+from okta_soc.core.budget import LLMBudget
+from okta_soc.core.config import Settings, load_settings
 from okta_soc.core.llm import LLMClient
+from okta_soc.core.concurrency import AdaptiveLimiter
+from okta_soc.core.memo import SignatureMemo
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import DetectionFinding
+from okta_soc.core.profiling import Profiler
+from okta_soc.core.shedding import LoadShedder
+from okta_soc.core.checkpoint import Checkpoint, CheckpointState, NoCheckpointError
 from okta_soc.agents.router_agent import RouterAgent
 from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.agents.correlation_agent import CorrelationAgent
+from okta_soc.agents.priority_agent import PriorityAgent
 from okta_soc.agents.risk_agent import LLMRiskAgent
 from okta_soc.agents.planner_agent import PlannerAgent
 from okta_soc.agents.command_agent import CommandAgent
@@ -13,69 +29,315 @@ from okta_soc.agents.escalation_agent import EscalationAgent
 from okta_soc.agents.registry import AgentRegistry
 from okta_soc.agents.orchestrator import Orchestrator
 from okta_soc.ingest.okta_client import OktaClient
+from okta_soc.storage.backends import open_repositories
+from okta_soc.storage.background import BackgroundWriter
+from okta_soc.storage.backlog import FindingBacklog
+from okta_soc.storage.entity_index import EntityIndex
+from okta_soc.storage.open_incidents import OpenIncidentIndex
 
+logger = logging.getLogger(__name__)
 
-async def fetch_and_process(since: datetime) -> None:
-    settings = load_settings()
-    okta = OktaClient(settings.okta_org_url, settings.okta_api_token)
 
-    llm = LLMClient(
-        base_url=settings.llm_base_url,
-        model=settings.llm_model,
-    )
+class Pipeline:
+    """
+    Everything one pipeline run needs, built once: LLM client, memo, agent
+    registry, router, orchestrator, storage and background writer.
 
-    # Build agent registry
-    registry = AgentRegistry()
-    registry.register(DetectorAgent())
-    registry.register(LLMRiskAgent(llm))
-    registry.register(PlannerAgent(llm))
-    registry.register(CommandAgent(settings.okta_org_url))
-    registry.register(EscalationAgent())
+    The CLI builds one for a single run; watch mode, replays and the HTTP API
+    keep one alive (long_running=True) so the registry, LLM connections,
+    detector lookback and cached router plans stay warm between batches.
+    run_once() and process() calls never overlap. `clock` stamps incidents
+    and measures detection lag; a replay passes its simulated clock.
+    """
 
-    # Build router and orchestrator
-    router = RouterAgent(llm=llm, registry=registry)
-    orchestrator = Orchestrator(router=router, registry=registry)
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        long_running: bool = False,
+        profiler: Optional[Profiler] = None,
+        clock: Callable[[], datetime] = wall_clock,
+    ):
+        self.settings = settings = settings or load_settings()
+        self.profiler = profiler
+        self.clock = clock
+        # One registry for every component; dumped to METRICS_PATH after each run
+        self.metrics = MetricsRegistry()
+        self.okta = OktaClient(
+            settings.okta_org_url, settings.okta_api_token, metrics=self.metrics, lean=settings.lean_events
+        )
 
-    # Fetch events
-    events: List[OktaEvent] = await okta.fetch_events_since(since)
+        # LLM spend is capped per run; findings it cannot cover wait in the
+        # backlog, most urgent first
+        self.budget = LLMBudget(
+            max_calls=settings.llm_max_calls_per_run or None,
+            max_tokens=settings.llm_max_tokens_per_run or None,
+        )
+        self.backlog = FindingBacklog(
+            Path(settings.backlog_path), max_findings=settings.backlog_max_findings or None
+        )
+        self.llm = LLMClient(
+            base_url=settings.llm_base_url,
+            model=settings.llm_model,
+            limiter=AdaptiveLimiter(max_limit=settings.llm_max_concurrency),
+            metrics=self.metrics,
+            budget=self.budget,
+        )
 
-    # Run pipeline — the LLM decides what agents to use
-    context = await orchestrator.run(
-        initial_data={"List[OktaEvent]": events},
-        metadata={"source": "okta", "since": since.isoformat()},
-    )
+        # Risk scores and plans are reused for recurring finding shapes
+        self.memo = SignatureMemo(
+            ttl_seconds=settings.memo_ttl_seconds,
+            max_reuses=settings.memo_max_reuses,
+            path=Path(settings.memo_path),
+            metrics=self.metrics,
+        )
 
-    # Persist results
-    _persist_results(context)
+        # Repeat findings for an account with an open incident are attached to
+        # it instead of opening (and planning and escalating) another one
+        self.open_incidents = OpenIncidentIndex(
+            Path(settings.open_incidents_path),
+            ttl=timedelta(hours=settings.open_incident_ttl_hours),
+            clock=clock,
+        )
 
+        self.repos = open_repositories(settings)
 
-def _persist_results(context) -> None:
-    """Save pipeline outputs to JSONL files."""
-    from okta_soc.storage.repositories import (
-        FindingsRepo, IncidentsRepo, PlansRepo, CommandsRepo, EscalationsRepo,
-    )
+        # Build agent registry. A long-running process feeds the detector
+        # only each poll's new events, so it keeps a lookback of older ones
+        lookback = timedelta(minutes=settings.detector_lookback_minutes) if long_running else None
+        self.registry = AgentRegistry()
+        # Findings an earlier run already analyzed are dropped before the LLM,
+        # and a flood of events is shed down to bounded detection work
+        shedder = LoadShedder(
+            max_events=settings.max_events_per_run or None,
+            max_findings_per_actor=settings.max_findings_per_actor or None,
+            metrics=self.metrics,
+        )
+        self.registry.register(DetectorAgent(
+            lookback=lookback,
+            metrics=self.metrics,
+            profiler=profiler,
+            known=self._analyzed,
+            shedder=shedder,
+        ))
+        self.registry.register(CorrelationAgent(
+            gap=timedelta(minutes=settings.correlation_gap_minutes),
+            known=self._analyzed,
+            metrics=self.metrics,
+        ))
+        self.registry.register(PriorityAgent(
+            budget=self.budget,
+            backlog=self.backlog,
+            max_findings=settings.max_findings_per_run or None,
+            privileged_users=[u.strip() for u in settings.privileged_users.split(",") if u.strip()],
+            metrics=self.metrics,
+        ))
+        self.registry.register(LLMRiskAgent(
+            self.llm, memo=self.memo, clock=clock, open_incidents=self.open_incidents, backlog=self.backlog,
+            metrics=self.metrics,
+        ))
+        self.registry.register(PlannerAgent(self.llm, memo=self.memo, backlog=self.backlog, metrics=self.metrics))
+        self.registry.register(CommandAgent(settings.okta_org_url))
+        self.registry.register(EscalationAgent())
 
-    findings_repo = FindingsRepo()
-    incidents_repo = IncidentsRepo()
-    plans_repo = PlansRepo()
-    commands_repo = CommandsRepo()
+        # Build router and orchestrator
+        self.router = RouterAgent(llm=self.llm, registry=self.registry, cache_plans=long_running)
+        # Results are persisted by a background writer as soon as they are
+        # produced, so the run keeps nothing for the end and data no later step
+        # reads is released as it goes. Detection starts while the router's LLM
+        # call is in flight; progress is checkpointed so an interrupted run can
+        # be resumed
+        self.entity_index = EntityIndex(Path(settings.entity_index_path), clock=clock)
+        self.writer = BackgroundWriter(self.repos, index=self.entity_index, metrics=self.metrics, clock=clock)
+        self.checkpoint = Checkpoint(Path(settings.checkpoint_path))
+        self.orchestrator = Orchestrator(
+            router=self.router,
+            registry=self.registry,
+            speculate=True,
+            checkpoint=self.checkpoint,
+            release_dead=True,
+            sink=self.writer,
+            metrics=self.metrics,
+            profiler=profiler,
+            max_in_flight=settings.max_items_in_flight or None,
+        )
+        self._lock = asyncio.Lock()
 
-    for finding in context.data.get("List[DetectionFinding]", []):
-        findings_repo.save(finding)
+    def _analyzed(self, findings: List[DetectionFinding]) -> Set[str]:
+        """
+        The findings an earlier run has dealt with: scored (their RiskScore
+        is stored) or deferred to the backlog, which hands them to the next
+        analysis itself. A finding stored by a run that failed before scoring
+        it is not among them, so the next run analyzes it.
+        """
+        known = self.repos.risks.known_ids(findings)
+        return known | {f.id for f in findings if f.id in self.backlog}
 
-    for incident in context.data.get("List[SecurityIncident]", []):
-        incidents_repo.save(incident)
+    async def start(self) -> None:
+        self.writer.start()
 
-    for plan in context.data.get("List[ResponsePlan]", []):
-        plans_repo.save(plan)
+    async def run_once(self, since: Optional[datetime], resume: bool = False) -> int:
+        """
+        Fetch the events since `since` (or resume the checkpointed run) and
+        process them. Returns the number of events fetched. The checkpoint
+        is kept if the run fails, and cleared once its results are written.
+        """
+        async with self._lock:
+            self.budget.reset()
+            fetched = await self._run(since, resume)
+            await self._finish()
+            return fetched
 
-    for cmd_list in context.data.get("List[List[CommandSuggestion]]", []):
-        if isinstance(cmd_list, list):
-            for c in cmd_list:
-                commands_repo.save("", c)
-        else:
-            commands_repo.save("", cmd_list)
+    async def process(self, events: List[Event], metadata: Dict[str, Any]) -> None:
+        """Run the pipeline over events that were pushed rather than fetched."""
+        async with self._lock:
+            self.budget.reset()
+            await self._process({"List[OktaEvent]": events}, metadata)
+            await self._finish()
 
-    escalations_repo = EscalationsRepo()
-    for escalation in context.data.get("List[EscalationResult]", []):
-        escalations_repo.save(escalation)
+    def checkpointed(self, metadata: Dict[str, Any]) -> bool:
+        """Whether the checkpoint holds the run that was started with `metadata`."""
+        state = self.checkpoint.load()
+        return state is not None and state.metadata == metadata
+
+    def abandon_checkpoint(self) -> Optional[CheckpointState]:
+        """Remove the checkpoint of a run that keeps failing; returns what it held."""
+        state = self.checkpoint.load()
+        self.checkpoint.clear()
+        return state
+
+    async def _finish(self) -> None:
+        await self.writer.flush()
+        # The run is complete and persisted, so the checkpoint is no longer needed
+        self.checkpoint.clear()
+        self.memo.save()
+        self.open_incidents.save()
+        self.backlog.save()
+        self.dump_metrics()
+        logger.info(
+            "LLM budget: %s; %d finding(s) and %d incident(s) in the backlog",
+            self.budget.snapshot(), len(self.backlog), self.backlog.incident_count,
+        )
+
+    def dump_metrics(self) -> None:
+        """Write the metrics in Prometheus text format to METRICS_PATH."""
+        self.metrics.write(Path(self.settings.metrics_path))
+
+    async def close(self) -> None:
+        """Flush whatever is still queued, even after a failed run, and release storage."""
+        try:
+            await self.writer.close()
+        finally:
+            self.repos.close()
+            self.entity_index.close()
+            self.llm.close()
+            self.dump_metrics()
+            if self.profiler is not None:
+                logger.info("Profiles written to %s", self.profiler.close())
+            logger.info("LLM concurrency: %s", self.llm.metrics())
+            logger.info("Persistence: %s", self.writer.metrics())
+
+    async def _run(self, since: Optional[datetime], resume: bool) -> int:
+        context = await self.orchestrator.resume() if resume else None
+        if context is not None:
+            return 0
+        if since is None:
+            raise NoCheckpointError("No checkpoint to resume from; pass --hours to start a new run.")
+
+        # Fetch events; the context holds the only reference so they can be
+        # released once detection has consumed them
+        initial_data = {"List[OktaEvent]": await self.okta.fetch_events_since(since)}
+        fetched = len(initial_data["List[OktaEvent]"])
+        await self._process(initial_data, {"source": "okta", "since": since.isoformat()})
+        return fetched
+
+    async def _process(self, initial_data: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+        await self._plan_waiting()
+        if not initial_data["List[OktaEvent]"] and not len(self.backlog):
+            return
+        await self.writer.publish(initial_data)  # events go into the entity timeline
+
+        # Run pipeline — the LLM decides what agents to use
+        await self.orchestrator.run(initial_data=initial_data, metadata=metadata)
+
+    async def _plan_waiting(self) -> None:
+        """
+        Plan the incidents an earlier run promoted but had no LLM budget left
+        to plan, most severe first, before this run's findings compete for
+        the budget. The router composes the response steps as for any run.
+        """
+        incidents = self.backlog.take_incidents()
+        if not incidents:
+            return
+        logger.info("Planning %d incident(s) left unplanned by an earlier run", len(incidents))
+        await self.orchestrator.run(
+            initial_data={"List[SecurityIncident]": incidents}, metadata={"source": "backlog"}
+        )
+
+
+async def fetch_and_process(
+    since: Optional[datetime], resume: bool = False, profile_dir: Optional[Path] = None
+) -> None:
+    profiler = Profiler(profile_dir) if profile_dir is not None else None
+    pipeline = Pipeline(profiler=profiler)
+    await pipeline.start()
+    try:
+        await pipeline.run_once(since, resume=resume)
+    finally:
+        await pipeline.close()
+
+
+async def watch(
+    pipeline: Pipeline,
+    since: datetime,
+    interval: float,
+    jitter: float,
+    stop: asyncio.Event,
+    clock: Callable[[], datetime] = wall_clock,
+) -> None:
+    """
+    Poll for new events every `interval` seconds (randomly stretched or
+    shortened by up to `jitter` of it) until `stop` is set. Cycles run one at
+    a time; a cycle in progress when `stop` is set finishes before the loop
+    exits. A failed cycle is resumed from its checkpoint on the next one.
+    """
+    resume_failed = False
+    while not stop.is_set():
+        started = clock()
+        try:
+            if resume_failed:
+                try:
+                    await pipeline.run_once(None, resume=True)
+                except NoCheckpointError:
+                    pass
+                resume_failed = False
+            fetched = await pipeline.run_once(since)
+            logger.info("Watch cycle processed %d new event(s)", fetched)
+            since = started
+        except Exception:
+            logger.exception("Watch cycle failed; it will be resumed next cycle")
+            resume_failed = True
+
+        delay = interval * (1 + random.uniform(-jitter, jitter))
+        elapsed = (clock() - started).total_seconds()
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(0.0, delay - elapsed))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def serve(
+    since: datetime, interval: float, jitter: float, profile_dir: Optional[Path] = None
+) -> None:
+    """Run watch() with a warm Pipeline until SIGTERM/SIGINT, then drain and exit."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    profiler = Profiler(profile_dir) if profile_dir is not None else None
+    pipeline = Pipeline(long_running=True, profiler=profiler)
+    await pipeline.start()
+    try:
+        await watch(pipeline, since, interval, jitter, stop)
+    finally:
+        await pipeline.close()
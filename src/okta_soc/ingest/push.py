@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from okta_soc.core.checkpoint import NoCheckpointError
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.events import Event
+from okta_soc.core.serialization import encode
+from okta_soc.ingest.okta_client import event_from_okta
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidEvents(ValueError):
+    """A pushed body that is not System Log JSON or NDJSON."""
+
+
+def parse_events(body: bytes, lean: bool = False) -> List[Event]:
+    """
+    Parse a pushed batch: a JSON array of System Log records (what the Okta
+    API returns), a single JSON record, or NDJSON with one record per line.
+    The whole batch is rejected if any record is invalid. With lean=True
+    the events do not keep their original records.
+    """
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    try:
+        parsed = json.loads(text)
+        records = parsed if isinstance(parsed, list) else [parsed]
+    except json.JSONDecodeError:
+        records = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as exc:
+                raise InvalidEvents(f"line {number}: {exc.msg}") from exc
+
+    events: List[Event] = []
+    for number, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            raise InvalidEvents(f"record {number}: expected a JSON object")
+        try:
+            events.append(event_from_okta(record, lean=lean))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise InvalidEvents(f"record {number}: {exc!r}") from exc
+    return events
+
+
+class EventBuffer:
+    """
+    Bounded buffer of pushed events waiting for the pipeline, counted in
+    events rather than batches. offer() never waits: a batch that does not
+    fit is refused as a whole, so the caller can tell the producer to back
+    off and retry instead of holding its connection open.
+    """
+
+    def __init__(self, max_events: int = 10_000):
+        self.max_events = max_events
+        self._events: List[Event] = []
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def offer(self, events: List[Event]) -> bool:
+        if len(self._events) + len(events) > self.max_events:
+            return False
+        self._events.extend(events)
+        if self._events:
+            self._ready.set()
+        return True
+
+    async def wait(self) -> None:
+        await self._ready.wait()
+
+    def take(self, limit: int) -> List[Event]:
+        batch, self._events = self._events[:limit], self._events[limit:]
+        if not self._events:
+            self._ready.clear()
+        return batch
+
+class PushIngestor:
+    """
+    Feeds pushed events to a long-running Pipeline. Once events arrive it
+    waits `linger` seconds for more to batch with them, then runs the
+    pipeline over at most `batch_size` events. Batches run one at a time.
+
+    A failed batch that was checkpointed is resumed before the next one; a
+    batch that failed before its run was checkpointed (while routing, say)
+    is retried instead. Either waits `retry_delay` seconds between attempts
+    and gets `max_attempts` of them, after which the batch (or the
+    checkpointed run) is appended to the `dead_letter` JSONL file, so one
+    bad batch cannot hold up every push behind it.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        buffer: EventBuffer,
+        batch_size: int = 1000,
+        linger: float = 0.5,
+        retry_delay: float = 5.0,
+        max_attempts: int = 3,
+        dead_letter: Optional[Path] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.pipeline = pipeline
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.linger = linger
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.dead_letter = dead_letter
+        self.processed = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.last_error: Optional[str] = None
+
+        metrics = metrics or MetricsRegistry()
+        self._processed = metrics.counter("push_events_processed_total", "Pushed events run through the pipeline.")
+        self._failed = metrics.counter("push_batches_failed_total", "Pushed batches whose run failed.")
+        self._given_up = metrics.counter(
+            "push_dead_lettered_total",
+            "Pushed batches and checkpointed runs given up on after max_attempts and dead-lettered.",
+            ["kind"],
+        )
+        self._buffered = metrics.gauge("push_buffered_events", "Pushed events waiting for the pipeline.")
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Process batches until `stop` is set, then drain what is still buffered."""
+        resume_pending = False  # a failed run's checkpoint waits to be resumed
+        resume_failures = 0
+        retry: List[Event] = []
+        retry_metadata: Dict[str, Any] = {}
+        attempts = 0
+        while True:
+            if not retry and not len(self.buffer):
+                waiter = asyncio.ensure_future(self.buffer.wait())
+                stopper = asyncio.ensure_future(stop.wait())
+                await asyncio.wait({waiter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                stopper.cancel()
+                if not len(self.buffer):
+                    return
+                if not stop.is_set():
+                    # Give the rest of a burst a moment to arrive
+                    await asyncio.sleep(self.linger)
+
+            if resume_pending:
+                try:
+                    await self.pipeline.run_once(None, resume=True)
+                except NoCheckpointError:
+                    pass
+                except Exception as exc:
+                    self.last_error = repr(exc)
+                    resume_failures += 1
+                    if resume_failures < self.max_attempts and not stop.is_set():
+                        logger.exception("Resuming a failed pushed batch failed; it will be retried")
+                        await self._pause(stop)
+                        continue
+                    logger.exception("Resuming a failed pushed batch failed; giving up on it")
+                    state = self.pipeline.abandon_checkpoint()
+                    if state is not None:
+                        self._give_up("checkpoint", state.data, state.metadata, exc)
+                resume_pending, resume_failures = False, 0
+
+            if retry:
+                batch, metadata = retry, retry_metadata
+            else:
+                batch = self.buffer.take(self.batch_size)
+                metadata = self._metadata(len(batch))
+            self._buffered.set(len(self.buffer))
+            try:
+                await self.pipeline.process(batch, metadata)
+                self.processed += len(batch)
+                self._processed.inc(len(batch))
+                self.last_error = None
+                retry, attempts = [], 0
+            except Exception as exc:
+                self.failed_batches += 1
+                self._failed.inc()
+                self.last_error = repr(exc)
+                retry, attempts = [], attempts + 1
+                if self.pipeline.checkpointed(metadata):
+                    logger.exception("Processing a pushed batch failed; it will be resumed")
+                    resume_pending, attempts = True, 0
+                elif attempts >= self.max_attempts or stop.is_set():
+                    logger.exception("Processing a pushed batch failed; giving up on it")
+                    self._give_up("batch", {"List[OktaEvent]": batch}, metadata, exc)
+                    attempts = 0
+                    continue
+                else:
+                    logger.exception("Processing a pushed batch failed before it was checkpointed; it will be retried")
+                    retry, retry_metadata = batch, metadata
+                await self._pause(stop)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self.buffer),
+            "processed": self.processed,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+            "last_error": self.last_error,
+        }
+
+    async def _pause(self, stop: asyncio.Event) -> None:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=self.retry_delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _give_up(self, kind: str, data: Dict[str, Any], metadata: Dict[str, Any], exc: Exception) -> None:
+        """Append the initial data of a run that kept failing to the dead-letter file."""
+        self.dead_lettered += 1
+        self._given_up.inc(kind=kind)
+        if self.dead_letter is None:
+            logger.error("Dropped a failed pushed %s (%s); no dead-letter file is configured", kind, metadata)
+            return
+        record = {
+            "kind": kind,
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+            "error": repr(exc),
+            "metadata": metadata,
+            "data": encode(data),
+        }
+        self.dead_letter.parent.mkdir(parents=True, exist_ok=True)
+        with self.dead_letter.open("a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        logger.error("Wrote a failed pushed %s (%s) to %s", kind, metadata, self.dead_letter)
+
+    @staticmethod
+    def _metadata(count: int) -> Dict[str, Any]:
+        return {
+            "source": "push",
+            "received_at": datetime.now(timezone.utc).isoformat(),
+            "events": count,
+        }
@@ -0,0 +1,187 @@
+import gzip
+import logging
+import resource
+import sys
+import tempfile
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from okta_soc.core.clock import SimulatedClock
+from okta_soc.core.config import STATE_PATHS, Settings, load_settings
+from okta_soc.core.events import Event
+from okta_soc.ingest.pipeline import Pipeline
+from okta_soc.ingest.push import parse_events
+
+logger = logging.getLogger(__name__)
+
+
+def load_archive(paths: List[Path], lean: bool = False) -> List[Event]:
+    """
+    Read archived System Log files (JSON array or NDJSON, optionally
+    gzipped, as the Okta API or a log shipper exports them) and return their
+    events in event-time order.
+    """
+    events: List[Event] = []
+    for path in paths:
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rb") as f:
+            events.extend(parse_events(f.read(), lean=lean))
+    events.sort(key=lambda e: e.timestamp)
+    return events
+
+
+@dataclass
+class ReplayReport:
+    events: int
+    skipped: int  # older than the --hours cutoff
+    cycles: int
+    findings: int
+    incidents: int
+    simulated_seconds: float
+    wall_seconds: float
+    busy_seconds: float  # wall time spent inside the pipeline
+    cpu_seconds: float
+    peak_rss_mib: float
+    lag_p50_seconds: Optional[float]
+    lag_p95_seconds: Optional[float]
+    lag_mean_seconds: Optional[float]
+    out_dir: Optional[Path] = None  # where the replay's artifacts and state were written
+
+    @property
+    def events_per_second(self) -> float:
+        """Sustained rate over the whole replay, idle waits included."""
+        return self.events / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def processing_events_per_second(self) -> float:
+        """Rate while the pipeline was busy: the capacity ceiling."""
+        return self.events / self.busy_seconds if self.busy_seconds else 0.0
+
+
+async def replay(
+    pipeline: Pipeline,
+    events: List[Event],
+    clock: SimulatedClock,
+    interval: float,
+    since: datetime,
+) -> ReplayReport:
+    """
+    Feed time-sorted `events` to `pipeline` the way watch() would have
+    received them live: every `interval` seconds of simulated time, the
+    events that happened since the previous poll go through the pipeline as
+    one batch. Events before `since` are skipped, like the --hours cutoff of
+    a live run. Polls that would have found nothing are skipped without
+    breaking the interval grid.
+
+    The pipeline should be long-running and built with `clock`, so its
+    detector lookback, incident timestamps and detection lag follow event
+    time. A failed batch raises; its checkpoint is kept.
+    """
+    timestamps = [e.timestamp for e in events]
+    position = skipped = bisect_left(timestamps, since)
+    step = timedelta(seconds=interval)
+    simulated_start = clock()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    busy = 0.0
+    cycles = 0
+
+    while position < len(events):
+        now = clock()
+        end = bisect_left(timestamps, now)
+        if end > position:
+            batch = events[position:end]
+            metadata = {"source": "replay", "since": timestamps[position].isoformat(), "until": now.isoformat()}
+            started = time.perf_counter()
+            await pipeline.process(batch, metadata)
+            busy += time.perf_counter() - started
+            cycles += 1
+            logger.info("Replay cycle at %s processed %d event(s)", now.isoformat(), len(batch))
+            position = end
+        if position >= len(events):
+            break
+
+        next_poll = now + step
+        if timestamps[position] >= next_poll:
+            # Quiet period: jump to the first poll after the next event
+            next_poll += step * ((timestamps[position] - next_poll) // step + 1)
+        await clock.sleep_until(next_poll)
+
+    lag = pipeline.metrics.get("detection_lag_seconds")
+    findings = lag.count() if lag is not None else 0
+    outputs = pipeline.metrics.get("agent_outputs_total")
+    return ReplayReport(
+        events=len(events) - skipped,
+        skipped=skipped,
+        cycles=cycles,
+        findings=findings,
+        incidents=int(outputs.value(type="SecurityIncident")) if outputs is not None else 0,
+        simulated_seconds=(clock() - simulated_start).total_seconds(),
+        wall_seconds=time.perf_counter() - wall_start,
+        busy_seconds=busy,
+        cpu_seconds=time.process_time() - cpu_start,
+        peak_rss_mib=_peak_rss_mib(),
+        lag_p50_seconds=lag.quantile(0.5) if findings else None,
+        lag_p95_seconds=lag.quantile(0.95) if findings else None,
+        lag_mean_seconds=lag.sum() / findings if findings else None,
+    )
+
+
+def _peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def isolated_settings(settings: Settings, out_dir: Path) -> Settings:
+    """
+    `settings` with the artifact directory and every state file (memo, open
+    incidents, backlog, indexes, checkpoint, metrics) moved into `out_dir`,
+    so a run on them neither reads nor changes the live data.
+    """
+    paths = {name: str(out_dir / Path(getattr(settings, name)).name) for name in STATE_PATHS}
+    return settings.model_copy(update={"data_dir": str(out_dir), **paths})
+
+
+async def run_replay(
+    paths: List[Path],
+    speed: float,
+    interval: float,
+    hours: Optional[int] = None,
+    start: Optional[datetime] = None,
+    settings: Optional[Settings] = None,
+    out_dir: Optional[Path] = None,
+) -> Optional[ReplayReport]:
+    """
+    Replay archived files through a warm Pipeline on a simulated clock that
+    starts at `start` (default: the first archived event). With `hours`, the
+    first poll also picks up the events of the `hours` before `start`, as
+    `okta-soc watch --hours` would have; older ones are skipped.
+
+    The replay starts from empty state and writes everything to `out_dir`
+    (default: a new temporary directory), never to the live data, so
+    replaying the same archive again gives the same result. An `out_dir`
+    that already has content is refused with ValueError.
+    """
+    settings = settings or load_settings()
+    if out_dir is None:
+        out_dir = Path(tempfile.mkdtemp(prefix="okta-soc-replay-"))
+    elif out_dir.exists() and any(out_dir.iterdir()):
+        raise ValueError(f"Replay output directory {out_dir} is not empty")
+    events = load_archive(paths, lean=settings.lean_events)
+    if not events:
+        return None
+    start = start or events[0].timestamp
+    since = start - timedelta(hours=hours or 0)
+    clock = SimulatedClock(start, speed=speed)
+    pipeline = Pipeline(isolated_settings(settings, out_dir), long_running=True, clock=clock)
+    await pipeline.start()
+    try:
+        report = await replay(pipeline, events, clock, interval, since)
+    finally:
+        await pipeline.close()
+    report.out_dir = out_dir
+    return report
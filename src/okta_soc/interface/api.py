@@ -0,0 +1,316 @@
+import asyncio
+import json
+import logging
+import signal
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from okta_soc.core.config import Settings, load_settings
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.ingest.push import EventBuffer, InvalidEvents, PushIngestor, parse_events
+from okta_soc.storage.query import Query
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE = 500
+
+# Seconds an idle keep-alive connection is kept open.
+IDLE_TIMEOUT = 30.0
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def _since(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def build_query(kind: str, params: Dict[str, str]) -> Query:
+    """Map query-string parameters onto a Query; raises ValueError on bad input."""
+    unknown = set(params) - {
+        "since", "until", "severity", "user_id", "finding_type", "status", "order", "limit", "cursor",
+    }
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+    order = params.get("order", "desc")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    limit = int(params.get("limit", "50"))
+    if not 1 <= limit <= MAX_PAGE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE}")
+    return Query(
+        kind=kind,
+        since=_since(params["since"]) if "since" in params else None,
+        until=_since(params["until"]) if "until" in params else None,
+        severity=params.get("severity"),
+        user_id=params.get("user_id"),
+        finding_type=params.get("finding_type"),
+        status=params.get("status"),
+        descending=order == "desc",
+        limit=limit,
+        cursor=params.get("cursor"),
+    )
+
+
+class ApiServer:
+    """
+    Minimal HTTP/1.1 service over a long-running pipeline.
+
+        POST /v1/events       System Log JSON array, object or NDJSON -> 202
+        GET  /v1/findings     paginated findings
+        GET  /v1/incidents    paginated incidents
+        GET  /v1/plans        plans of a page of incidents (limit counts incidents)
+        GET  /healthz         queue and processing counters
+        GET  /metrics         Prometheus text exposition format
+
+    Pushes are refused with 429 and Retry-After when the event buffer is
+    full, with 413 when the body is too large, and with 503 while shutting
+    down. Queries page with the `next_cursor` of the previous response and
+    run one at a time on a worker thread.
+    """
+
+    def __init__(
+        self,
+        ingestor: PushIngestor,
+        engine,
+        max_body_bytes: int = 10 * 1024 * 1024,
+        retry_after: int = 1,
+        metrics: Optional[MetricsRegistry] = None,
+        lean: bool = False,
+    ):
+        self.ingestor = ingestor
+        self.lean = lean  # drop pushed events' raw records
+        self.metrics = metrics or MetricsRegistry()
+        self._requests = self.metrics.counter(
+            "api_requests_total", "HTTP requests by route and status.", ["route", "status"]
+        )
+        self._pushed = self.metrics.counter(
+            "push_events_total", "Pushed events by result (accepted, rejected_full, invalid).", ["result"]
+        )
+        self._buffered = self.metrics.gauge("push_buffered_events", "Pushed events waiting for the pipeline.")
+        self.engine = engine
+        self.max_body_bytes = max_body_bytes
+        self.retry_after = retry_after
+        self.accepting = True
+        self._query_lock = asyncio.Lock()
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._busy: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                if request is None:
+                    return
+                self._busy.add(writer)
+                try:
+                    method, target, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close" and self.accepting
+                    try:
+                        status, payload, extra = await self._route(method, target, body)
+                    except HttpError as exc:
+                        status, payload, extra = exc.status, {"error": exc.message}, exc.headers
+                        if exc.status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE:
+                            keep_alive = False  # the body was not read
+                    except Exception:
+                        logger.exception("Unhandled error serving %s %s", method, target)
+                        status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}, {}
+                    self._requests.inc(route=self._route_label(target), status=str(status.value))
+                    await self._respond(writer, status, payload, extra, keep_alive)
+                finally:
+                    self._busy.discard(writer)
+        except HttpError as exc:
+            # Malformed request framing; answer once and drop the connection.
+            await self._respond(writer, exc.status, {"error": exc.message}, exc.headers, False)
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def close_idle(self) -> None:
+        """Close keep-alive connections that are not serving a request (at shutdown)."""
+        for writer in self._connections - self._busy:
+            writer.close()
+
+    # -- routing ---------------------------------------------------------
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[HTTPStatus, Any, Dict[str, str]]:
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/v1/events":
+            if method != "POST":
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST", {"Allow": "POST"})
+            return self._push(body)
+        if url.path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.metrics.render(), {}
+        if url.path == "/healthz" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok" if self.accepting else "draining", **self.ingestor.metrics()}, {}
+        if url.path in ("/v1/findings", "/v1/incidents", "/v1/plans"):
+            if method != "GET":
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET", {"Allow": "GET"})
+            kind = url.path.rsplit("/", 1)[1]
+            try:
+                query = build_query("incidents" if kind == "plans" else kind, params)
+                async with self._query_lock:
+                    payload = await asyncio.to_thread(self._page, kind, query)
+            except ValueError as exc:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(exc))
+            return HTTPStatus.OK, payload, {}
+        raise HttpError(HTTPStatus.NOT_FOUND, f"no route for {url.path}")
+
+    def _push(self, body: bytes) -> Tuple[HTTPStatus, Any, Dict[str, str]]:
+        retry = {"Retry-After": str(self.retry_after)}
+        if not self.accepting:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "shutting down", retry)
+        try:
+            events = parse_events(body, lean=self.lean)
+        except (InvalidEvents, UnicodeDecodeError) as exc:
+            self._pushed.inc(result="invalid")
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"invalid events: {exc}")
+        if not self.ingestor.buffer.offer(events):
+            self._pushed.inc(len(events), result="rejected_full")
+            raise HttpError(HTTPStatus.TOO_MANY_REQUESTS, "event buffer is full; retry later", retry)
+        self._pushed.inc(len(events), result="accepted")
+        self._buffered.set(len(self.ingestor.buffer))
+        return HTTPStatus.ACCEPTED, {"accepted": len(events), "queued": len(self.ingestor.buffer)}, {}
+
+    def _page(self, kind: str, query: Query) -> Dict[str, Any]:
+        page = self.engine.page(query)
+        if kind == "plans":
+            plans = self.engine.plans_for(page.items)
+            items = [plan for incident in page.items for plan in plans[incident.id]]
+        else:
+            items = page.items
+        return {
+            "items": [item.model_dump(mode="json") for item in items],
+            "next_cursor": page.next_cursor,
+        }
+
+    @staticmethod
+    def _route_label(target: str) -> str:
+        path = urlsplit(target).path
+        known = ("/v1/events", "/v1/findings", "/v1/incidents", "/v1/plans", "/healthz", "/metrics")
+        return path if path in known else "other"
+
+    # -- wire format -----------------------------------------------------
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "malformed request line")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > 100:
+                raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "too many headers")
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(HTTPStatus.LENGTH_REQUIRED, "send a Content-Length instead of chunked encoding")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise HttpError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"body over {self.max_body_bytes} bytes; split the batch",
+            )
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        payload: Any,
+        headers: Dict[str, str],
+        keep_alive: bool,
+    ) -> None:
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{name}: {value}" for name, value in headers.items()),
+        ]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def serve_api(host: str, port: int, settings: Optional[Settings] = None) -> None:
+    """Serve the API over a warm Pipeline until SIGTERM/SIGINT, then drain and exit."""
+    from okta_soc.ingest.pipeline import Pipeline
+    from okta_soc.storage.backends import open_query_engine
+
+    settings = settings or load_settings()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    pipeline = Pipeline(settings, long_running=True)
+    await pipeline.start()
+    engine = open_query_engine(settings)
+    ingestor = PushIngestor(
+        pipeline,
+        EventBuffer(settings.api_max_pending_events),
+        max_attempts=settings.push_max_attempts,
+        dead_letter=Path(settings.push_dead_letter_path),
+        metrics=pipeline.metrics,
+    )
+    api = ApiServer(
+        ingestor,
+        engine,
+        max_body_bytes=settings.api_max_body_bytes,
+        metrics=pipeline.metrics,
+        lean=settings.lean_events,
+    )
+    drained = asyncio.Event()
+    processing = asyncio.create_task(ingestor.run(drained))
+    server = await asyncio.start_server(api.handle, host, port)
+    logger.info("Listening on http://%s:%d", host, port)
+    try:
+        await stop.wait()
+    finally:
+        # Refuse new pushes, let in-flight requests finish, then process
+        # whatever was accepted before flushing storage.
+        api.accepting = False
+        server.close()
+        api.close_idle()
+        await server.wait_closed()
+        drained.set()
+        await processing
+        await pipeline.close()
+        engine.close()
@@ -1,11 +1,38 @@
 import argparse
-import asyncio
 from datetime import datetime, timedelta, timezone  # ⟵ add timezone here
 
 from rich import print
 
-from okta_soc.ingest.pipeline import fetch_and_process
-from okta_soc.interface.show_all import run_show_all
+from okta_soc.interface.show_all import SECTIONS, SEVERITY_RANK, ShowFilters, run_show_all
+
+# Only show_all is imported up front. The pipeline (openai, agents, storage)
+# and every other subcommand's dependencies are imported inside the branch
+# that needs them, so read-only commands and --help start fast.
+
+
+def parse_since(value: str) -> datetime:
+    """'24h', '7d' (relative to now) or an ISO timestamp (UTC if no offset)."""
+    if value[-1:] in ("h", "d") and value[:-1].isdigit():
+        unit = "hours" if value[-1] == "h" else "days"
+        return datetime.now(timezone.utc) - timedelta(**{unit: int(value[:-1])})
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid --since value '{value}'; use e.g. 24h, 7d or 2025-11-12")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_speed(value: str) -> float:
+    """A replay speed-up factor, or 'max' for as fast as possible."""
+    if value == "max":
+        return float("inf")
+    try:
+        speed = float(value)
+    except ValueError:
+        speed = 0.0
+    if speed <= 0:
+        raise argparse.ArgumentTypeError(f"invalid --speed value '{value}'; use e.g. 1, 100 or max")
+    return speed
 
 
 def main() -> None:
@@ -13,8 +40,17 @@ def main() -> None:
     Console entrypoint for the Okta Agentic SOC demo.
 
     Commands:
-        okta-soc --hours 24
-        okta-soc show-all
+        okta-soc --hours 24 [--profile]
+        okta-soc --resume
+        okta-soc show-all [--since 24h] [--severity high] [--user alice] [--limit 50]
+                          [--section incidents] [--detail]
+        okta-soc import-sqlite
+        okta-soc prune [--days 90]
+        okta-soc timeline --user alice [--days 7]
+        okta-soc watch [--hours 1] [--interval 60] [--jitter 0.1] [--profile]
+        okta-soc serve [--host 127.0.0.1] [--port 8080]
+        okta-soc replay --file day.json.gz [--speed 100|max] [--interval 60]
+                        [--start 2025-11-12T00:00] [--hours 1] [--out replay-out/]
     """
     parser = argparse.ArgumentParser(
         description="Okta Agentic SOC pipeline runner."
@@ -25,26 +61,292 @@ def main() -> None:
         default=None,
         help="Ingest Okta logs from the last N hours and run full pipeline.",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its checkpoint, skipping completed work.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run: per-step and per-detector cProfile stats, allocation reports "
+        "and a collapsed-stack file under PROFILE_DIR.",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="With prune: keep artifacts from the last N days (default: ARTIFACT_RETENTION_DAYS). "
+        "With timeline: only show the last N days.",
+    )
+    parser.add_argument(
+        "--user",
+        default=None,
+        help="With timeline: the Okta actor id to show. With show-all: only this user's records.",
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_since,
+        default=None,
+        help="With show-all: only records since then (24h, 7d or an ISO timestamp).",
+    )
+    parser.add_argument(
+        "--severity",
+        choices=list(SEVERITY_RANK),
+        default=None,
+        help="With show-all: only incidents (and their plans, commands, escalations) at or above this severity.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="With show-all: at most N records per section, newest first (0 for no limit).",
+    )
+    parser.add_argument(
+        "--section",
+        action="append",
+        choices=list(SECTIONS),
+        default=None,
+        help="With show-all: only this section (repeatable).",
+    )
+    parser.add_argument(
+        "--detail",
+        action="store_true",
+        help="With show-all: print every record in full instead of a compact table.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="With watch and replay: seconds between polls (default: WATCH_INTERVAL_SECONDS).",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=None,
+        help="With watch: randomly vary each interval by up to this fraction (default: WATCH_JITTER).",
+    )
+    parser.add_argument(
+        "--host",
+        default=None,
+        help="With serve: address to listen on (default: API_HOST).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="With serve: port to listen on (default: API_PORT).",
+    )
+    parser.add_argument(
+        "--file",
+        action="append",
+        default=None,
+        help="With replay: an archived System Log file (JSON array or NDJSON, .gz ok; repeatable).",
+    )
+    parser.add_argument(
+        "--speed",
+        type=parse_speed,
+        default=1.0,
+        help="With replay: how much faster than real time to replay, or 'max' (default: 1).",
+    )
+    parser.add_argument(
+        "--start",
+        type=parse_since,
+        default=None,
+        help="With replay: simulated start time (ISO timestamp; default: the first archived event).",
+    )
+    parser.add_argument(
+        "--out",
+        default=None,
+        help="With replay: empty directory for the replay's artifacts and state "
+        "(default: a new temporary directory).",
+    )
     parser.add_argument(
         "action",
         nargs="?",
         default=None,
-        help="Optional action: show-all",
+        help="Optional action: show-all, import-sqlite, prune, timeline, watch, serve, replay",
     )
 
     args = parser.parse_args()
 
     # Pretty printer mode
     if args.action == "show-all":
-        run_show_all()
+        run_show_all(
+            ShowFilters(
+                since=args.since,
+                severity=args.severity,
+                user=args.user,
+                limit=args.limit,
+                sections=args.section or list(SECTIONS),
+                detail=args.detail,
+            )
+        )
+        return
+
+    # One-shot migration of the JSONL artifacts into the SQLite backend
+    if args.action == "import-sqlite":
+        from pathlib import Path
+        from okta_soc.core.config import load_settings
+        from okta_soc.storage.sqlite_repositories import SqliteStore, import_jsonl
+
+        settings = load_settings()
+        store = SqliteStore(Path(settings.sqlite_path))
+        try:
+            counts = import_jsonl(store, Path(settings.data_dir))
+        except ValueError as exc:
+            print(f"[red]{exc}[/red]")
+            return
+        finally:
+            store.close()
+        summary = ", ".join(f"{n} {kind}" for kind, n in counts.items())
+        print(f"[green]Imported {summary} into {settings.sqlite_path}.[/green]")
+        return
+
+    # Retention: drop artifact segments older than the retention window
+    if args.action == "prune":
+        from pathlib import Path
+        from okta_soc.core.config import load_settings
+        from okta_soc.storage.segments import prune_artifacts
+
+        settings = load_settings()
+        days = args.days if args.days is not None else settings.retention_days
+        before = datetime.now(timezone.utc) - timedelta(days=days)
+        removed = prune_artifacts(Path(settings.data_dir), before)
+        summary = ", ".join(f"{n} {kind}" for kind, n in removed.items())
+        print(f"[green]Removed segments older than {days} day(s): {summary}.[/green]")
+        return
+
+    # Everything recorded for one user, oldest first
+    if args.action == "timeline":
+        if args.user is None:
+            print("[red]timeline needs --user.[/red]")
+            return
+        from pathlib import Path
+        from rich.console import Console
+        from rich.table import Table
+        from okta_soc.core.config import load_settings
+        from okta_soc.storage.entity_index import EntityIndex
+
+        since = None
+        if args.days is not None:
+            since = datetime.now(timezone.utc) - timedelta(days=args.days)
+        index = EntityIndex(Path(load_settings().entity_index_path))
+        try:
+            entries = index.timeline(args.user, since=since)
+        finally:
+            index.close()
+        table = Table(title=f"Timeline for {args.user}")
+        for column in ("time", "kind", "ref", "derived from"):
+            table.add_column(column)
+        for entry in entries:
+            table.add_row(entry.ts.isoformat(), entry.kind, entry.ref, ", ".join(entry.parents))
+        Console().print(table)
+        return
+
+    # Long-running mode: poll for new events until SIGTERM/SIGINT
+    if args.action == "watch":
+        import asyncio
+        from pathlib import Path
+        from okta_soc.core.config import load_settings
+        from okta_soc.ingest.pipeline import serve
+
+        settings = load_settings()
+        interval = args.interval if args.interval is not None else settings.watch_interval_seconds
+        jitter = args.jitter if args.jitter is not None else settings.watch_jitter
+        # --hours backfills on the first cycle; otherwise start one interval back
+        if args.hours is not None:
+            since = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+        else:
+            since = datetime.now(timezone.utc) - timedelta(seconds=interval)
+        profile_dir = Path(settings.profile_dir) if args.profile else None
+        print(f"[green]Watching Okta events every {interval:g}s; press Ctrl+C to stop.[/green]")
+        asyncio.run(serve(since, interval, jitter, profile_dir))
+        print("[green]Stopped watching.[/green]")
+        return
+
+    # HTTP API: accept pushed events and serve queries until SIGTERM/SIGINT
+    if args.action == "serve":
+        import asyncio
+        from okta_soc.core.config import load_settings
+        from okta_soc.interface.api import serve_api
+
+        settings = load_settings()
+        host = args.host or settings.api_host
+        port = args.port if args.port is not None else settings.api_port
+        print(f"[green]Serving the SOC API on http://{host}:{port}; press Ctrl+C to stop.[/green]")
+        asyncio.run(serve_api(host, port, settings))
+        print("[green]API stopped.[/green]")
+        return
+
+    # Replay archived events through the pipeline on a simulated clock
+    if args.action == "replay":
+        if not args.file:
+            print("[red]replay needs at least one --file.[/red]")
+            return
+        import asyncio
+        from pathlib import Path
+        from rich.table import Table
+        from okta_soc.core.config import load_settings
+        from okta_soc.ingest.replay import run_replay
+
+        settings = load_settings()
+        interval = args.interval if args.interval is not None else settings.watch_interval_seconds
+        try:
+            report = asyncio.run(run_replay(
+                [Path(f) for f in args.file], args.speed, interval,
+                hours=args.hours, start=args.start, settings=settings,
+                out_dir=Path(args.out) if args.out else None,
+            ))
+        except ValueError as exc:
+            print(f"[red]{exc}[/red]")
+            return
+        if report is None:
+            print("[yellow]No events in the archive.[/yellow]")
+            return
+
+        def seconds(value):
+            return "-" if value is None else f"{value:.1f}s"
+
+        table = Table(title="Replay report")
+        table.add_column("Metric")
+        table.add_column("Value", justify="right")
+        table.add_row("Events replayed", f"{report.events} ({report.skipped} before the cutoff)")
+        table.add_row("Simulated time", f"{report.simulated_seconds:.0f}s over {report.cycles} cycle(s)")
+        table.add_row("Wall time", f"{report.wall_seconds:.1f}s ({report.busy_seconds:.1f}s processing)")
+        table.add_row("Sustained events/sec", f"{report.events_per_second:.1f}")
+        table.add_row("Processing events/sec", f"{report.processing_events_per_second:.1f}")
+        table.add_row("Findings / incidents", f"{report.findings} / {report.incidents}")
+        table.add_row("Detection lag p50 / p95", f"{seconds(report.lag_p50_seconds)} / {seconds(report.lag_p95_seconds)}")
+        table.add_row("Detection lag mean", seconds(report.lag_mean_seconds))
+        table.add_row("CPU time", f"{report.cpu_seconds:.1f}s")
+        table.add_row("Peak RSS", f"{report.peak_rss_mib:.0f} MiB")
+        table.add_row("Output", str(report.out_dir))
+        print(table)
         return
 
     # Pipeline run mode
-    if args.hours is not None:
+    if args.hours is not None or args.resume:
+        import asyncio
+        from pathlib import Path
+        from okta_soc.core.checkpoint import NoCheckpointError
+        from okta_soc.core.config import load_settings
+        from okta_soc.ingest.pipeline import fetch_and_process
+
         # ✅ Use timezone-aware UTC datetime
-        since = datetime.now(timezone.utc) - timedelta(hours=args.hours)
-        asyncio.run(fetch_and_process(since))
-        print(f"[green]Done processing Okta events from last {args.hours} hour(s).[/green]")
+        since = None
+        if args.hours is not None:
+            since = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+        try:
+            profile_dir = Path(load_settings().profile_dir) if args.profile else None
+            asyncio.run(fetch_and_process(since, resume=args.resume, profile_dir=profile_dir))
+        except NoCheckpointError as exc:
+            print(f"[red]{exc}[/red]")
+            return
+        if args.hours is not None:
+            print(f"[green]Done processing Okta events from last {args.hours} hour(s).[/green]")
+        else:
+            print("[green]Done resuming the interrupted pipeline run.[/green]")
         return
 
     parser.print_help()
@@ -1,61 +1,239 @@
 import json
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
 from rich.console import Console
 from rich.panel import Panel
 from rich.pretty import Pretty
 from rich.table import Table
 
-DATA_DIR = Path("data")
+from okta_soc.storage.segments import SegmentedLog
+
+SECTIONS = ("findings", "incidents", "plans", "commands", "escalations")
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+# Rows rendered per table chunk; output starts after the first chunk.
+CHUNK_ROWS = 25
 
 console = Console()
 
 
-def load_jsonl(path: Path):
-    """Load a .jsonl file into a list of dicts. Return empty list if missing."""
-    if not path.exists():
-        return []
-    items = []
-    with path.open() as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+@dataclass
+class ShowFilters:
+    """
+    What show-all prints. `severity` is a minimum (high shows high and
+    critical). severity and user apply to incidents directly and to plans,
+    commands and escalations through their incident; findings are filtered
+    by user only. limit is per section; 0 means no limit.
+    """
+
+    since: Optional[datetime] = None
+    severity: Optional[str] = None
+    user: Optional[str] = None
+    limit: int = 50
+    sections: List[str] = field(default_factory=lambda: list(SECTIONS))
+    detail: bool = False
+
+
+class ArtifactReaders:
+    """
+    Read-only, newest-first streams of each artifact kind from the backend
+    the settings select. Unlike open_repositories(), opening them neither
+    recovers a JSONL commit journal nor seals segments, so show-all is safe
+    to run next to a live watch or serve process.
+    """
+
+    def __init__(self, settings):
+        self._store = None
+        if settings.storage_backend == "sqlite":
+            from okta_soc.storage.sqlite_repositories import (
+                SqliteStore,
+                SqliteFindingsRepo,
+                SqliteIncidentsRepo,
+                SqlitePlansRepo,
+                SqliteCommandsRepo,
+                SqliteEscalationsRepo,
+            )
+
+            self._store = store = SqliteStore(Path(settings.sqlite_path))
+            self._repos = {
+                "findings": SqliteFindingsRepo(store),
+                "incidents": SqliteIncidentsRepo(store),
+                "plans": SqlitePlansRepo(store),
+                "commands": SqliteCommandsRepo(store),
+                "escalations": SqliteEscalationsRepo(store),
+            }
+        elif settings.storage_backend != "jsonl":
+            raise ValueError(f"Unknown storage backend '{settings.storage_backend}'")
+        self._data_dir = Path(settings.data_dir)
+
+    def newest(self, kind: str, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        if self._store is not None:
+            yield from self._repos[kind].iter_newest(since)
+            return
+        for line in SegmentedLog(self._data_dir / kind).read_lines(since=since, newest_first=True):
+            yield json.loads(line)
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+
+
+def iter_records(
+    readers: ArtifactReaders, kind: str, since: Optional[datetime] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream one artifact kind newest first, reading only what may be since
+    `since`. A record saved again under the same id (an incident that was
+    updated) is shown once, in its latest version.
+    """
+    seen: Set[str] = set()
+    for record in readers.newest(kind, since):
+        if since is not None and "created_at" in record:
+            if datetime.fromisoformat(record["created_at"]) < since:
+                continue
+        record_id = record.get("id")
+        if record_id is not None:
+            if record_id in seen:
+                continue
+            seen.add(record_id)
+        yield record
+
+
+def _incident_matches(incident: Dict[str, Any], filters: ShowFilters) -> bool:
+    if filters.user is not None and incident.get("user_id") != filters.user:
+        return False
+    if filters.severity is not None:
+        rank = SEVERITY_RANK.get(incident.get("severity"), -1)
+        if rank < SEVERITY_RANK[filters.severity]:
+            return False
+    return True
+
+
+class _IncidentFilter:
+    """
+    Whether an incident id passes the filters, for the sections linked to
+    incidents. Incidents are streamed newest first only as far as the ids
+    asked about, which are mostly recent, so the linked sections never wait
+    for a scan of every incident.
+    """
+
+    def __init__(self, incidents: Iterator[Dict[str, Any]], filters: ShowFilters):
+        self._incidents = incidents
+        self._filters = filters
+        self._matches: Dict[str, bool] = {}
+
+    def __contains__(self, incident_id: Optional[str]) -> bool:
+        while incident_id not in self._matches:
+            incident = next(self._incidents, None)
+            if incident is None:
+                return False
+            self._matches[incident["id"]] = _incident_matches(incident, self._filters)
+        return self._matches[incident_id]
+
+
+def _linked_incident(kind: str, record: Dict[str, Any]) -> Optional[str]:
+    if kind == "commands":
+        return record.get("incident_id") or record.get("command", {}).get("incident_id")
+    return record.get("incident_id")
+
+
+def _select(
+    kind: str, records: Iterator[Dict[str, Any]], filters: ShowFilters, incidents: Optional[_IncidentFilter]
+) -> Iterator[Dict[str, Any]]:
+    shown = 0
+    for record in records:
+        if filters.limit and shown >= filters.limit:
+            return
+        if kind == "findings":
+            if filters.user is not None and record.get("user_id") != filters.user:
                 continue
-            items.append(json.loads(line))
-    return items
+        elif kind == "incidents":
+            if not _incident_matches(record, filters):
+                continue
+        elif incidents is not None and _linked_incident(kind, record) not in incidents:
+            continue
+        shown += 1
+        yield record
+
+
+COLUMNS = {
+    "findings": [("created_at", 25), ("finding_type", 20), ("user_id", 16), ("description", 50)],
+    "incidents": [("created_at", 25), ("severity", 9), ("status", 8), ("user_id", 16), ("title", 40)],
+    "plans": [("incident_id", 36), ("steps", 6), ("overall_goal", 60)],
+    "commands": [("incident_id", 36), ("step_id", 22), ("system", 10), ("description", 40)],
+    "escalations": [("incident_id", 36), ("sent", 5), ("channel", 22), ("message", 40)],
+}
+
+
+def _cell(kind: str, record: Dict[str, Any], column: str) -> str:
+    if kind == "commands":
+        command = record.get("command", {})
+        if column == "incident_id":
+            return str(_linked_incident(kind, record) or "")
+        return str(command.get(column, ""))
+    if kind == "plans" and column == "steps":
+        return str(len(record.get("steps", [])))
+    value = record.get(column)
+    return "" if value is None else str(value)
+
 
+def _table(kind: str, header: bool) -> Table:
+    table = Table(show_header=header, box=None, pad_edge=False)
+    for column, width in COLUMNS[kind]:
+        table.add_column(column, width=width, no_wrap=True, overflow="ellipsis")
+    return table
 
-def show_section(title: str, items: list):
-    """Pretty-print a section with a title."""
-    if not items:
-        console.print(Panel(f"[yellow]No {title.lower()} found[/yellow]", title=title))
-        return
 
+def show_section(kind: str, records: Iterator[Dict[str, Any]], detail: bool = False) -> int:
+    """Print a section as it streams in; returns how many records were shown."""
+    title = kind.capitalize()
     console.print(f"\n[bold underline]{title}[/bold underline]")
-    for i, item in enumerate(items, start=1):
-        console.print(
-            Panel(
-                Pretty(item, indent_guides=True),
-                title=f"{title[:-1]} #{i}",
-                expand=False,
-                border_style="cyan",
+    count = 0
+    table = _table(kind, header=True)
+    for record in records:
+        count += 1
+        if detail:
+            console.print(
+                Panel(
+                    Pretty(record, indent_guides=True),
+                    title=f"{title[:-1]} #{count}",
+                    expand=False,
+                    border_style="cyan",
+                )
             )
-        )
+            continue
+        table.add_row(*(_cell(kind, record, column) for column, _ in COLUMNS[kind]))
+        if table.row_count == CHUNK_ROWS:
+            console.print(table)
+            table = _table(kind, header=False)
+    if table.row_count:
+        console.print(table)
+    if count == 0:
+        console.print(f"[yellow]No {kind} found[/yellow]")
+    return count
 
 
-def run_show_all():
-    """Main entry for pretty-printing all .jsonl artifacts."""
-    console.print("[bold green]=== Okta Agentic SOC Output ===[/bold green]\n")
+def run_show_all(filters: Optional[ShowFilters] = None, settings=None) -> None:
+    """Stream the stored artifacts, newest first, as compact tables (or panels with detail)."""
+    from okta_soc.core.config import load_settings
 
-    findings = load_jsonl(DATA_DIR / "findings.jsonl")
-    incidents = load_jsonl(DATA_DIR / "incidents.jsonl")
-    plans = load_jsonl(DATA_DIR / "plans.jsonl")
-    commands = load_jsonl(DATA_DIR / "commands.jsonl")
-    escalations = load_jsonl(DATA_DIR / "escalations.jsonl")
+    filters = filters or ShowFilters()
+    console.print("[bold green]=== Okta Agentic SOC Output ===[/bold green]")
 
-    show_section("Findings", findings)
-    show_section("Incidents", incidents)
-    show_section("Plans", plans)
-    show_section("Commands", commands)
-    show_section("Escalations", escalations)
+    readers = ArtifactReaders(settings or load_settings())
+    try:
+        incidents = None
+        if filters.user is not None or filters.severity is not None:
+            incidents = _IncidentFilter(iter_records(readers, "incidents", filters.since), filters)
+        for kind in SECTIONS:
+            if kind in filters.sections:
+                records = iter_records(readers, kind, filters.since)
+                show_section(kind, _select(kind, records, filters, incidents), detail=filters.detail)
+    finally:
+        readers.close()
 
-    console.print("\n[green]Done displaying all output.[/green]")
+    console.print("\n[green]Done displaying output.[/green]")
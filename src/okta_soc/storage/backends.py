@@ -0,0 +1,92 @@
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, ContextManager, Optional
+
+from okta_soc.core.config import Settings
+
+
+@dataclass
+class Repositories:
+    """The artifact repos of one storage backend, plus its write batching."""
+
+    findings: Any
+    incidents: Any
+    plans: Any
+    commands: Any
+    escalations: Any
+    store: Optional[Any] = None
+    risks: Optional[Any] = None
+
+    def transaction(self) -> ContextManager:
+        """Group the saves made inside the block into one write where the backend supports it."""
+        if self.store is not None:
+            return self.store.transaction()
+        return nullcontext()
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+
+
+def open_repositories(settings: Settings) -> Repositories:
+    if settings.storage_backend == "sqlite":
+        from okta_soc.storage.sqlite_repositories import (
+            SqliteStore,
+            SqliteFindingsRepo,
+            SqliteRisksRepo,
+            SqliteIncidentsRepo,
+            SqlitePlansRepo,
+            SqliteCommandsRepo,
+            SqliteEscalationsRepo,
+        )
+
+        store = SqliteStore(Path(settings.sqlite_path))
+        return Repositories(
+            findings=SqliteFindingsRepo(store),
+            incidents=SqliteIncidentsRepo(store),
+            plans=SqlitePlansRepo(store),
+            commands=SqliteCommandsRepo(store),
+            escalations=SqliteEscalationsRepo(store),
+            store=store,
+            risks=SqliteRisksRepo(store),
+        )
+
+    if settings.storage_backend != "jsonl":
+        raise ValueError(f"Unknown storage backend '{settings.storage_backend}'")
+
+    from okta_soc.storage.repositories import (
+        JsonlStore, FindingsRepo, RisksRepo, IncidentsRepo, PlansRepo, CommandsRepo, EscalationsRepo,
+    )
+
+    data_dir = Path(settings.data_dir)
+    store = JsonlStore(data_dir, fsync=settings.storage_fsync)
+
+    def open_repo(repo_type):
+        return repo_type(data_dir / repo_type.name, store=store, max_segment_bytes=settings.segment_max_bytes)
+
+    return Repositories(
+        findings=open_repo(FindingsRepo),
+        incidents=open_repo(IncidentsRepo),
+        plans=open_repo(PlansRepo),
+        commands=open_repo(CommandsRepo),
+        escalations=open_repo(EscalationsRepo),
+        store=store,
+        risks=open_repo(RisksRepo),
+    )
+
+
+def open_query_engine(settings: Settings):
+    """Read-side counterpart of open_repositories(); see storage/query.py."""
+    if settings.storage_backend == "sqlite":
+        from okta_soc.storage.sqlite_repositories import SqliteStore
+        from okta_soc.storage.query import SqliteQueryEngine
+
+        return SqliteQueryEngine(SqliteStore(Path(settings.sqlite_path)))
+
+    if settings.storage_backend != "jsonl":
+        raise ValueError(f"Unknown storage backend '{settings.storage_backend}'")
+
+    from okta_soc.storage.query import JsonlQueryEngine
+
+    return JsonlQueryEngine(Path(settings.data_dir))
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from okta_soc.core.clock import wall_clock
+from okta_soc.core.metrics import LAG_BUCKETS, MetricsRegistry
+from okta_soc.core.events import EVENT_TYPES
+from okta_soc.core.models import (
+    DetectionFinding,
+    RiskScore,
+    SecurityIncident,
+    ResponsePlan,
+    CommandSuggestion,
+    EscalationResult,
+)
+from okta_soc.storage.backends import Repositories
+from okta_soc.storage.entity_index import EntityIndex
+
+logger = logging.getLogger(__name__)
+
+# Record types that have a repo; everything else an agent outputs is skipped.
+PERSISTED_MODELS = (
+    DetectionFinding,
+    RiskScore,
+    SecurityIncident,
+    ResponsePlan,
+    CommandSuggestion,
+    EscalationResult,
+)
+
+_STOP = object()
+
+
+def _records(value: Any) -> Iterator[Any]:
+    """Yield the individual records in an agent output value (lists may nest)."""
+    if isinstance(value, list):
+        for item in value:
+            yield from _records(item)
+    elif value is not None:
+        yield value
+
+
+class BackgroundWriter:
+    """
+    Persists pipeline outputs from a background task while the run continues.
+
+    The orchestrator publish()es each step's (or item's) outputs as soon as
+    they exist. Records that have a repo are put on a bounded queue; when the
+    queue is full publish() waits, so a slow disk slows producers down rather
+    than letting memory grow. The writer task drains the queue in batches and
+    saves each batch in one repo transaction on a worker thread, keeping disk
+    I/O off the event loop.
+
+    With an EntityIndex, each batch (plus any published events, which
+    have no repo) is also added to the per-user timeline.
+
+    A write failure is kept and re-raised from the next publish() and from
+    close(), so a run never finishes believing its results were stored.
+
+    Every repo write goes through here, so storage metrics (records written
+    per kind, batch latency, queue depth, failures) are recorded here too,
+    along with detection lag: how long after its newest event (the
+    finding's created_at) each finding was published, by `clock`.
+    """
+
+    def __init__(
+        self,
+        repos: Repositories,
+        index: Optional[EntityIndex] = None,
+        max_queue: int = 1000,
+        batch_size: int = 200,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: Callable[[], datetime] = wall_clock,
+    ):
+        self.repos = repos
+        self.clock = clock
+        self.index = index
+        self.batch_size = batch_size
+        self.written = 0
+        self.error: Optional[BaseException] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+
+        metrics = metrics or MetricsRegistry()
+        self._written = metrics.counter("storage_records_written_total", "Records saved, by kind.", ["kind"])
+        self._batch_latency = metrics.histogram(
+            "storage_batch_seconds", "Time to save one batch in one repo transaction."
+        )
+        self._failures = metrics.counter("storage_write_failures_total", "Batches that failed to save.")
+        self._depth = metrics.gauge("storage_queue_depth", "Records waiting to be saved.")
+        self._lag = metrics.histogram(
+            "detection_lag_seconds", "Time from a finding's newest event to its publication.", buckets=LAG_BUCKETS
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def publish(self, outputs: Dict[str, Any]) -> None:
+        if self.error is not None:
+            raise self.error
+        for value in outputs.values():
+            for record in _records(value):
+                if isinstance(record, DetectionFinding):
+                    self._lag.observe(max(0.0, (self.clock() - record.created_at).total_seconds()))
+                if isinstance(record, PERSISTED_MODELS) or (
+                    self.index is not None and isinstance(record, EVENT_TYPES)
+                ):
+                    await self._queue.put(record)
+
+    async def flush(self) -> None:
+        """Wait until everything published so far has been written."""
+        if self._task is not None:
+            await self._queue.join()
+        if self.error is not None:
+            raise self.error
+
+    async def close(self) -> None:
+        """Write everything still queued, then stop the writer task."""
+        if self._task is not None:
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+        if self.error is not None:
+            raise self.error
+
+    def metrics(self) -> Dict[str, int]:
+        return {"written": self.written, "queued": self._queue.qsize()}
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            taken = 1
+            batch: List[Any] = [] if first is _STOP else [first]
+            stop = first is _STOP
+            while not stop and len(batch) < self.batch_size and not self._queue.empty():
+                record = self._queue.get_nowait()
+                taken += 1
+                if record is _STOP:
+                    stop = True
+                else:
+                    batch.append(record)
+
+            self._depth.set(self._queue.qsize())
+            if batch and self.error is None:
+                start = time.perf_counter()
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                    self.written += len(batch)
+                    for record in batch:
+                        if isinstance(record, PERSISTED_MODELS):
+                            self._written.inc(kind=type(record).__name__)
+                except Exception as exc:
+                    # Keep draining so blocked producers wake up and see the error.
+                    logger.exception("Background persistence failed")
+                    self._failures.inc()
+                    self.error = exc
+                finally:
+                    self._batch_latency.observe(time.perf_counter() - start)
+            for _ in range(taken):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Any]) -> None:
+        repos = self.repos
+        with repos.transaction():
+            for record in batch:
+                if isinstance(record, DetectionFinding):
+                    repos.findings.save(record)
+                elif isinstance(record, RiskScore):
+                    if repos.risks is not None:
+                        repos.risks.save(record)
+                elif isinstance(record, SecurityIncident):
+                    repos.incidents.save(record)
+                elif isinstance(record, ResponsePlan):
+                    repos.plans.save(record)
+                elif isinstance(record, CommandSuggestion):
+                    repos.commands.save(record.incident_id or "", record)
+                elif isinstance(record, EscalationResult):
+                    repos.escalations.save(record)
+        if self.index is not None:
+            self.index.add(batch)
@@ -0,0 +1,88 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from okta_soc.core.models import DetectionFinding, SecurityIncident
+
+
+class FindingBacklog:
+    """
+    Work deferred to a later run because the run's LLM budget could not
+    cover it: findings not yet scored, and incidents not yet planned.
+
+    Keyed by id, so deferring a finding that is already waiting (or that
+    detection reports again) keeps one copy. take() empties the findings;
+    the priority agent takes everything at the start of a run and defers
+    again whatever still does not fit. take_incidents() does the same for
+    incidents, which the pipeline plans before anything else in its next
+    run. With `max_findings`, the backlog is bounded: records offered once
+    it holds that many are refused, so callers defer their most urgent work
+    first. With a path, the backlog is a single JSON snapshot, loaded in one
+    read at startup and rewritten atomically by save() after each run.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_findings: Optional[int] = None):
+        self.path = path
+        self.max_findings = max_findings
+        self._findings: Dict[str, DetectionFinding] = {}
+        self._incidents: Dict[str, SecurityIncident] = {}
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._findings)
+
+    def __contains__(self, finding_id: str) -> bool:
+        return finding_id in self._findings
+
+    @property
+    def incident_count(self) -> int:
+        return len(self._incidents)
+
+    def defer(self, findings: List[DetectionFinding]) -> int:
+        """Add findings to the backlog. Returns how many were refused because it is full."""
+        return self._add(self._findings, findings)
+
+    def defer_incidents(self, incidents: List[SecurityIncident]) -> int:
+        """Add unplanned incidents to the backlog. Returns how many were refused because it is full."""
+        return self._add(self._incidents, incidents)
+
+    def take(self) -> List[DetectionFinding]:
+        findings = list(self._findings.values())
+        self._findings.clear()
+        return findings
+
+    def take_incidents(self) -> List[SecurityIncident]:
+        """The waiting incidents, most severe first."""
+        incidents = sorted(self._incidents.values(), key=lambda i: (-i.risk_score, i.created_at))
+        self._incidents.clear()
+        return incidents
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w") as f:
+            json.dump({
+                "findings": [finding.model_dump(mode="json") for finding in self._findings.values()],
+                "incidents": [incident.model_dump(mode="json") for incident in self._incidents.values()],
+            }, f)
+        os.replace(tmp, self.path)
+
+    def _add(self, waiting: Dict[str, Any], records: List[Any]) -> int:
+        refused = 0
+        for record in records:
+            full = self.max_findings is not None and len(self._findings) + len(self._incidents) >= self.max_findings
+            if full and record.id not in waiting:
+                refused += 1
+                continue
+            waiting[record.id] = record
+        return refused
+
+    def _load(self) -> None:
+        with self.path.open() as f:
+            raw = json.load(f)
+        self.defer([DetectionFinding.model_validate(entry) for entry in raw.get("findings", [])])
+        self.defer_incidents([SecurityIncident.model_validate(entry) for entry in raw.get("incidents", [])])
@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from okta_soc.core.events import EVENT_TYPES
+from okta_soc.core.models import (
+    DetectionFinding,
+    SecurityIncident,
+    ResponsePlan,
+    CommandSuggestion,
+    EscalationResult,
+)
+
+
+# The timeline is a clustered B-tree on (user_id, ts, kind, ref): a user's
+# history over any window is one index seek plus a range read.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timeline (
+    user_id TEXT NOT NULL,
+    ts      REAL NOT NULL,
+    kind    TEXT NOT NULL,
+    ref     TEXT NOT NULL,
+    parents TEXT NOT NULL,
+    PRIMARY KEY (user_id, ts, kind, ref)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS refs (
+    ref     TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _ts(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@dataclass
+class TimelineEntry:
+    """
+    One record in a user's timeline. `ref` locates the record in its store:
+    the event, finding or incident id, the incident id for plans and
+    escalations, and `<incident_id>:<step_id>` for commands. `parents` are the
+    refs it was derived from (a finding's events, an incident's finding, ...).
+    """
+
+    user_id: str
+    ts: datetime
+    kind: str
+    ref: str
+    parents: List[str] = field(default_factory=list)
+
+
+class EntityIndex:
+    """
+    Per-user timeline linking events, findings, incidents, plans, commands
+    and escalations, kept in a small SQLite file next to the artifacts.
+
+    add() is called at persistence time. Records without a user of their own
+    (plans, commands, escalations) inherit the user of their incident, which
+    is always persisted first. Records without a timestamp are placed at the
+    time they are indexed.
+    """
+
+    def __init__(self, path: Path, clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.path = path
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, records: Iterable[Any]) -> int:
+        """Index a batch of records in one transaction. Returns how many were indexed."""
+        count = 0
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                for record in records:
+                    row = self._row(record)
+                    if row is None:
+                        continue
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO timeline (user_id, ts, kind, ref, parents) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        row,
+                    )
+                    if row[2] in ("finding", "incident"):
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO refs (ref, user_id) VALUES (?, ?)",
+                            (row[3], row[0]),
+                        )
+                    count += 1
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return count
+
+    def timeline(
+        self,
+        user_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        kinds: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[TimelineEntry]:
+        """A user's records in time order, optionally bounded to [since, until)."""
+        sql = "SELECT user_id, ts, kind, ref, parents FROM timeline WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if since is not None:
+            sql += " AND ts >= ?"
+            params.append(_ts(since))
+        if until is not None:
+            sql += " AND ts < ?"
+            params.append(_ts(until))
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += " ORDER BY ts, kind, ref"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [
+            TimelineEntry(
+                user_id=user,
+                ts=datetime.fromtimestamp(ts, tz=timezone.utc),
+                kind=kind,
+                ref=ref,
+                parents=json.loads(parents),
+            )
+            for user, ts, kind, ref, parents in self.conn.execute(sql, params)
+        ]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _user_of(self, ref: str) -> Optional[str]:
+        row = self.conn.execute("SELECT user_id FROM refs WHERE ref = ?", (ref,)).fetchone()
+        return row[0] if row else None
+
+    def _row(self, record: Any) -> Optional[Tuple[str, float, str, str, str]]:
+        now = _ts(self.clock())
+        if isinstance(record, EVENT_TYPES):
+            user, ts, kind, ref, parents = record.actor_id, _ts(record.timestamp), "event", record.id, []
+        elif isinstance(record, DetectionFinding):
+            user, ts, kind, ref = record.user_id, _ts(record.created_at), "finding", record.id
+            parents = list(record.okta_event_ids)
+        elif isinstance(record, SecurityIncident):
+            user = record.user_id or self._user_of(record.finding_id)
+            ts, kind, ref, parents = _ts(record.created_at), "incident", record.id, [record.finding_id]
+        elif isinstance(record, ResponsePlan):
+            user, ts, kind = self._user_of(record.incident_id), now, "plan"
+            ref, parents = record.incident_id, [record.incident_id]
+        elif isinstance(record, CommandSuggestion):
+            if record.incident_id is None:
+                return None
+            user, ts, kind = self._user_of(record.incident_id), now, "command"
+            ref, parents = f"{record.incident_id}:{record.step_id}", [record.incident_id]
+        elif isinstance(record, EscalationResult):
+            user, ts, kind = self._user_of(record.incident_id), now, "escalation"
+            ref, parents = record.incident_id, [record.incident_id]
+        else:
+            return None
+        if user is None:
+            return None
+        return user, ts, kind, ref, json.dumps(parents)
@@ -0,0 +1,130 @@
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from okta_soc.core.clock import wall_clock
+from okta_soc.core.models import DetectionFinding, FindingType, RiskScore, SecurityIncident, Severity
+
+# Findings that describe the same kind of threat to an account are handled
+# as one incident. A correlated finding takes the most serious family among
+# its members.
+FINDING_FAMILIES: Dict[str, str] = {
+    FindingType.FAILED_LOGIN_BURST.value: "credential_attack",
+    FindingType.MFA_FATIGUE.value: "credential_attack",
+    FindingType.IMPOSSIBLE_TRAVEL.value: "account_takeover",
+}
+FAMILY_RANK = ("other", "credential_attack", "account_takeover")
+
+SEVERITY_RANK = {Severity.LOW: 0, Severity.MEDIUM: 1, Severity.HIGH: 2, Severity.CRITICAL: 3}
+
+
+def finding_family(finding: DetectionFinding) -> str:
+    if finding.finding_type == FindingType.CORRELATED:
+        types = str(finding.metadata.get("finding_types", "")).split("+")
+    else:
+        types = [finding.finding_type.value]
+    return max((FINDING_FAMILIES.get(t, "other") for t in types), key=FAMILY_RANK.index)
+
+
+@dataclass
+class OpenIncident:
+    incident: SecurityIncident
+    updated_at: datetime
+
+
+class OpenIncidentIndex:
+    """
+    Open incidents keyed by (user, finding family), so a finding for an
+    account that already has an open incident of the same family is attached
+    to it instead of opening another one.
+
+    attach() appends the finding id to the incident's `finding_ids`
+    metadata, raises severity and risk score if the new finding is worse,
+    and reports whether severity escalated; the caller re-plans and
+    re-notifies only then. An incident that has had no new finding for `ttl`
+    is considered done and a later finding opens a new one.
+
+    With a path, the index is a single JSON snapshot, loaded in one read at
+    startup and rewritten atomically by save() after each run.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: timedelta = timedelta(hours=72),
+        clock: Callable[[], datetime] = wall_clock,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._open: Dict[Tuple[str, str], OpenIncident] = {}
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def get(self, user_id: str, family: str) -> Optional[SecurityIncident]:
+        entry = self._open.get((user_id, family))
+        if entry is None:
+            return None
+        if self.clock() - entry.updated_at > self.ttl:
+            del self._open[(user_id, family)]
+            return None
+        return entry.incident
+
+    def open(self, incident: SecurityIncident, family: str) -> None:
+        if incident.user_id is None:
+            return
+        incident.metadata.setdefault("finding_ids", [incident.finding_id])
+        self._open[(incident.user_id, family)] = OpenIncident(incident, self.clock())
+
+    def attach(
+        self, family: str, finding: DetectionFinding, risk: RiskScore
+    ) -> Tuple[SecurityIncident, bool]:
+        """Attach `finding` to the open incident of its user and family. Returns (incident, escalated)."""
+        key = (finding.user_id, family)
+        current = self._open[key].incident
+        escalated = SEVERITY_RANK[risk.severity] > SEVERITY_RANK[current.severity]
+        finding_ids = list(current.metadata.get("finding_ids", [current.finding_id]))
+        if finding.id not in finding_ids:
+            finding_ids.append(finding.id)
+        now = self.clock()
+        updated = current.model_copy(update={
+            "severity": risk.severity if escalated else current.severity,
+            "risk_score": max(current.risk_score, risk.score),
+            "metadata": {**current.metadata, "finding_ids": finding_ids},
+        })
+        self._open[key] = OpenIncident(updated, now)
+        return updated, escalated
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        now = self.clock()
+        live = [
+            {
+                "family": family,
+                "updated_at": entry.updated_at.isoformat(),
+                "incident": entry.incident.model_dump(mode="json"),
+            }
+            for (_, family), entry in self._open.items()
+            if now - entry.updated_at <= self.ttl
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w") as f:
+            json.dump(live, f)
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        with self.path.open() as f:
+            raw = json.load(f)
+        for entry in raw:
+            incident = SecurityIncident.model_validate(entry["incident"])
+            self._open[(incident.user_id, entry["family"])] = OpenIncident(
+                incident, datetime.fromisoformat(entry["updated_at"])
+            )
@@ -0,0 +1,380 @@
+import base64
+import gzip
+import io
+import json
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from okta_soc.core.models import DetectionFinding, ResponsePlan, SecurityIncident
+from okta_soc.storage.segments import SegmentedLog
+
+
+KINDS = ("findings", "incidents")
+
+
+def _ts(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@dataclass
+class Query:
+    """
+    A filtered, ordered slice of stored findings or incidents.
+
+    Results are ordered by (created_at, id), newest first when descending.
+    `since` is inclusive and `until` exclusive. severity and status only
+    apply to incidents. Pass the next_cursor of the previous Page as
+    `cursor` to continue where it stopped.
+    """
+
+    kind: str = "incidents"
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    severity: Optional[str] = None
+    user_id: Optional[str] = None
+    finding_type: Optional[str] = None
+    status: Optional[str] = None
+    descending: bool = False
+    limit: int = 50
+    cursor: Optional[str] = None
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"Unknown query kind '{self.kind}'; expected one of {KINDS}")
+        if self.kind == "findings" and (self.severity or self.status):
+            raise ValueError("severity and status filters only apply to incidents")
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: float, record_id: str) -> str:
+    raw = json.dumps([created_at, record_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(created_at), str(record_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor '{cursor}'") from exc
+
+
+class _QueryEngine(ABC):
+    """Shared paging on top of a subclass's lazy, ordered _iter_records()."""
+
+    def iter(self, query: Query) -> Iterator[Any]:
+        """Stream every match in order, ignoring query.limit."""
+        for _, _, record in self._iter_records(query):
+            yield record
+
+    def page(self, query: Query) -> Page:
+        items: List[Any] = []
+        last: Optional[Tuple[float, str]] = None
+        for created_at, record_id, record in self._iter_records(query):
+            if len(items) == query.limit:
+                return Page(items=items, next_cursor=encode_cursor(*last))
+            items.append(record)
+            last = (created_at, record_id)
+        return Page(items=items)
+
+    @abstractmethod
+    def plans_for(self, incidents: List[SecurityIncident]) -> Dict[str, List[ResponsePlan]]:
+        """The stored plans of each incident, keyed by incident id."""
+        ...
+
+    @abstractmethod
+    def _iter_records(self, query: Query) -> Iterator[Tuple[float, str, Any]]:
+        """(created_at, id, record) for the query's kind and filters, in that order."""
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteQueryEngine(_QueryEngine):
+    """
+    Queries the SQLite backend with keyset pagination, so every page is an
+    index range scan on (filter column, created_at) however deep it is.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def close(self) -> None:
+        self.store.close()
+
+    def plans_for(self, incidents: List[SecurityIncident]) -> Dict[str, List[ResponsePlan]]:
+        plans: Dict[str, List[ResponsePlan]] = {i.id: [] for i in incidents}
+        if not plans:
+            return plans
+        rows = self.store.conn.execute(
+            f"SELECT incident_id, body FROM plans WHERE incident_id IN ({', '.join('?' for _ in plans)}) "
+            "ORDER BY id",
+            list(plans),
+        )
+        for incident_id, body in rows:
+            plans[incident_id].append(ResponsePlan.model_validate_json(body))
+        return plans
+
+    def _iter_records(self, query: Query) -> Iterator[Tuple[float, str, Any]]:
+        model = DetectionFinding if query.kind == "findings" else SecurityIncident
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column in ("severity", "user_id", "finding_type", "status"):
+            value = getattr(query, column)
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if query.since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_ts(query.since))
+        if query.until is not None:
+            clauses.append("created_at < ?")
+            params.append(_ts(query.until))
+        if query.cursor is not None:
+            created_at, record_id = decode_cursor(query.cursor)
+            op = "<" if query.descending else ">"
+            clauses.append(f"(created_at {op} ? OR (created_at = ? AND id {op} ?))")
+            params.extend([created_at, created_at, record_id])
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if query.descending else "ASC"
+        rows = self.store.conn.execute(
+            f"SELECT created_at, id, body FROM {query.kind}{where} "
+            f"ORDER BY created_at {order}, id {order}",
+            params,
+        )
+        for created_at, record_id, body in rows:
+            yield created_at, record_id, model.model_validate_json(body)
+
+
+def _finding_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "user_id": record.get("user_id"),
+        "finding_type": record.get("finding_type"),
+    }
+
+
+def _incident_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "user_id": record.get("user_id"),
+        "finding_type": (record.get("metadata") or {}).get("finding_type"),
+        "severity": record.get("severity"),
+        "status": record.get("status"),
+    }
+
+
+def _risk_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {"severity": (record.get("risk") or {}).get("severity")}
+
+
+# Per kind, the fields a JsonlIndex keeps for each record.
+INDEX_FIELDS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "findings": _finding_fields,
+    "incidents": _incident_fields,
+    "risks": _risk_fields,
+}
+
+
+class JsonlIndex:
+    """
+    Sidecar offset index for one JSONL segment (`<segment>.idx`).
+
+    Each index line holds a record's byte range, id, created_at and the
+    fields queries filter on, so a query reads the small index and then
+    seeks straight to the matching records. For an open segment refresh()
+    only indexes what was appended since the last call, and rebuilds the
+    index if the file shrank (it was replaced). Sealed (.gz) segments never
+    change; their offsets point into the decompressed bytes.
+
+    Get indexes through shared_index(), so that every reader and writer in
+    the process appends to a segment's sidecar through one instance, under
+    its lock.
+    """
+
+    def __init__(self, path: Path, fields: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.path = path
+        self.index_path = path.with_name(path.name + ".idx")
+        self.fields = fields
+        self.sealed = path.suffix == ".gz"
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._ids: Set[str] = set()
+        self._lock = threading.RLock()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            return list(self._entries)
+
+    def select(self, wanted: Set[str]) -> Set[str]:
+        """The ids among `wanted` in the segment, from an id set kept up to date as the index grows."""
+        with self._lock:
+            self.refresh()
+            return wanted & self._ids
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        if self._entries is None:
+            loaded = self.index_path.exists()
+            self._entries = self._load()
+            self._ids = {e["id"] for e in self._entries}
+            if self.sealed and loaded:
+                return
+        elif self.sealed:
+            return
+
+        if self.sealed:
+            with gzip.open(self.path, "rb") as f:
+                new = self._scan(f, 0)
+        else:
+            size = self.path.stat().st_size if self.path.exists() else 0
+            end = self._entries[-1]["e"] if self._entries else 0
+            if size < end:
+                self._entries = []
+                self._ids = set()
+                self.index_path.unlink(missing_ok=True)
+                end = 0
+            if size == end:
+                return
+            with self.path.open("rb") as f:
+                f.seek(end)
+                new = self._scan(f, end)
+
+        if new or self.sealed:
+            with self.index_path.open("a") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in new))
+            self._entries.extend(new)
+            self._ids.update(e["id"] for e in new)
+
+    def _scan(self, f: BinaryIO, offset: int) -> List[Dict[str, Any]]:
+        new: List[Dict[str, Any]] = []
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # a write in progress; index it next time
+            stripped = line.strip()
+            if stripped:
+                record = json.loads(stripped)
+                new.append({
+                    "o": offset,
+                    "e": offset + len(line),
+                    "id": record["id"],
+                    "ts": _ts(datetime.fromisoformat(record["created_at"])),
+                    **self.fields(record),
+                })
+            offset += len(line)
+        return new
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if not self.index_path.exists():
+            return []
+        entries = []
+        with self.index_path.open() as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                entries.append(json.loads(line))
+        return entries
+
+
+_shared: Dict[Path, JsonlIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_index(path: Path, kind: str) -> JsonlIndex:
+    """
+    The process's one JsonlIndex for a segment. The writer's repos and the
+    query engine (which the API runs on worker threads) share it, so two
+    instances never append the same entries to one sidecar.
+    """
+    key = path.absolute()
+    with _shared_lock:
+        index = _shared.get(key)
+        if index is None:
+            # A new segment; forget the ones sealed or pruned since
+            for stale in [p for p in _shared if not p.exists()]:
+                del _shared[stale]
+            index = _shared[key] = JsonlIndex(key, INDEX_FIELDS[kind])
+        return index
+
+
+class JsonlQueryEngine(_QueryEngine):
+    """
+    Queries the JSONL backend. Only the segments whose time range overlaps
+    the query are consulted, each through its JsonlIndex.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self.logs = {kind: SegmentedLog(data_dir / kind) for kind in KINDS}
+
+    def plans_for(self, incidents: List[SecurityIncident]) -> Dict[str, List[ResponsePlan]]:
+        plans: Dict[str, List[ResponsePlan]] = {i.id: [] for i in incidents}
+        if not plans:
+            return plans
+        # A plan is written after its incident is created, so older segments can be skipped.
+        since = min(i.created_at for i in incidents)
+        for line in SegmentedLog(self.data_dir / "plans").read_lines(since=since):
+            record = json.loads(line)
+            if record.get("incident_id") in plans:
+                plans[record["incident_id"]].append(ResponsePlan.model_validate(record))
+        return plans
+
+    def _iter_records(self, query: Query) -> Iterator[Tuple[float, str, Any]]:
+        model = DetectionFinding if query.kind == "findings" else SecurityIncident
+        after = decode_cursor(query.cursor) if query.cursor is not None else None
+        # Records are upserted by appending a new version with the same id,
+        # to the same or a later segment; the last one wins
+        latest: Dict[str, Tuple[Dict[str, Any], Path]] = {}
+        for path in self.logs[query.kind].segments(query.since, query.until):
+            for entry in shared_index(path, query.kind).entries():
+                latest[entry["id"]] = (entry, path)
+        matches = [(e, path) for e, path in latest.values() if self._matches(e, query, after)]
+        matches.sort(key=lambda m: (m[0]["ts"], m[0]["id"]), reverse=query.descending)
+
+        handles: Dict[Path, Any] = {}
+        try:
+            for entry, path in matches:
+                source = handles.get(path)
+                if source is None:
+                    if path.suffix == ".gz":
+                        with gzip.open(path, "rb") as f:
+                            source = handles[path] = io.BytesIO(f.read())
+                    else:
+                        source = handles[path] = path.open("rb")
+                source.seek(entry["o"])
+                record = model.model_validate_json(source.read(entry["e"] - entry["o"]))
+                yield entry["ts"], entry["id"], record
+        finally:
+            for source in handles.values():
+                source.close()
+
+    @staticmethod
+    def _matches(
+        entry: Dict[str, Any], query: Query, after: Optional[Tuple[float, str]]
+    ) -> bool:
+        for field in ("severity", "user_id", "finding_type", "status"):
+            value = getattr(query, field)
+            if value is not None and entry.get(field) != value:
+                return False
+        if query.since is not None and entry["ts"] < _ts(query.since):
+            return False
+        if query.until is not None and entry["ts"] >= _ts(query.until):
+            return False
+        if after is not None:
+            key = (entry["ts"], entry["id"])
+            return key < after if query.descending else key > after
+        return True
@@ -1,9 +1,15 @@
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
+from okta_soc.core.ids import incident_id
+from okta_soc.storage.query import shared_index
+from okta_soc.storage.segments import DEFAULT_SEGMENT_BYTES, SegmentedLog, record_created_at
 from okta_soc.core.models import (
     DetectionFinding,
     SecurityIncident,
@@ -15,36 +21,266 @@ from okta_soc.core.models import (
 
 
 DATA_DIR = Path("data")
-DATA_DIR.mkdir(exist_ok=True)
 
 
-class FindingsRepo:
-    def __init__(self, path: Path | None = None):
-        self.path = path or DATA_DIR / "findings.jsonl"
+class JsonlStore:
+    """
+    Unit-of-work writer shared by the JSONL repos.
+
+    Outside a transaction every save appends its line straight to the file.
+    Inside transaction() lines are buffered per file and committed together:
+    the buffered data and each file's current size are first written to a
+    journal (temp file + rename), then every file gets a single append, then
+    the journal is removed. If the process dies mid-commit, the next store
+    opened on the directory truncates the files back to the journaled sizes
+    and re-applies the appends, so no file is left with half-written lines.
+    With fsync=True the journal and every appended file are fsynced.
+    """
+
+    JOURNAL_NAME = ".commit-journal.json"
+
+    def __init__(self, directory: Path = DATA_DIR, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        self.journal_path = directory / self.JOURNAL_NAME
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._pending: Dict[Path, List[str]] = {}
+        self._on_commit: List[Callable[[], None]] = []
+        self.recover()
+
+    @contextmanager
+    def transaction(self) -> Iterator["JsonlStore"]:
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pending.clear()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self.commit()
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """Run callback after every commit (and every direct append)."""
+        self._on_commit.append(callback)
+
+    def in_transaction(self) -> bool:
+        return self._depth > 0
+
+    def append(self, path: Path, line: str) -> None:
+        with self._lock:
+            if self._depth:
+                self._pending.setdefault(path, []).append(line)
+                return
+        with path.open("a") as f:
+            f.write(line + "\n")
+        self._notify()
+
+    def commit(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        entries = [
+            {
+                "path": str(path),
+                "offset": path.stat().st_size if path.exists() else 0,
+                "data": "".join(line + "\n" for line in lines),
+            }
+            for path, lines in pending.items()
+        ]
+        self._write_journal(entries)
+        self._apply(entries)
+        self.journal_path.unlink()
+        self._notify()
+
+    def _notify(self) -> None:
+        for callback in self._on_commit:
+            callback()
+
+    def recover(self) -> None:
+        """Finish a commit that was interrupted after its journal was written."""
+        tmp = self.journal_path.with_suffix(".tmp")
+        if tmp.exists():
+            # Died before the journal was complete; nothing was appended yet.
+            tmp.unlink()
+        if not self.journal_path.exists():
+            return
+        with self.journal_path.open() as f:
+            entries = json.load(f)
+        self._apply(entries)
+        self.journal_path.unlink()
+
+    def close(self) -> None:
+        pass
+
+    def _write_journal(self, entries: List[Dict]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.journal_path.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump(entries, f)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def _apply(self, entries: List[Dict]) -> None:
+        for entry in entries:
+            path = Path(entry["path"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("ab") as f:
+                if f.tell() > entry["offset"]:
+                    # Drop whatever a previous, interrupted attempt appended.
+                    f.truncate(entry["offset"])
+                f.write(entry["data"].encode("utf-8"))
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+
+class JsonlRepo:
+    """
+    Base for the JSONL repos: records are appended to a SegmentedLog under
+    data/<name>/, partitioned by the record's day (see storage/segments.py).
+    """
+
+    name = ""
+    timestamp: Optional[Callable[[Dict], Optional[str]]] = None
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        store: Optional[JsonlStore] = None,
+        max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+    ):
+        self.log = SegmentedLog(
+            directory or DATA_DIR / self.name,
+            max_segment_bytes=max_segment_bytes,
+            timestamp=type(self).timestamp,
+        )
+        self.store = store
+        if store is not None:
+            store.on_commit(self.log.maintain)
+        self.log.maintain()
+
+    def _append(self, line: str, ts: Optional[datetime] = None) -> None:
+        path = self.log.segment_for(ts, len(line.encode("utf-8")) + 1)
+        if self.store is not None:
+            self.store.append(path, line)
+            return
+        with path.open("a") as f:
+            f.write(line + "\n")
+        self.log.maintain()
+
+    def read_lines(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[str]:
+        return self.log.read_lines(since, until)
+
+    def _indexed_ids(
+        self, wanted: Set[str], since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Set[str]:
+        """The ids in `wanted` stored in segments overlapping [since, until), via the sidecar indexes."""
+        found: Set[str] = set()
+        for path in self.log.segments(since, until):
+            found.update(shared_index(path, self.name).select(wanted))
+        return found
+
+
+class FindingsRepo(JsonlRepo):
+    """
+    Finding ids are content-addressed (core/ids.py), so a finding is written
+    once: saving an id that is already stored is a no-op. known_ids() checks
+    the store itself, so this holds across processes; the only ids kept in
+    memory are those appended by the store's uncommitted transaction.
+    Readers keep the last line per id.
+    """
+
+    name = "findings"
+    timestamp = staticmethod(record_created_at)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._uncommitted: Set[str] = set()
+        if self.store is not None:
+            self.store.on_commit(self._uncommitted.clear)
 
     def save(self, finding: DetectionFinding) -> None:
-        with self.path.open("a") as f:
-            f.write(finding.model_dump_json() + "\n")
+        if self.known_ids([finding]):
+            return
+        self._append(finding.model_dump_json(), finding.created_at)
+        if self.store is not None and self.store.in_transaction():
+            self._uncommitted.add(finding.id)
+
+    def known_ids(self, findings: List[DetectionFinding]) -> Set[str]:
+        """
+        The ids among `findings` that are already stored. Only the segments
+        covering their created_at range are consulted, through the same
+        sidecar indexes the query engine uses.
+        """
+        wanted = {f.id for f in findings}
+        known = wanted & self._uncommitted
+        if wanted - known:
+            since = min(f.created_at for f in findings)
+            until = max(f.created_at for f in findings) + timedelta(microseconds=1)
+            known |= self._indexed_ids(wanted, since, until)
+        return known
 
 
-class IncidentsRepo:
-    def __init__(self, path: Path | None = None):
-        self.path = path or DATA_DIR / "incidents.jsonl"
+class RisksRepo(JsonlRepo):
+    """
+    The risk score of each analyzed finding, keyed by finding id and
+    partitioned by the day it was written. A finding counts as analyzed
+    only once its score is stored here, so findings a failed run detected
+    but never scored are analyzed again by the next run.
+    """
+
+    name = "risks"
+    timestamp = staticmethod(record_created_at)
+
+    def save(self, risk: RiskScore) -> None:
+        record = {
+            "id": risk.finding_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "risk": risk.model_dump(mode="json"),
+        }
+        self._append(json.dumps(record))
+
+    def known_ids(self, findings: List[DetectionFinding]) -> Set[str]:
+        """
+        The ids among `findings` that have a stored risk score. A score is
+        written after its finding is created, so only the segments from the
+        oldest finding's created_at on are consulted.
+        """
+        if not findings:
+            return set()
+        return self._indexed_ids({f.id for f in findings}, since=min(f.created_at for f in findings))
+
+
+class IncidentsRepo(JsonlRepo):
+    """
+    Saving an incident again (it escalated, or a finding was attached)
+    appends a new version with the same id; readers keep the last one.
+    """
+
+    name = "incidents"
+    timestamp = staticmethod(record_created_at)
 
     def save(self, incident: SecurityIncident) -> None:
-        with self.path.open("a") as f:
-            f.write(incident.model_dump_json() + "\n")
+        self._append(incident.model_dump_json(), incident.created_at)
 
     def create_from_finding(
         self,
         finding: DetectionFinding,
         risk: RiskScore,
     ) -> SecurityIncident:
-        import uuid
-
         incident = SecurityIncident(
-            id=str(uuid.uuid4()),
+            id=incident_id(finding.id),
             finding_id=finding.id,
+            user_id=finding.user_id,
             title=f"Incident from {finding.finding_type.value}",
             description=finding.description,
             severity=risk.severity,
@@ -61,44 +297,33 @@ class IncidentsRepo:
         return incident
 
     def load_all(self) -> Iterable[SecurityIncident]:
-        if not self.path.exists():
-            return []
-        incidents: list[SecurityIncident] = []
-        with self.path.open() as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                incidents.append(SecurityIncident.model_validate_json(line))
-        return incidents
-
-
-class PlansRepo:
-    def __init__(self, path: Path | None = None):
-        self.path = path or DATA_DIR / "plans.jsonl"
+        latest: Dict[str, SecurityIncident] = {}
+        for line in self.read_lines():
+            incident = SecurityIncident.model_validate_json(line)
+            latest[incident.id] = incident
+        return list(latest.values())
+
+
+class PlansRepo(JsonlRepo):
+    name = "plans"
 
     def save(self, plan: ResponsePlan) -> None:
-        with self.path.open("a") as f:
-            f.write(plan.model_dump_json() + "\n")
+        self._append(plan.model_dump_json())
 
 
-class CommandsRepo:
-    def __init__(self, path: Path | None = None):
-        self.path = path or DATA_DIR / "commands.jsonl"
+class CommandsRepo(JsonlRepo):
+    name = "commands"
 
     def save(self, incident_id: str, command: CommandSuggestion) -> None:
         record = {
             "incident_id": incident_id,
             "command": command.model_dump(),
         }
-        with self.path.open("a") as f:
-            f.write(json.dumps(record) + "\n")
+        self._append(json.dumps(record))
 
 
-class EscalationsRepo:
-    def __init__(self, path: Path | None = None):
-        self.path = path or DATA_DIR / "escalations.jsonl"
+class EscalationsRepo(JsonlRepo):
+    name = "escalations"
 
     def save(self, escalation: EscalationResult) -> None:
-        with self.path.open("a") as f:
-            f.write(escalation.model_dump_json() + "\n")
+        self._append(escalation.model_dump_json())
@@ -0,0 +1,291 @@
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+_DAY = timedelta(days=1)
+
+
+def _utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _parse_name(path: Path) -> Tuple[str, int]:
+    """'2025-11-12.0003.jsonl[.gz]' -> ('2025-11-12', 3)"""
+    day, seq = path.name.split(".")[:2]
+    return day, int(seq)
+
+
+def _day_bounds(day: str) -> Tuple[float, float]:
+    start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return start.timestamp(), (start + _DAY).timestamp()
+
+
+def record_created_at(record: Dict) -> Optional[str]:
+    return record.get("created_at")
+
+
+def open_segment(path: Path):
+    """Open a segment for reading text, decompressing sealed ones."""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    return path.open()
+
+
+class SegmentedLog:
+    """
+    Time-partitioned JSONL log for one artifact kind, e.g. data/findings/.
+
+    Records go to a segment for the UTC day of their timestamp (write time for
+    records without one), named `<day>.<seq>.jsonl`. A late record, from a
+    day older than the newest one written (an update to an earlier incident,
+    say), goes to the newest day's open segment rather than reopening its own
+    day, so open segments are read for any window that starts before their
+    day ends. A segment that would grow
+    past max_segment_bytes is rotated to the next seq. maintain() seals every
+    segment that no longer receives writes (rotated out, or from a day older
+    than the newest one written) by gzipping it and recording its min/max
+    timestamp and record count in manifest.json, so readers can skip
+    segments outside the window they ask for. prune() drops whole segments
+    that end before a cutoff.
+
+    A pre-segmentation flat file (data/findings.jsonl) is still read, as an
+    always-scanned segment, but never written to or pruned.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        timestamp: Optional[Callable[[Dict], Optional[str]]] = None,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.timestamp = timestamp
+        self.clock = clock
+        self.legacy_path = directory.with_suffix(".jsonl")
+        self.manifest_path = directory / "manifest.json"
+        self._lock = threading.Lock()
+        self._active: Dict[str, Path] = {}
+        self._sizes: Dict[Path, int] = {}
+        self._newest_day: Optional[str] = None
+        self._dirty = True  # check the directory on the first maintain()
+
+    # -- writing ---------------------------------------------------------
+
+    def segment_for(self, ts: Optional[datetime], nbytes: int) -> Path:
+        """Pick (and account for) the segment a record of nbytes should go to."""
+        day = _utc(ts or self.clock()).strftime("%Y-%m-%d")
+        with self._lock:
+            if self._newest_day is None:
+                days = [_parse_name(p)[0] for p in self._segment_files()]
+                self._newest_day = max(days) if days else day
+            day = self._newest_day = max(day, self._newest_day)
+            path = self._active.get(day)
+            if path is None:
+                path = self._latest(day)
+                if path is not None and path.suffix == ".gz":
+                    path = None
+            size = 0
+            if path is not None:
+                size = self._sizes.get(path, path.stat().st_size if path.exists() else 0)
+            if path is None or (size > 0 and size + nbytes > self.max_segment_bytes):
+                if path is not None:
+                    self._dirty = True  # the rotated-out segment can be sealed
+                path = self._next(day, path)
+                size = 0
+            if day not in self._active:
+                self._dirty = True  # a new day; older days can be sealed
+            self._active[day] = path
+            self._sizes[path] = size + nbytes
+            return path
+
+    def maintain(self) -> None:
+        """Seal segments that no longer receive writes. Cheap when nothing changed."""
+        with self._lock:
+            if not self._dirty or not self.directory.exists():
+                return
+            self._dirty = False
+            plain = [p for p in self._segment_files() if p.suffix == ".jsonl"]
+            sealed = {p.name for p in self._segment_files() if p.suffix == ".gz"}
+            days = {_parse_name(p)[0] for p in plain} | set(self._active)
+            newest_day = max(days) if days else None
+            latest = {day: self._latest(day, include_sealed=False) for day in days}
+
+            for path in plain:
+                day, _ = _parse_name(path)
+                if path.name + ".gz" in sealed:
+                    # Died after compressing but before removing the original.
+                    path.unlink()
+                elif day < newest_day or path != latest.get(day):
+                    self._seal(path)
+                    if self._active.get(day) == path:
+                        del self._active[day]
+                    self._sizes.pop(path, None)
+
+    def seal_all(self) -> None:
+        """Seal every segment, including the active ones (e.g. before archiving)."""
+        with self._lock:
+            for path in self._segment_files():
+                if path.suffix == ".jsonl":
+                    self._seal(path)
+            self._active.clear()
+            self._sizes.clear()
+
+    # -- reading ---------------------------------------------------------
+
+    def segments(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Path]:
+        """Segments that may hold records in [since, until), oldest first."""
+        lo = _utc(since).timestamp() if since is not None else None
+        hi = _utc(until).timestamp() if until is not None else None
+        manifest = self._load_manifest()
+
+        selected = [self.legacy_path] if self.legacy_path.exists() else []
+        for path in self._segment_files():
+            first, last = self._bounds(path, manifest)
+            if lo is not None and last < lo:
+                continue
+            if hi is not None and first >= hi:
+                continue
+            selected.append(path)
+        return selected
+
+    def read_lines(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        newest_first: bool = False,
+    ) -> Iterator[str]:
+        """
+        Lazily yield the lines of every segment overlapping [since, until).
+        With newest_first, segments are visited newest to oldest and each is
+        read backwards, so memory and time to the first line are bounded by
+        one segment, not by the whole history.
+        """
+        segments = self.segments(since, until)
+        if newest_first:
+            segments.reverse()
+        for path in segments:
+            with open_segment(path) as f:
+                lines = reversed(f.readlines()) if newest_first else f
+                for line in lines:
+                    line = line.strip()
+                    if line:
+                        yield line
+
+    # -- retention -------------------------------------------------------
+
+    def prune(self, before: datetime) -> List[Path]:
+        """Delete every segment whose records all predate `before`."""
+        cutoff = _utc(before).timestamp()
+        removed: List[Path] = []
+        with self._lock:
+            manifest = self._load_manifest()
+            for path in self._segment_files():
+                _, last = self._bounds(path, manifest)
+                if last >= cutoff:
+                    continue
+                path.unlink()
+                path.with_name(path.name + ".idx").unlink(missing_ok=True)
+                manifest.pop(path.name, None)
+                self._sizes.pop(path, None)
+                self._active = {d: p for d, p in self._active.items() if p != path}
+                removed.append(path)
+            if removed:
+                self._save_manifest(manifest)
+                self._newest_day = None
+        return removed
+
+    # -- internals -------------------------------------------------------
+
+    def _segment_files(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        files = [
+            p for p in self.directory.iterdir()
+            if p.name.endswith(".jsonl") or p.name.endswith(".jsonl.gz")
+        ]
+        return sorted(files, key=_parse_name)
+
+    def _latest(self, day: str, include_sealed: bool = True) -> Optional[Path]:
+        candidates = [
+            p for p in self._segment_files()
+            if _parse_name(p)[0] == day and (include_sealed or p.suffix == ".jsonl")
+        ]
+        if day in self._active:
+            candidates.append(self._active[day])
+        return max(candidates, key=_parse_name) if candidates else None
+
+    def _next(self, day: str, current: Optional[Path]) -> Path:
+        latest = self._latest(day)
+        seqs = [_parse_name(p)[1] for p in (latest, current) if p is not None]
+        seq = max(seqs) + 1 if seqs else 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory / f"{day}.{seq:04d}.jsonl"
+
+    def _bounds(self, path: Path, manifest: Dict[str, Dict]) -> Tuple[float, float]:
+        entry = manifest.get(path.name)
+        if entry is not None and entry.get("min_ts") is not None:
+            return entry["min_ts"], entry["max_ts"]
+        first, last = _day_bounds(_parse_name(path)[0])
+        if path.suffix == ".jsonl":
+            # Open segments may also hold late records from earlier days.
+            return float("-inf"), last
+        # Sealed ones without timestamps span their day.
+        return first, last
+
+    def _seal(self, path: Path) -> None:
+        count, first, last = 0, None, None
+        gz_path = path.with_name(path.name + ".gz")
+        tmp = gz_path.with_name(gz_path.name + ".tmp")
+        with path.open("rb") as src, gzip.open(tmp, "wb") as dst:
+            for line in src:
+                dst.write(line)
+                if not line.strip():
+                    continue
+                count += 1
+                if self.timestamp is not None:
+                    raw = self.timestamp(json.loads(line))
+                    if raw is not None:
+                        ts = _utc(datetime.fromisoformat(raw)).timestamp()
+                        first = ts if first is None else min(first, ts)
+                        last = ts if last is None else max(last, ts)
+        os.replace(tmp, gz_path)
+
+        manifest = self._load_manifest()
+        manifest[gz_path.name] = {"min_ts": first, "max_ts": last, "count": count}
+        self._save_manifest(manifest)
+        # Offsets index the uncompressed bytes; readers rebuild it for the .gz.
+        path.with_name(path.name + ".idx").unlink(missing_ok=True)
+        path.unlink()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not self.manifest_path.exists():
+            return {}
+        with self.manifest_path.open() as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Dict]) -> None:
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+
+ARTIFACT_KINDS = ("findings", "risks", "incidents", "plans", "commands", "escalations")
+
+
+def prune_artifacts(data_dir: Path, before: datetime) -> Dict[str, int]:
+    """Retention job: drop every artifact segment that ends before `before`."""
+    return {
+        kind: len(SegmentedLog(data_dir / kind).prune(before))
+        for kind in ARTIFACT_KINDS
+    }
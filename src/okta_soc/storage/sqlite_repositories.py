@@ -0,0 +1,420 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from okta_soc.core.ids import incident_id
+from okta_soc.storage.segments import SegmentedLog
+from okta_soc.core.models import (
+    DetectionFinding,
+    SecurityIncident,
+    ResponsePlan,
+    CommandSuggestion,
+    RiskScore,
+    EscalationResult,
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id           TEXT PRIMARY KEY,
+    finding_type TEXT NOT NULL,
+    user_id      TEXT,
+    created_at   REAL NOT NULL,
+    body         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_findings_user_created ON findings(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_findings_type_created ON findings(finding_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_findings_created ON findings(created_at);
+
+CREATE TABLE IF NOT EXISTS risks (
+    finding_id TEXT PRIMARY KEY REFERENCES findings(id) DEFERRABLE INITIALLY DEFERRED,
+    severity   TEXT NOT NULL,
+    body       TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS incidents (
+    id           TEXT PRIMARY KEY,
+    finding_id   TEXT NOT NULL REFERENCES findings(id) DEFERRABLE INITIALLY DEFERRED,
+    user_id      TEXT,
+    finding_type TEXT,
+    severity     TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    created_at   REAL NOT NULL,
+    body         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_incidents_finding ON incidents(finding_id);
+CREATE INDEX IF NOT EXISTS idx_incidents_user_created ON incidents(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_severity_created ON incidents(severity, created_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_status_created ON incidents(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_type_created ON incidents(finding_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_created ON incidents(created_at);
+
+CREATE TABLE IF NOT EXISTS plans (
+    id          INTEGER PRIMARY KEY,
+    incident_id TEXT NOT NULL REFERENCES incidents(id) DEFERRABLE INITIALLY DEFERRED,
+    body        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_plans_incident ON plans(incident_id);
+
+CREATE TABLE IF NOT EXISTS commands (
+    id          INTEGER PRIMARY KEY,
+    incident_id TEXT REFERENCES incidents(id) DEFERRABLE INITIALLY DEFERRED,
+    step_id     TEXT NOT NULL,
+    body        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_commands_incident ON commands(incident_id);
+
+CREATE TABLE IF NOT EXISTS escalations (
+    id          INTEGER PRIMARY KEY,
+    incident_id TEXT NOT NULL REFERENCES incidents(id) DEFERRABLE INITIALLY DEFERRED,
+    sent        INTEGER NOT NULL,
+    body        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_escalations_incident ON escalations(incident_id);
+"""
+
+
+def _ts(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+# Plans, commands and escalations have no timestamp of their own; `since`
+# selects them by the incident they belong to.
+_LINKED_SINCE = "incident_id IN (SELECT id FROM incidents WHERE created_at >= ?)"
+
+
+def _newest(
+    store: "SqliteStore", table: str, columns: str, order: str,
+    since: Optional[datetime], since_clause: str,
+) -> Iterator[tuple]:
+    where, params = "", ()
+    if since is not None:
+        where, params = f" WHERE {since_clause}", (_ts(since),)
+    return store.conn.execute(f"SELECT {columns} FROM {table}{where} ORDER BY {order}", params)
+
+
+class SqliteStore:
+    """
+    Shared SQLite connection for the indexed storage backend.
+
+    Runs in WAL mode so readers (show-all, queries) never block the writer.
+    Each save outside a transaction commits on its own; wrap bulk writes in
+    transaction() to commit them together.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; transaction() issues BEGIN/COMMIT explicitly.
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self.conn.execute("BEGIN")
+            self._depth += 1
+            try:
+                yield self.conn
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self.conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                try:
+                    self.conn.execute("COMMIT")
+                except sqlite3.Error:
+                    # A deferred FK violation fails COMMIT but leaves the
+                    # transaction open; undo it so the store stays consistent.
+                    self.conn.execute("ROLLBACK")
+                    raise
+
+    def is_empty(self) -> bool:
+        tables = ("findings", "risks", "incidents", "plans", "commands", "escalations")
+        return all(
+            self.conn.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone() is None for t in tables
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SqliteFindingsRepo:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def save(self, finding: DetectionFinding) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO findings (id, finding_type, user_id, created_at, body) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    finding.id,
+                    finding.finding_type.value,
+                    finding.user_id,
+                    _ts(finding.created_at),
+                    finding.model_dump_json(),
+                ),
+            )
+
+    def known_ids(self, findings: List[DetectionFinding]) -> Set[str]:
+        """The ids among `findings` that are already stored."""
+        known: Set[str] = set()
+        ids = [f.id for f in findings]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            rows = self.store.conn.execute(
+                f"SELECT id FROM findings WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+            known.update(r[0] for r in rows)
+        return known
+
+    def get(self, finding_id: str) -> Optional[DetectionFinding]:
+        row = self.store.conn.execute(
+            "SELECT body FROM findings WHERE id = ?", (finding_id,)
+        ).fetchone()
+        return DetectionFinding.model_validate_json(row[0]) if row else None
+
+    def find_by_user(self, user_id: str) -> List[DetectionFinding]:
+        rows = self.store.conn.execute(
+            "SELECT body FROM findings WHERE user_id = ? ORDER BY created_at", (user_id,)
+        )
+        return [DetectionFinding.model_validate_json(r[0]) for r in rows]
+
+    def iter_newest(self, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stored findings as JSON records, newest first, created since `since`."""
+        rows = _newest(self.store, "findings", "body", "created_at DESC, id DESC", since, "created_at >= ?")
+        for (body,) in rows:
+            yield json.loads(body)
+
+
+class SqliteRisksRepo:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def save(self, risk: RiskScore) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO risks (finding_id, severity, body) VALUES (?, ?, ?)",
+                (risk.finding_id, risk.severity.value, risk.model_dump_json()),
+            )
+
+    def known_ids(self, findings: List[DetectionFinding]) -> Set[str]:
+        """The ids among `findings` that have a stored risk score."""
+        known: Set[str] = set()
+        ids = [f.id for f in findings]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            rows = self.store.conn.execute(
+                f"SELECT finding_id FROM risks WHERE finding_id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+            known.update(r[0] for r in rows)
+        return known
+
+    def get(self, finding_id: str) -> Optional[RiskScore]:
+        row = self.store.conn.execute(
+            "SELECT body FROM risks WHERE finding_id = ?", (finding_id,)
+        ).fetchone()
+        return RiskScore.model_validate_json(row[0]) if row else None
+
+
+class SqliteIncidentsRepo:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def save(self, incident: SecurityIncident) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO incidents "
+                "(id, finding_id, user_id, finding_type, severity, status, created_at, body) "
+                # Older incidents carry no user_id; take it from their finding.
+                "VALUES (?, ?, COALESCE(?, (SELECT user_id FROM findings WHERE id = ?)), ?, ?, ?, ?, ?)",
+                (
+                    incident.id,
+                    incident.finding_id,
+                    incident.user_id,
+                    incident.finding_id,
+                    incident.metadata.get("finding_type"),
+                    incident.severity.value,
+                    incident.status,
+                    _ts(incident.created_at),
+                    incident.model_dump_json(),
+                ),
+            )
+
+    def create_from_finding(
+        self,
+        finding: DetectionFinding,
+        risk: RiskScore,
+    ) -> SecurityIncident:
+        incident = SecurityIncident(
+            id=incident_id(finding.id),
+            finding_id=finding.id,
+            user_id=finding.user_id,
+            title=f"Incident from {finding.finding_type.value}",
+            description=finding.description,
+            severity=risk.severity,
+            risk_score=risk.score,
+            created_at=datetime.now(timezone.utc),
+            status="open",
+            metadata={
+                "finding_type": finding.finding_type.value,
+                **finding.metadata,
+            },
+        )
+        self.save(incident)
+        return incident
+
+    def get(self, incident_id: str) -> Optional[SecurityIncident]:
+        row = self.store.conn.execute(
+            "SELECT body FROM incidents WHERE id = ?", (incident_id,)
+        ).fetchone()
+        return SecurityIncident.model_validate_json(row[0]) if row else None
+
+    def find_by_finding(self, finding_id: str) -> List[SecurityIncident]:
+        rows = self.store.conn.execute(
+            "SELECT body FROM incidents WHERE finding_id = ? ORDER BY created_at", (finding_id,)
+        )
+        return [SecurityIncident.model_validate_json(r[0]) for r in rows]
+
+    def find_by_user(self, user_id: str) -> List[SecurityIncident]:
+        rows = self.store.conn.execute(
+            "SELECT body FROM incidents WHERE user_id = ? ORDER BY created_at", (user_id,)
+        )
+        return [SecurityIncident.model_validate_json(r[0]) for r in rows]
+
+    def load_all(self) -> Iterable[SecurityIncident]:
+        rows = self.store.conn.execute("SELECT body FROM incidents ORDER BY created_at")
+        return [SecurityIncident.model_validate_json(r[0]) for r in rows]
+
+    def iter_newest(self, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stored incidents as JSON records, newest first, created since `since`."""
+        rows = _newest(self.store, "incidents", "body", "created_at DESC, id DESC", since, "created_at >= ?")
+        for (body,) in rows:
+            yield json.loads(body)
+
+
+class SqlitePlansRepo:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def save(self, plan: ResponsePlan) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO plans (incident_id, body) VALUES (?, ?)",
+                (plan.incident_id, plan.model_dump_json()),
+            )
+
+    def find_by_incident(self, incident_id: str) -> List[ResponsePlan]:
+        rows = self.store.conn.execute(
+            "SELECT body FROM plans WHERE incident_id = ? ORDER BY id", (incident_id,)
+        )
+        return [ResponsePlan.model_validate_json(r[0]) for r in rows]
+
+    def iter_newest(self, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stored plans as JSON records, newest first."""
+        for (body,) in _newest(self.store, "plans", "body", "id DESC", since, _LINKED_SINCE):
+            yield json.loads(body)
+
+
+class SqliteCommandsRepo:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def save(self, incident_id: str, command: CommandSuggestion) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO commands (incident_id, step_id, body) VALUES (?, ?, ?)",
+                # An empty incident id means "not linked"; store NULL so the FK holds.
+                (incident_id or None, command.step_id, command.model_dump_json()),
+            )
+
+    def find_by_incident(self, incident_id: str) -> List[CommandSuggestion]:
+        rows = self.store.conn.execute(
+            "SELECT body FROM commands WHERE incident_id = ? ORDER BY id", (incident_id,)
+        )
+        return [CommandSuggestion.model_validate_json(r[0]) for r in rows]
+
+    def iter_newest(self, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stored commands in the JSONL record shape, newest first."""
+        rows = _newest(self.store, "commands", "incident_id, body", "id DESC", since, _LINKED_SINCE)
+        for linked, body in rows:
+            yield {"incident_id": linked or "", "command": json.loads(body)}
+
+
+class SqliteEscalationsRepo:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def save(self, escalation: EscalationResult) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO escalations (incident_id, sent, body) VALUES (?, ?, ?)",
+                (escalation.incident_id, int(escalation.sent), escalation.model_dump_json()),
+            )
+
+    def iter_newest(self, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stored escalations as JSON records, newest first."""
+        for (body,) in _newest(self.store, "escalations", "body", "id DESC", since, _LINKED_SINCE):
+            yield json.loads(body)
+
+
+def _read_jsonl(data_dir: Path, kind: str) -> Iterator[str]:
+    return SegmentedLog(data_dir / kind).read_lines()
+
+
+def import_jsonl(store: SqliteStore, data_dir: Path) -> Dict[str, int]:
+    """
+    One-shot import of the JSONL artifacts in data_dir into an empty store.
+    Runs in a single transaction so a failed import leaves the store empty.
+    """
+    if not store.is_empty():
+        raise ValueError(f"SQLite store {store.path} already has data; refusing to import twice")
+
+    findings = SqliteFindingsRepo(store)
+    risks = SqliteRisksRepo(store)
+    incidents = SqliteIncidentsRepo(store)
+    plans = SqlitePlansRepo(store)
+    commands = SqliteCommandsRepo(store)
+    escalations = SqliteEscalationsRepo(store)
+
+    counts = {"findings": 0, "risks": 0, "incidents": 0, "plans": 0, "commands": 0, "escalations": 0}
+    with store.transaction():
+        for line in _read_jsonl(data_dir, "findings"):
+            findings.save(DetectionFinding.model_validate_json(line))
+            counts["findings"] += 1
+        for line in _read_jsonl(data_dir, "risks"):
+            risks.save(RiskScore.model_validate(json.loads(line)["risk"]))
+            counts["risks"] += 1
+        for line in _read_jsonl(data_dir, "incidents"):
+            incidents.save(SecurityIncident.model_validate_json(line))
+            counts["incidents"] += 1
+        for line in _read_jsonl(data_dir, "plans"):
+            plans.save(ResponsePlan.model_validate_json(line))
+            counts["plans"] += 1
+        for line in _read_jsonl(data_dir, "commands"):
+            record = json.loads(line)
+            commands.save(
+                record.get("incident_id", ""),
+                CommandSuggestion.model_validate(record["command"]),
+            )
+            counts["commands"] += 1
+        for line in _read_jsonl(data_dir, "escalations"):
+            escalations.save(EscalationResult.model_validate_json(line))
+            counts["escalations"] += 1
+    return counts
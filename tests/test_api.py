@@ -0,0 +1,295 @@
+"""Tests for the HTTP API: event pushes with backpressure and paginated queries."""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from okta_soc.core.models import SecurityIncident, Severity
+from okta_soc.core.serialization import decode
+from okta_soc.ingest.okta_client import event_from_okta
+from okta_soc.ingest.push import EventBuffer, InvalidEvents, PushIngestor, parse_events
+from okta_soc.interface.api import ApiServer
+from okta_soc.storage.query import SqliteQueryEngine
+from okta_soc.storage.sqlite_repositories import SqliteIncidentsRepo, SqliteStore
+
+BASE = datetime(2025, 11, 12, tzinfo=timezone.utc)
+
+OKTA_RECORD = {
+    "uuid": "u-1",
+    "eventType": "user.session.start",
+    "published": "2025-11-12T18:00:00.000Z",
+    "actor": {"id": "00u1", "type": "User", "alternateId": "alice@example.com"},
+    "client": {
+        "ipAddress": "203.0.113.10",
+        "userAgent": {"rawUserAgent": "Mozilla/5.0"},
+        "geographicalContext": {
+            "city": "Washington", "country": "United States",
+            "geolocation": {"lat": 38.9, "lon": -77.0},
+        },
+    },
+    "outcome": {"result": "FAILURE"},
+    "target": [{"id": "00u1", "type": "User"}],
+}
+
+
+def _flat(event_id: str) -> dict:
+    return {
+        "id": event_id,
+        "event_type": "user.session.start",
+        "actor_id": "alice",
+        "timestamp": "2025-11-12T18:00:00Z",
+    }
+
+
+def test_event_from_okta_maps_system_log_shape():
+    event = event_from_okta(OKTA_RECORD)
+    assert event.id == "u-1"
+    assert event.actor_id == "00u1"
+    assert event.ip_address == "203.0.113.10"
+    assert event.outcome == "FAILURE"
+    assert event.latitude == 38.9
+    assert event.timestamp == datetime(2025, 11, 12, 18, tzinfo=timezone.utc)
+
+
+def test_parse_events_accepts_array_object_and_ndjson():
+    assert [e.id for e in parse_events(json.dumps([_flat("a"), _flat("b")]).encode())] == ["a", "b"]
+    assert [e.id for e in parse_events(json.dumps(OKTA_RECORD).encode())] == ["u-1"]
+    ndjson = "\n".join(json.dumps(_flat(i)) for i in ("a", "b", "c")) + "\n"
+    assert [e.id for e in parse_events(ndjson.encode())] == ["a", "b", "c"]
+    assert parse_events(b"  ") == []
+
+
+def test_parse_events_rejects_whole_batch_on_bad_record():
+    with pytest.raises(InvalidEvents, match="record 2"):
+        parse_events(json.dumps([_flat("a"), {"id": "b"}]).encode())
+    with pytest.raises(InvalidEvents, match="line 2"):
+        parse_events(b'{"id": "a"}\n{not json\n')
+
+
+def test_buffer_refuses_batches_that_do_not_fit():
+    async def scenario():
+        buffer = EventBuffer(max_events=3)
+        events = parse_events(json.dumps([_flat("a"), _flat("b")]).encode())
+        assert buffer.offer(events)
+        assert not buffer.offer(events)
+        assert buffer.take(10) == events
+        assert len(buffer) == 0
+
+    asyncio.run(scenario())
+
+
+class _FakePipeline:
+    def __init__(self):
+        self.batches = []
+
+    async def process(self, events, metadata):
+        self.batches.append([e.id for e in events])
+
+    async def run_once(self, since, resume=False):
+        return 0
+
+    def checkpointed(self, metadata):
+        return False
+
+
+class _FailingPipeline(_FakePipeline):
+    """Fails its first runs (and resumes), before or after the run is checkpointed."""
+
+    def __init__(self, checkpointed, failures=1, resume_failures=0):
+        super().__init__()
+        self.failures = failures
+        self.resume_failures = resume_failures
+        self.resumed = 0
+        self._checkpointed = checkpointed
+        self.abandoned = 0
+
+    async def process(self, events, metadata):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("router unavailable")
+        await super().process(events, metadata)
+
+    async def run_once(self, since, resume=False):
+        self.resumed += resume
+        if resume and self.resume_failures:
+            self.resume_failures -= 1
+            raise RuntimeError("still unavailable")
+        return 0
+
+    def checkpointed(self, metadata):
+        return self._checkpointed
+
+    def abandon_checkpoint(self):
+        self.abandoned += 1
+        return SimpleNamespace(data={"List[OktaEvent]": []}, metadata={"source": "push"})
+
+
+def _run_ingestor(pipeline, batches, dead_letter=None):
+    async def scenario():
+        buffer = EventBuffer(10)
+        ingestor = PushIngestor(pipeline, buffer, linger=0, retry_delay=0, dead_letter=dead_letter)
+        stop = asyncio.Event()
+        processing = asyncio.create_task(ingestor.run(stop))
+        for ids in batches:
+            assert buffer.offer(parse_events(json.dumps([_flat(i) for i in ids]).encode()))
+            await asyncio.sleep(0.01)
+        stop.set()
+        await processing
+        return ingestor
+
+    return asyncio.run(scenario())
+
+
+def test_batch_failing_before_checkpoint_is_retried():
+    pipeline = _FailingPipeline(checkpointed=False)
+    ingestor = _run_ingestor(pipeline, [["a", "b"], ["c"]])
+    assert pipeline.batches == [["a", "b"], ["c"]]
+    assert ingestor.processed == 3
+    assert ingestor.failed_batches == 1
+
+
+def test_checkpointed_batch_is_resumed_not_retried():
+    pipeline = _FailingPipeline(checkpointed=True)
+    ingestor = _run_ingestor(pipeline, [["a", "b"], ["c"]])
+    assert pipeline.batches == [["c"]]
+    assert pipeline.resumed == 1
+    assert ingestor.processed == 1
+
+
+def test_batch_that_keeps_failing_is_dead_lettered(tmp_path):
+    dead_letter = tmp_path / "dead.jsonl"
+    pipeline = _FailingPipeline(checkpointed=False, failures=3)
+    ingestor = _run_ingestor(pipeline, [["a", "b"], ["c"]], dead_letter)
+    assert pipeline.batches == [["c"]]
+    assert ingestor.failed_batches == 3
+    assert ingestor.dead_lettered == 1
+    [record] = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+    assert record["kind"] == "batch"
+    assert [e.id for e in decode(record["data"])["List[OktaEvent]"]] == ["a", "b"]
+
+
+def test_checkpoint_whose_resume_keeps_failing_is_dead_lettered(tmp_path):
+    dead_letter = tmp_path / "dead.jsonl"
+    pipeline = _FailingPipeline(checkpointed=True, resume_failures=3)
+    ingestor = _run_ingestor(pipeline, [["a", "b"], ["c"]], dead_letter)
+    assert pipeline.resumed == 3
+    assert pipeline.abandoned == 1
+    assert pipeline.batches == [["c"]]
+    assert [json.loads(line)["kind"] for line in dead_letter.read_text().splitlines()] == ["checkpoint"]
+
+
+def _engine(tmp_path):
+    store = SqliteStore(tmp_path / "soc.db")
+    repo = SqliteIncidentsRepo(store)
+    with store.transaction():
+        for i in range(5):
+            store.conn.execute(
+                "INSERT INTO findings (id, finding_type, user_id, created_at, body) VALUES (?, ?, ?, ?, ?)",
+                (f"f-{i}", "failed_login_burst", "alice", 0, "{}"),
+            )
+            repo.save(SecurityIncident(
+                id=f"i-{i}", finding_id=f"f-{i}", user_id="alice", title="t", description="d",
+                severity=Severity.HIGH, risk_score=0.9, created_at=BASE + timedelta(hours=i),
+            ))
+    return SqliteQueryEngine(store)
+
+
+async def _request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    writer.write(head.encode() + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    if headers["Content-Type"].startswith("text/plain"):
+        return int(lines[0].split()[1]), headers, payload.decode()
+    return int(lines[0].split()[1]), headers, json.loads(payload)
+
+
+def _serve(tmp_path, scenario, max_events=10):
+    async def main():
+        pipeline = _FakePipeline()
+        ingestor = PushIngestor(pipeline, EventBuffer(max_events), linger=0)
+        engine = _engine(tmp_path)
+        api = ApiServer(ingestor, engine, max_body_bytes=4096)
+        server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        drained = asyncio.Event()
+        processing = asyncio.create_task(ingestor.run(drained))
+        try:
+            return await scenario(port, api, pipeline)
+        finally:
+            server.close()
+            await server.wait_closed()
+            drained.set()
+            await processing
+            engine.close()
+
+    return asyncio.run(main())
+
+
+def test_pushed_events_are_processed_promptly(tmp_path):
+    async def scenario(port, api, pipeline):
+        body = "\n".join(json.dumps(_flat(i)) for i in ("a", "b")).encode()
+        status, _, payload = await _request(port, "POST", "/v1/events", body)
+        for _ in range(100):
+            if pipeline.batches:
+                break
+            await asyncio.sleep(0.01)
+        return status, payload, pipeline.batches
+
+    status, payload, batches = _serve(tmp_path, scenario)
+    assert status == 202
+    assert payload["accepted"] == 2
+    assert batches == [["a", "b"]]
+
+
+def test_push_backpressure_and_errors(tmp_path):
+    async def scenario(port, api, pipeline):
+        too_many = json.dumps([_flat(str(i)) for i in range(11)]).encode()
+        full = await _request(port, "POST", "/v1/events", too_many)
+        bad = await _request(port, "POST", "/v1/events", b"[1]")
+        big = await _request(port, "POST", "/v1/events", b" " * 5000)
+        api.accepting = False
+        closing = await _request(port, "POST", "/v1/events", json.dumps(_flat("a")).encode())
+        return full, bad, big, closing
+
+    full, bad, big, closing = _serve(tmp_path, scenario)
+    assert full[0] == 429 and full[1]["Retry-After"] == "1"
+    assert bad[0] == 400
+    assert big[0] == 413
+    assert closing[0] == 503
+
+
+def test_incident_pages_follow_cursor(tmp_path):
+    async def scenario(port, api, pipeline):
+        first = await _request(port, "GET", "/v1/incidents?limit=3")
+        second = await _request(port, "GET", f"/v1/incidents?limit=3&cursor={first[2]['next_cursor']}")
+        invalid = await _request(port, "GET", "/v1/incidents?limit=0")
+        missing = await _request(port, "GET", "/v1/nothing")
+        return first, second, invalid, missing
+
+    first, second, invalid, missing = _serve(tmp_path, scenario)
+    assert [i["id"] for i in first[2]["items"]] == ["i-4", "i-3", "i-2"]
+    assert [i["id"] for i in second[2]["items"]] == ["i-1", "i-0"]
+    assert second[2]["next_cursor"] is None
+    assert invalid[0] == 400
+    assert missing[0] == 404
+
+
+def test_metrics_endpoint_counts_requests_and_pushes(tmp_path):
+    async def scenario(port, api, pipeline):
+        await _request(port, "POST", "/v1/events", json.dumps(_flat("a")).encode())
+        await _request(port, "GET", "/v1/incidents?limit=1")
+        return await _request(port, "GET", "/metrics")
+
+    status, headers, text = _serve(tmp_path, scenario)
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert 'push_events_total{result="accepted"} 1' in text
+    assert 'api_requests_total{route="/v1/incidents",status="200"} 1' in text
@@ -0,0 +1,151 @@
+"""Tests for background persistence of pipeline outputs."""
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+import pytest
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.models import DetectionFinding, FindingType, RiskScore, Severity
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.storage.backends import Repositories
+from okta_soc.storage.background import BackgroundWriter
+
+
+def _finding(finding_id: str) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=FindingType.FAILED_LOGIN_BURST,
+        description="burst",
+        okta_event_ids=["e1"],
+        user_id="alice",
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def _repos() -> Repositories:
+    return Repositories(
+        findings=MagicMock(),
+        incidents=MagicMock(),
+        plans=MagicMock(),
+        commands=MagicMock(),
+        escalations=MagicMock(),
+        risks=MagicMock(),
+    )
+
+
+def test_writer_saves_published_records_and_skips_others():
+    repos = _repos()
+
+    async def scenario():
+        writer = BackgroundWriter(repos)
+        writer.start()
+        await writer.publish({
+            "List[DetectionFinding]": [_finding("f-1"), _finding("f-2")],
+            "RiskScore": RiskScore(
+                finding_id="f-1", severity=Severity.LOW,
+                likelihood=0.1, impact=0.1, score=0.1, rationale="r",
+            ),
+            "List[str]": ["not a record"],
+        })
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [c.args[0].id for c in repos.findings.save.call_args_list] == ["f-1", "f-2"]
+    assert [c.args[0].finding_id for c in repos.risks.save.call_args_list] == ["f-1"]
+    assert writer.metrics() == {"written": 3, "queued": 0}
+
+
+def test_full_queue_applies_backpressure():
+    repos = _repos()
+    release = threading.Event()
+    repos.findings.save.side_effect = lambda f: release.wait(5)
+
+    async def scenario():
+        writer = BackgroundWriter(repos, max_queue=1, batch_size=1)
+        writer.start()
+        await writer.publish({"DetectionFinding": _finding("f-1")})
+        await asyncio.sleep(0.05)  # writer picks f-1 up and blocks on disk
+        await writer.publish({"DetectionFinding": _finding("f-2")})  # fills the queue
+        third = asyncio.create_task(writer.publish({"DetectionFinding": _finding("f-3")}))
+        await asyncio.sleep(0.05)
+        blocked = not third.done()
+        release.set()
+        await third
+        await writer.close()
+        return blocked
+
+    assert asyncio.run(scenario())
+    assert repos.findings.save.call_count == 3
+
+
+def test_write_failure_surfaces_on_close():
+    repos = _repos()
+    repos.findings.save.side_effect = OSError("disk full")
+
+    async def scenario():
+        writer = BackgroundWriter(repos)
+        writer.start()
+        await writer.publish({"DetectionFinding": _finding("f-1")})
+        await writer.close()
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(scenario())
+
+
+class Detector(BaseAgent):
+    contract = AgentContract(
+        name="detector_agent",
+        description="Detects things",
+        consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"],
+        phase_hint="ingest",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"List[DetectionFinding]": [_finding(e) for e in input_data["List[OktaEvent]"]]}
+
+
+class Echo(BaseAgent):
+    contract = AgentContract(
+        name="echo_agent",
+        description="Echoes findings",
+        consumes=["DetectionFinding"],
+        produces=["Echo"],
+        phase_hint="analysis",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"Echo": input_data["DetectionFinding"].id}
+
+
+def test_orchestrator_publishes_outputs_as_produced():
+    registry = AgentRegistry()
+    registry.register(Detector())
+    registry.register(Echo())
+
+    async def route(ctx):
+        return RoutePlan(steps=[
+            RouteStep(agent_name="detector_agent", reason="detect"),
+            RouteStep(agent_name="echo_agent", reason="echo", iterate_over="List[DetectionFinding]"),
+        ])
+
+    router = MagicMock()
+    router.run = route
+    sink = MagicMock()
+    published = []
+
+    async def publish(outputs):
+        published.append(outputs)
+
+    sink.publish = publish
+    orchestrator = Orchestrator(router=router, registry=registry, sink=sink)
+    asyncio.run(orchestrator.run(initial_data={"List[OktaEvent]": ["f-1", "f-2"]}, metadata={}))
+
+    assert [list(p) for p in published] == [["List[DetectionFinding]"], ["Echo"], ["Echo"]]
+    assert sorted(p["Echo"] for p in published[1:]) == ["f-1", "f-2"]
@@ -0,0 +1,143 @@
+"""Tests for micro-batch agent execution."""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, MagicMock
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.escalation_agent import EscalationAgent
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.agents.risk_agent import LLMRiskAgent
+from okta_soc.core.models import DetectionFinding, FindingType, SecurityIncident, Severity
+from okta_soc.core.router_models import RoutePlan, RouteStep
+
+
+class BatchScorer(BaseAgent):
+    contract = AgentContract(
+        name="risk_agent",
+        description="Scores risk in batches",
+        consumes=["DetectionFinding"],
+        produces=["RiskScore"],
+        phase_hint="analysis",
+        max_batch_size=4,
+        preferred_batch_size=3,
+    )
+
+    def __init__(self):
+        self.batch_sizes: List[int] = []
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.batch_sizes.append(1)
+        return {"RiskScore": {"finding_id": input_data["DetectionFinding"]["id"]}}
+
+    async def run_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.batch_sizes.append(len(batch))
+        # Finish later chunks first to prove results are re-ordered per item
+        await asyncio.sleep(0.001 * (10 - len(self.batch_sizes)))
+        return [{"RiskScore": {"finding_id": b["DetectionFinding"]["id"]}} for b in batch]
+
+
+def test_orchestrator_chunks_items_and_keeps_item_order():
+    registry = AgentRegistry()
+    scorer = BatchScorer()
+    registry.register(scorer)
+
+    async def route(ctx):
+        return RoutePlan(steps=[
+            RouteStep(agent_name="risk_agent", reason="score", iterate_over="List[DetectionFinding]"),
+        ])
+
+    router = MagicMock()
+    router.run = route
+    findings = [{"id": f"f-{i}"} for i in range(7)]
+    ctx = asyncio.run(Orchestrator(router=router, registry=registry).run(
+        initial_data={"List[DetectionFinding]": findings},
+        metadata={},
+    ))
+
+    assert sorted(scorer.batch_sizes) == [1, 3, 3]
+    assert [r["finding_id"] for r in ctx.data["List[RiskScore]"]] == [f["id"] for f in findings]
+
+
+def _finding(finding_id: str, finding_type: FindingType, count: int) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=finding_type,
+        description="test",
+        okta_event_ids=["e1"],
+        user_id="alice",
+        created_at=datetime.now(timezone.utc),
+        metadata={"count": count},
+    )
+
+
+def _risk(finding_id: str, score: float) -> Dict[str, Any]:
+    return {
+        "finding_id": finding_id,
+        "severity": "high" if score >= 0.6 else "low",
+        "likelihood": score,
+        "impact": score,
+        "score": score,
+        "rationale": "r",
+    }
+
+
+def test_risk_agent_scores_a_batch_with_one_call():
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.return_value = {"results": [_risk("f-1", 0.9), _risk("f-2", 0.2)]}
+    agent = LLMRiskAgent(llm)
+
+    outputs = asyncio.run(agent.run_batch([
+        {"DetectionFinding": _finding("f-1", FindingType.IMPOSSIBLE_TRAVEL, 1)},
+        {"DetectionFinding": _finding("f-2", FindingType.FAILED_LOGIN_BURST, 5)},
+    ]))
+
+    assert llm.chat_json.call_count == 1
+    assert [o["RiskScore"].finding_id for o in outputs] == ["f-1", "f-2"]
+    assert "SecurityIncident" in outputs[0]
+    assert "SecurityIncident" not in outputs[1]
+
+
+def test_risk_agent_rescores_findings_dropped_from_batch():
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.side_effect = [
+        {"results": [_risk("f-1", 0.9)]},
+        {"severity": "low", "likelihood": 0.1, "impact": 0.1, "score": 0.1, "rationale": "r"},
+    ]
+    agent = LLMRiskAgent(llm)
+
+    outputs = asyncio.run(agent.run_batch([
+        {"DetectionFinding": _finding("f-1", FindingType.IMPOSSIBLE_TRAVEL, 1)},
+        {"DetectionFinding": _finding("f-2", FindingType.FAILED_LOGIN_BURST, 5)},
+    ]))
+
+    assert llm.chat_json.call_count == 2
+    assert outputs[1]["RiskScore"].finding_id == "f-2"
+    assert outputs[1]["RiskScore"].score == 0.1
+
+
+def test_escalation_batch_sends_one_digest(capsys):
+    def incident(i: int, severity: Severity) -> SecurityIncident:
+        return SecurityIncident(
+            id=f"inc-{i}",
+            finding_id=f"f-{i}",
+            title="Incident from impossible_travel",
+            description="travel",
+            severity=severity,
+            risk_score=0.9,
+            created_at=datetime.now(timezone.utc),
+        )
+
+    outputs = asyncio.run(EscalationAgent().run_batch([
+        {"SecurityIncident": incident(1, Severity.CRITICAL)},
+        {"SecurityIncident": incident(2, Severity.LOW)},
+        {"SecurityIncident": incident(3, Severity.HIGH)},
+    ]))
+
+    assert [o["EscalationResult"].sent for o in outputs] == [True, False, True]
+    printed = capsys.readouterr().out
+    assert printed.count("[SIMULATED SLACK]") == 1
+    assert "2 incidents need attention" in printed
@@ -0,0 +1,121 @@
+"""Tests for checkpointing and resuming orchestrator runs."""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+import pytest
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.checkpoint import Checkpoint
+from okta_soc.core.models import DetectionFinding, FindingType
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.core.serialization import decode, encode
+
+
+class Detector(BaseAgent):
+    contract = AgentContract(
+        name="detector_agent",
+        description="Detects things",
+        consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"],
+        phase_hint="ingest",
+    )
+
+    def __init__(self):
+        self.runs = 0
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.runs += 1
+        return {"List[DetectionFinding]": [{"id": f"f-{e['id']}"} for e in input_data["List[OktaEvent]"]]}
+
+
+class FlakyRisk(BaseAgent):
+    contract = AgentContract(
+        name="risk_agent",
+        description="Scores risk",
+        consumes=["DetectionFinding"],
+        produces=["RiskScore"],
+        phase_hint="analysis",
+    )
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.scored = []
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        finding = input_data["DetectionFinding"]
+        if finding["id"] == self.fail_on:
+            raise RuntimeError("LLM timed out")
+        self.scored.append(finding["id"])
+        return {"RiskScore": {"finding_id": finding["id"], "score": 0.8}}
+
+
+PLAN = RoutePlan(steps=[
+    RouteStep(agent_name="detector_agent", reason="detect"),
+    RouteStep(agent_name="risk_agent", reason="score", iterate_over="List[DetectionFinding]"),
+])
+
+
+def _orchestrator(checkpoint, detector, risk):
+    registry = AgentRegistry()
+    registry.register(detector)
+    registry.register(risk)
+
+    async def route(ctx):
+        return PLAN
+
+    router = MagicMock()
+    router.run = route
+    return Orchestrator(router=router, registry=registry, checkpoint=checkpoint)
+
+
+def test_encode_decode_round_trips_models():
+    finding = DetectionFinding(
+        id="f-1",
+        finding_type=FindingType.IMPOSSIBLE_TRAVEL,
+        description="travel",
+        okta_event_ids=["e1"],
+        user_id="alice",
+        created_at=datetime.now(timezone.utc),
+    )
+    restored = decode(encode({"List[DetectionFinding]": [finding], "plain": {"a": 1}}))
+    assert restored["List[DetectionFinding]"] == [finding]
+    assert restored["plain"] == {"a": 1}
+
+
+def test_resume_skips_completed_steps_and_items(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    events = [{"id": "e1"}, {"id": "e2"}, {"id": "e3"}]
+
+    crashed = _orchestrator(Checkpoint(path), Detector(), FlakyRisk(fail_on="f-e2"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(crashed.run(initial_data={"List[OktaEvent]": events}, metadata={"source": "test"}))
+
+    detector, risk = Detector(), FlakyRisk()
+    resumed = _orchestrator(Checkpoint(path), detector, risk)
+    ctx = asyncio.run(resumed.resume())
+
+    assert detector.runs == 0
+    assert risk.scored == ["f-e2"]
+    assert [r["finding_id"] for r in ctx.data["List[RiskScore]"]] == ["f-e1", "f-e2", "f-e3"]
+    assert [h.agent for h in ctx.history] == ["detector_agent", "risk_agent"]
+    assert ctx.metadata == {"source": "test"}
+
+
+def test_resume_ignores_torn_trailing_record(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    orchestrator = _orchestrator(Checkpoint(path), Detector(), FlakyRisk())
+    asyncio.run(orchestrator.run(initial_data={"List[OktaEvent]": [{"id": "e1"}]}, metadata={}))
+    with path.open("a") as f:
+        f.write('{"kind":"item","step":1,')
+
+    state = Checkpoint(path).load()
+    assert sorted(state.steps) == [0, 1]
+
+
+def test_resume_without_checkpoint_returns_none(tmp_path):
+    orchestrator = _orchestrator(Checkpoint(tmp_path / "missing.jsonl"), Detector(), FlakyRisk())
+    assert asyncio.run(orchestrator.resume()) is None
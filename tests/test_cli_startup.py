@@ -0,0 +1,48 @@
+"""Startup cost of read-only CLI commands, measured with python -X importtime."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import okta_soc
+
+SRC_DIR = Path(okta_soc.__file__).resolve().parent.parent
+
+# Importing openai alone costs more than this; show-all should stay well under it.
+IMPORT_BUDGET_US = 500_000
+
+# Modules only the pipeline run needs.
+HEAVY_MODULES = ("openai", "okta_soc.ingest.pipeline", "okta_soc.agents", "okta_soc.storage.repositories")
+
+
+def _importtime(tmp_path: Path, argv) -> Dict[str, int]:
+    """Run the CLI in a fresh interpreter; return module -> cumulative import time (us)."""
+    script = f"import sys; sys.argv = {['okta-soc', *argv]!r}; from okta_soc.interface.cli import main; main()"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # top-level imports only, so nothing is counted twice
+            times[name.strip()] = int(cumulative)
+        else:
+            times.setdefault(name.strip(), 0)
+    return times
+
+
+def test_show_all_skips_pipeline_imports_and_stays_in_budget(tmp_path):
+    times = _importtime(tmp_path, ["show-all", "--limit", "1"])
+    loaded = [m for m in times if m.split(".")[0] == "openai" or m.startswith(HEAVY_MODULES)]
+    assert loaded == []
+    assert sum(times.values()) < IMPORT_BUDGET_US
+
+
+def test_show_all_does_not_create_data_dir(tmp_path):
+    _importtime(tmp_path, ["show-all", "--section", "findings"])
+    assert not (tmp_path / "data").exists()
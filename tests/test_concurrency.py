@@ -0,0 +1,123 @@
+"""Tests for the adaptive LLM concurrency limiter."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from okta_soc.core.concurrency import AdaptiveLimiter
+from okta_soc.core.llm import LLMClient
+
+
+def test_limit_grows_while_latency_is_stable():
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=8)
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(0.1)
+    assert limiter.metrics()["limit"] > 2
+
+
+def test_limit_backs_off_when_p90_latency_climbs():
+    limiter = AdaptiveLimiter(initial_limit=8, min_samples=5)
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(0.1)
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(1.0)
+    assert limiter.metrics()["limit"] < 8
+
+
+def test_limit_backs_off_on_errors():
+    limiter = AdaptiveLimiter(initial_limit=8)
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("server overloaded")
+    metrics = limiter.metrics()
+    assert metrics["limit"] == 4
+    assert metrics["errors"] == 1
+    assert metrics["in_flight"] == 0
+
+
+def test_one_fast_call_does_not_pin_the_baseline():
+    limiter = AdaptiveLimiter(initial_limit=8, min_samples=5)
+    limiter.acquire()
+    limiter.release(0.001)
+    for _ in range(30):
+        limiter.acquire()
+        limiter.release(0.1)
+    assert limiter.metrics()["limit"] > 8
+    assert limiter.baseline == pytest.approx(0.1, rel=0.2)
+
+
+def test_interrupted_call_frees_its_slot_without_backing_off():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    with pytest.raises(KeyboardInterrupt):
+        with limiter.slot():
+            raise KeyboardInterrupt
+    metrics = limiter.metrics()
+    assert metrics["in_flight"] == 0
+    assert metrics["errors"] == 0
+    limiter.acquire()  # would block forever had the slot leaked
+
+
+def test_acquire_blocks_at_limit():
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def worker():
+        limiter.acquire()
+        acquired.set()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    time.sleep(0.05)
+    assert not acquired.is_set()
+    limiter.release(0.01)
+    t.join(timeout=1)
+    assert acquired.is_set()
+
+
+def test_metrics_expose_limit_and_latency():
+    limiter = AdaptiveLimiter()
+    with limiter.slot():
+        pass
+    metrics = limiter.metrics()
+    for key in ("limit", "in_flight", "p50_latency_seconds", "p90_latency_seconds"):
+        assert key in metrics
+
+
+def test_llm_calls_waiting_for_a_slot_leave_the_default_executor_free():
+    llm = LLMClient(base_url="http://localhost:1/v1", api_key="k", model="m",
+                    limiter=AdaptiveLimiter(initial_limit=1, max_limit=4))
+    release = threading.Event()
+    threads = []
+
+    def create(**kwargs):
+        threads.append(threading.current_thread().name)
+        release.wait(5)
+        response = MagicMock()
+        response.choices[0].message.content = '{"ok": true}'
+        response.usage = None
+        return response
+
+    llm.client = MagicMock()
+    llm.client.chat.completions.create.side_effect = create
+
+    async def scenario():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        calls = [asyncio.ensure_future(llm.achat_json("s", "u")) for _ in range(4)]
+        # One call holds the only slot and three wait for it, yet other
+        # blocking work still gets a thread
+        assert await asyncio.wait_for(asyncio.to_thread(lambda: "written"), 1) == "written"
+        release.set()
+        return await asyncio.gather(*calls)
+
+    try:
+        assert asyncio.run(scenario()) == [{"ok": True}] * 4
+    finally:
+        llm.close()
+    assert all(name.startswith("llm") for name in threads)
@@ -0,0 +1,103 @@
+"""Tests for clustering findings into one composite finding per actor episode."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.correlation_agent import CorrelationAgent
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.models import DetectionFinding, FindingType
+from okta_soc.core.router_models import RoutePlan, RouteStep
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+def _finding(finding_id: str, kind: FindingType, user: str, minute: int) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=kind,
+        description=f"{kind.value} for {user}.",
+        okta_event_ids=[f"{finding_id}-e1", f"{finding_id}-e2"],
+        user_id=user,
+        created_at=T0 + timedelta(minutes=minute),
+        metadata={"count": 2},
+    )
+
+
+def test_findings_of_one_episode_become_one_composite():
+    burst = _finding("f1", FindingType.FAILED_LOGIN_BURST, "alice", 0)
+    travel = _finding("f2", FindingType.IMPOSSIBLE_TRAVEL, "alice", 7)
+    other = _finding("f3", FindingType.FAILED_LOGIN_BURST, "bob", 3)
+    nobody = _finding("f4", FindingType.OTHER, "x", 1).model_copy(update={"user_id": None})
+
+    result = CorrelationAgent(gap=timedelta(minutes=30)).correlate([travel, other, nobody, burst])
+
+    # Ordered by time, unattributed findings last
+    assert result[0] is other
+    assert result[2] is nobody
+    composite = result[1]
+    assert composite.finding_type == FindingType.CORRELATED
+    assert composite.user_id == "alice"
+    assert composite.created_at == travel.created_at
+    assert composite.okta_event_ids == ["f1-e1", "f1-e2", "f2-e1", "f2-e2"]
+    assert composite.metadata["finding_types"] == "failed_login_burst+impossible_travel"
+    assert composite.metadata["member_finding_ids"] == ["f1", "f2"]
+    assert composite.metadata["span_seconds"] == 420
+
+
+def test_gap_splits_episodes():
+    findings = [
+        _finding("f1", FindingType.FAILED_LOGIN_BURST, "alice", 0),
+        _finding("f2", FindingType.FAILED_LOGIN_BURST, "alice", 20),
+        _finding("f3", FindingType.IMPOSSIBLE_TRAVEL, "alice", 40),
+        _finding("f4", FindingType.IMPOSSIBLE_TRAVEL, "alice", 90),
+    ]
+    result = CorrelationAgent(gap=timedelta(minutes=20)).correlate(findings)
+    assert [f.metadata.get("member_finding_ids", [f.id]) for f in result] == [["f1", "f2", "f3"], ["f4"]]
+
+
+class _Detect(BaseAgent):
+    contract = AgentContract(
+        name="detect", description="d", consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"], phase_hint="ingest",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"List[DetectionFinding]": [
+            _finding("f1", FindingType.FAILED_LOGIN_BURST, "alice", 0),
+            _finding("f2", FindingType.IMPOSSIBLE_TRAVEL, "alice", 5),
+            _finding("f3", FindingType.FAILED_LOGIN_BURST, "bob", 0),
+        ]}
+
+
+class _Sink:
+    def __init__(self):
+        self.published: List[str] = []
+
+    async def publish(self, outputs: Dict[str, Any]) -> None:
+        self.published.extend(f.id for f in outputs.get("List[DetectionFinding]", []))
+
+
+def test_orchestrator_does_not_republish_passed_through_findings():
+    registry = AgentRegistry()
+    registry.register(_Detect())
+    registry.register(CorrelationAgent())
+    router = MagicMock()
+
+    async def route(ctx):
+        return RoutePlan(steps=[
+            RouteStep(agent_name="detect", reason="r"),
+            RouteStep(agent_name="correlation_agent", reason="r"),
+        ])
+
+    router.run = route
+    sink = _Sink()
+    orchestrator = Orchestrator(router=router, registry=registry, sink=sink)
+    context = asyncio.run(orchestrator.run(initial_data={"List[OktaEvent]": []}, metadata={}))
+
+    findings = context.data["List[DetectionFinding]"]
+    assert [f.user_id for f in findings] == ["bob", "alice"]
+    # Detector findings once each, then only the new composite
+    assert sink.published == ["f1", "f2", "f3", findings[1].id]
@@ -0,0 +1,100 @@
+"""Tests for the per-user entity timeline index."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from okta_soc.agents.command_agent import CommandAgent
+from okta_soc.core.models import (
+    CommandSuggestion,
+    DetectionFinding,
+    EscalationResult,
+    FindingType,
+    OktaEvent,
+    ResponsePlan,
+    ResponseStep,
+    SecurityIncident,
+    Severity,
+)
+from okta_soc.storage.backends import Repositories
+from okta_soc.storage.background import BackgroundWriter
+from okta_soc.storage.entity_index import EntityIndex
+
+T0 = datetime(2025, 11, 12, 18, 0, tzinfo=timezone.utc)
+
+
+def _lineage():
+    event = OktaEvent(
+        id="e-1", event_type="user.session.start", actor_id="alice", actor_type="User",
+        target_id=None, ip_address="1.2.3.4", user_agent=None, outcome="FAILURE", timestamp=T0,
+    )
+    finding = DetectionFinding(
+        id="f-1", finding_type=FindingType.FAILED_LOGIN_BURST, description="burst",
+        okta_event_ids=["e-1"], user_id="alice", created_at=T0 + timedelta(minutes=1),
+    )
+    incident = SecurityIncident(
+        id="i-1", finding_id="f-1", title="t", description="d", severity=Severity.HIGH,
+        risk_score=0.8, created_at=T0 + timedelta(minutes=2),
+    )
+    plan = ResponsePlan(
+        incident_id="i-1", overall_goal="contain",
+        steps=[ResponseStep(step_id="lock_account", description="d", rationale="r")],
+    )
+    command = CommandSuggestion(
+        step_id="lock_account", incident_id="i-1", description="d", command="c", system="okta_api",
+    )
+    escalation = EscalationResult(incident_id="i-1", channel="#soc", message="m", sent=True)
+    return [event, finding, incident, plan, command, escalation]
+
+
+def test_timeline_links_the_whole_lineage(tmp_path):
+    index = EntityIndex(tmp_path / "index.db", clock=lambda: T0 + timedelta(minutes=5))
+    assert index.add(_lineage()) == 6
+
+    entries = index.timeline("alice")
+    assert [(e.kind, e.ref, e.parents) for e in entries] == [
+        ("event", "e-1", []),
+        ("finding", "f-1", ["e-1"]),
+        ("incident", "i-1", ["f-1"]),
+        ("command", "i-1:lock_account", ["i-1"]),
+        ("escalation", "i-1", ["i-1"]),
+        ("plan", "i-1", ["i-1"]),
+    ]
+    assert index.timeline("bob") == []
+
+
+def test_timeline_window_and_kinds(tmp_path):
+    index = EntityIndex(tmp_path / "index.db", clock=lambda: T0 + timedelta(minutes=5))
+    index.add(_lineage())
+
+    window = index.timeline("alice", since=T0 + timedelta(minutes=1), until=T0 + timedelta(minutes=3))
+    assert [e.kind for e in window] == ["finding", "incident"]
+    assert [e.ref for e in index.timeline("alice", kinds=["incident"])] == ["i-1"]
+
+
+def test_command_agent_links_commands_to_incident():
+    plan = ResponsePlan(
+        incident_id="i-9", overall_goal="contain",
+        steps=[ResponseStep(step_id="revoke_sessions", description="d", rationale="r")],
+    )
+    out = asyncio.run(CommandAgent("https://example.okta.com").run({"ResponsePlan": plan}))
+    assert [c.incident_id for c in out["List[CommandSuggestion]"]] == ["i-9"]
+
+
+def test_background_writer_feeds_index(tmp_path):
+    repos = Repositories(
+        findings=MagicMock(), incidents=MagicMock(), plans=MagicMock(),
+        commands=MagicMock(), escalations=MagicMock(),
+    )
+    index = EntityIndex(tmp_path / "index.db")
+
+    async def scenario():
+        writer = BackgroundWriter(repos, index=index)
+        writer.start()
+        await writer.publish({"List[OktaEvent]": _lineage()[:1]})
+        await writer.publish({"List[Anything]": _lineage()[1:]})
+        await writer.close()
+
+    asyncio.run(scenario())
+    assert len(index.timeline("alice")) == 6
+    repos.commands.save.assert_called_once()
+    assert repos.commands.save.call_args.args[0] == "i-1"
@@ -0,0 +1,62 @@
+"""Tests for the slotted internal event type and lean ingest."""
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.core.events import Event, as_event
+from okta_soc.core.models import OktaEvent
+from okta_soc.core.serialization import decode, encode
+from okta_soc.ingest.okta_client import event_from_okta
+from okta_soc.ingest.push import InvalidEvents, parse_events
+
+T0 = datetime(2025, 11, 12, 18, tzinfo=timezone.utc)
+
+RECORD = {
+    "uuid": "u-1",
+    "eventType": "user.session.start",
+    "published": "2025-11-12T18:00:00.000Z",
+    "actor": {"id": "00u1", "type": "User"},
+    "client": {"geographicalContext": {"country": "Portugal", "geolocation": {"lat": 38.7, "lon": -9.1}}},
+    "outcome": {"result": "FAILURE"},
+}
+
+
+def test_ingest_builds_slotted_events_and_lean_drops_raw():
+    event = event_from_okta(RECORD)
+    assert isinstance(event, Event)
+    assert not hasattr(event, "__dict__")
+    assert event.raw is RECORD
+    assert event_from_okta(RECORD, lean=True).raw is None
+    assert parse_events(json.dumps([RECORD]).encode(), lean=True)[0].raw is None
+
+
+def test_ingest_still_rejects_malformed_records():
+    with pytest.raises(TypeError):
+        event_from_okta({**RECORD, "uuid": 7})
+    with pytest.raises(TypeError):
+        event_from_okta({**RECORD, "published": 1731434400})
+    with pytest.raises(InvalidEvents):
+        parse_events(json.dumps([{**RECORD, "actor": {"id": ["x"]}}]).encode())
+
+
+def test_events_round_trip_through_checkpoint_encoding():
+    event = event_from_okta(RECORD, lean=True)
+    restored = decode(json.loads(json.dumps(encode([event]))))
+    assert restored == [event]
+    assert as_event(event.to_model()) == event
+
+
+def test_detector_agent_accepts_models_and_dicts():
+    events = [
+        OktaEvent(id=f"e{i}", event_type="user.session.start", actor_id="alice", actor_type="User",
+                  target_id=None, ip_address=None, user_agent=None, outcome="FAILURE", timestamp=T0)
+        for i in range(5)
+    ]
+    as_dicts = [e.model_dump(mode="json") for e in events]
+    from_models = asyncio.run(DetectorAgent().run({"List[OktaEvent]": events}))
+    from_dicts = asyncio.run(DetectorAgent().run({"List[OktaEvent]": as_dicts}))
+    assert [f.id for f in from_models["List[DetectionFinding]"]] == [f.id for f in from_dicts["List[DetectionFinding]"]]
+    assert len(from_models["List[DetectionFinding]"]) == 1
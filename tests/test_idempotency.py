@@ -0,0 +1,198 @@
+"""Tests for content-addressed ids and idempotent re-processing."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.core.config import Settings
+from okta_soc.core.ids import finding_id, incident_id
+from okta_soc.core.models import OktaEvent, RiskScore, SecurityIncident, Severity
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.detectors.failed_login_burst import FailedLoginBurstDetector
+from okta_soc.ingest.pipeline import Pipeline
+from okta_soc.storage.query import JsonlQueryEngine, Query
+from okta_soc.storage.repositories import FindingsRepo, IncidentsRepo, RisksRepo
+from okta_soc.storage.sqlite_repositories import (
+    SqliteFindingsRepo, SqliteIncidentsRepo, SqliteRisksRepo, SqliteStore,
+)
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+def _failure(i: int, minute: float) -> OktaEvent:
+    return OktaEvent(
+        id=f"e{i}", event_type="user.session.start", actor_id="alice", actor_type="User",
+        target_id=None, ip_address=None, user_agent=None, outcome="FAILURE",
+        timestamp=T0 + timedelta(minutes=minute),
+    )
+
+
+EVENTS = [_failure(i, i) for i in range(5)]
+
+
+def test_ids_are_stable_across_runs():
+    first = FailedLoginBurstDetector().detect(EVENTS)
+    again = FailedLoginBurstDetector().detect(list(reversed(EVENTS)))
+    assert [f.id for f in first] == [f.id for f in again]
+    assert first[0].id == finding_id("failed_login_burst", "alice", [e.id for e in EVENTS])
+    assert incident_id(first[0].id) == incident_id(again[0].id) != first[0].id
+
+
+def test_jsonl_findings_are_written_once(tmp_path):
+    finding = FailedLoginBurstDetector().detect(EVENTS)[0]
+    repo = FindingsRepo(tmp_path / "findings")
+    assert repo.known_ids([finding]) == set()
+    repo.save(finding)
+    repo.save(finding)
+    assert len(list(repo.read_lines())) == 1
+
+    # A later process finds it through the segment index, and does not write it again
+    again = FindingsRepo(tmp_path / "findings")
+    assert again.known_ids([finding]) == {finding.id}
+    again.save(finding)
+    assert len(list(again.read_lines())) == 1
+
+
+def test_incidents_created_from_a_finding_get_its_incident_id(tmp_path):
+    finding = FailedLoginBurstDetector().detect(EVENTS)[0]
+    risk = _risk(finding.id)
+    incident = IncidentsRepo(tmp_path / "incidents").create_from_finding(finding, risk)
+    assert incident.id == incident_id(finding.id)
+
+    store = SqliteStore(tmp_path / "soc.db")
+    with store.transaction():
+        SqliteFindingsRepo(store).save(finding)
+        assert SqliteIncidentsRepo(store).create_from_finding(finding, risk).id == incident.id
+    store.close()
+
+
+def test_sqlite_known_ids(tmp_path):
+    finding = FailedLoginBurstDetector().detect(EVENTS)[0]
+    store = SqliteStore(tmp_path / "soc.db")
+    repo = SqliteFindingsRepo(store)
+    assert repo.known_ids([finding]) == set()
+    with store.transaction():
+        repo.save(finding)
+    assert repo.known_ids([finding]) == {finding.id}
+    store.close()
+
+
+def test_readers_keep_the_latest_incident_version(tmp_path):
+    incident = SecurityIncident(
+        id="i-1", finding_id="f1", user_id="alice", title="t", description="d",
+        severity=Severity.MEDIUM, risk_score=0.5, created_at=T0,
+    )
+    repo = IncidentsRepo(tmp_path / "incidents")
+    repo.save(incident)
+    repo.save(incident.model_copy(update={"severity": Severity.CRITICAL}))
+
+    assert [i.severity for i in repo.load_all()] == [Severity.CRITICAL]
+    assert [i.severity for i in JsonlQueryEngine(tmp_path).iter(Query())] == [Severity.CRITICAL]
+
+
+def test_detector_agent_drops_findings_already_stored(tmp_path):
+    repo = FindingsRepo(tmp_path / "findings")
+    for finding in FailedLoginBurstDetector().detect(EVENTS):
+        repo.save(finding)
+
+    agent = DetectorAgent(known=FindingsRepo(tmp_path / "findings").known_ids)
+    result = asyncio.run(agent.run({"List[OktaEvent]": EVENTS}))
+    assert result["List[DetectionFinding]"] == []
+
+
+def _risk(finding_id: str) -> RiskScore:
+    return RiskScore(
+        finding_id=finding_id, severity=Severity.HIGH, likelihood=0.9, impact=0.9, score=0.9, rationale="r",
+    )
+
+
+def test_only_scored_findings_are_known(tmp_path):
+    finding = FailedLoginBurstDetector().detect(EVENTS)[0]
+    FindingsRepo(tmp_path / "findings").save(finding)
+    risks = RisksRepo(tmp_path / "risks")
+    assert risks.known_ids([finding]) == set()
+    risks.save(_risk(finding.id))
+    assert RisksRepo(tmp_path / "risks").known_ids([finding]) == {finding.id}
+
+    store = SqliteStore(tmp_path / "soc.db")
+    with store.transaction():
+        SqliteFindingsRepo(store).save(finding)
+    repo = SqliteRisksRepo(store)
+    assert repo.known_ids([finding]) == set()
+    with store.transaction():
+        repo.save(_risk(finding.id))
+    assert repo.known_ids([finding]) == {finding.id}
+    store.close()
+
+
+def _pipeline(score, correlate: bool = False) -> Pipeline:
+    pipeline = Pipeline(Settings())
+
+    async def route(context):
+        steps = [RouteStep(agent_name="detector_agent", reason="r")]
+        if correlate:
+            steps.append(RouteStep(agent_name="correlation_agent", reason="r"))
+        steps.append(RouteStep(agent_name="risk_agent", reason="r", iterate_over="List[DetectionFinding]"))
+        return RoutePlan(steps=steps)
+
+    pipeline.router.run = route
+    pipeline.llm.chat_json = score
+    return pipeline
+
+
+def _process(pipeline: Pipeline, events=EVENTS) -> None:
+    async def scenario():
+        await pipeline.start()
+        try:
+            await pipeline.process(list(events), {"source": "test"})
+        finally:
+            await pipeline.close()
+
+    asyncio.run(scenario())
+
+
+def test_findings_of_a_run_that_failed_while_scoring_are_scored_by_the_next(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # every data/ path of the default settings
+
+    def unavailable(system_prompt, user_prompt):
+        raise ConnectionError("LLM unavailable")
+
+    with pytest.raises(ConnectionError):
+        _process(_pipeline(unavailable))
+
+    def score(system_prompt, user_prompt):
+        return {"severity": "high", "likelihood": 0.9, "impact": 0.9, "score": 0.9, "rationale": "r"}
+
+    rerun = _pipeline(score)
+    _process(rerun)
+    assert rerun.metrics.get("detector_known_findings_total").value() == 0
+    assert len(rerun.repos.incidents.load_all()) == 1
+
+    # Once scored, the same window is not analyzed again
+    again = _pipeline(score)
+    _process(again)
+    assert again.metrics.get("detector_known_findings_total").value() == 1
+    assert len(again.repos.incidents.load_all()) == 1
+
+
+def test_a_correlated_episode_is_not_scored_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Six failures in six minutes: two overlapping bursts, correlated into one episode
+    events = [_failure(i, i) for i in range(6)]
+    calls = []
+
+    def score(system_prompt, user_prompt):
+        calls.append(user_prompt)
+        return {"severity": "high", "likelihood": 0.9, "impact": 0.9, "score": 0.9, "rationale": "r"}
+
+    first = _pipeline(score, correlate=True)
+    _process(first, events)
+    assert len(calls) == 1
+    assert [i.metadata["finding_type"] for i in first.repos.incidents.load_all()] == ["correlated"]
+
+    again = _pipeline(score, correlate=True)
+    _process(again, events)
+    assert len(calls) == 1
+    assert again.metrics.get("correlation_known_findings_total").value() == 1
+    assert len(again.repos.incidents.load_all()) == 1
@@ -0,0 +1,91 @@
+"""Tests for the buffered JSONL unit-of-work writer."""
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from okta_soc.core.models import DetectionFinding, FindingType
+from okta_soc.storage.repositories import FindingsRepo, JsonlStore
+
+
+def _finding(finding_id: str) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=FindingType.FAILED_LOGIN_BURST,
+        description="burst",
+        okta_event_ids=["e1"],
+        user_id="alice",
+        created_at=datetime(2025, 11, 12, tzinfo=timezone.utc),
+    )
+
+
+def _ids(path):
+    return [json.loads(line)["id"] for line in path.read_text().splitlines()]
+
+
+def _repo_ids(repo):
+    return [json.loads(line)["id"] for line in repo.read_lines()]
+
+
+def test_transaction_writes_each_file_once(tmp_path):
+    store = JsonlStore(tmp_path)
+    repo = FindingsRepo(tmp_path / "findings", store=store)
+    repo.save(_finding("f-0"))
+
+    real_open = type(tmp_path).open
+    opened = []
+
+    def counting_open(self, mode="r", *args, **kwargs):
+        opened.append((self.name, mode))
+        return real_open(self, mode, *args, **kwargs)
+
+    with patch.object(type(tmp_path), "open", counting_open):
+        with store.transaction():
+            for i in range(1, 50):
+                repo.save(_finding(f"f-{i}"))
+
+    # Saves check the segment index for stored ids, but the segment is appended to once
+    appends = [name for name, mode in opened if mode.startswith("a") and name.endswith(".jsonl")]
+    assert appends == ["2025-11-12.0000.jsonl"]
+    assert _repo_ids(repo) == [f"f-{i}" for i in range(50)]
+    assert not store.journal_path.exists()
+
+
+def test_failed_transaction_writes_nothing(tmp_path):
+    store = JsonlStore(tmp_path)
+    repo = FindingsRepo(tmp_path / "findings", store=store)
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            repo.save(_finding("f-1"))
+            raise RuntimeError("boom")
+
+    assert _repo_ids(repo) == []
+
+
+def test_recovery_replaces_torn_append(tmp_path):
+    path = tmp_path / "findings.jsonl"
+    path.write_text(_finding("f-0").model_dump_json() + "\n")
+    committed = _finding("f-1").model_dump_json() + "\n"
+    journal = [{"path": str(path), "offset": path.stat().st_size, "data": committed}]
+    (tmp_path / JsonlStore.JOURNAL_NAME).write_text(json.dumps(journal))
+    # Crash halfway through the append
+    with path.open("a") as f:
+        f.write(committed[:20])
+
+    store = JsonlStore(tmp_path)
+
+    assert _ids(path) == ["f-0", "f-1"]
+    assert not store.journal_path.exists()
+
+
+def test_incomplete_journal_is_discarded(tmp_path):
+    path = tmp_path / "findings.jsonl"
+    path.write_text(_finding("f-0").model_dump_json() + "\n")
+    (tmp_path / (JsonlStore.JOURNAL_NAME[:-5] + ".tmp")).write_text("[{")
+
+    JsonlStore(tmp_path)
+
+    assert _ids(path) == ["f-0"]
+    assert list(tmp_path.iterdir()) == [path]
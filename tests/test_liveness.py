@@ -0,0 +1,96 @@
+"""Tests for liveness-based release and spilling of pipeline data."""
+import asyncio
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.liveness import last_uses
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.core.spill import SpillStore
+
+
+class Detector(BaseAgent):
+    contract = AgentContract(
+        name="detector_agent",
+        description="Detects things",
+        consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"],
+        phase_hint="ingest",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"List[DetectionFinding]": [{"id": f"f-{e['id']}"} for e in input_data["List[OktaEvent]"]]}
+
+
+class Risk(BaseAgent):
+    contract = AgentContract(
+        name="risk_agent",
+        description="Scores risk",
+        consumes=["DetectionFinding"],
+        produces=["RiskScore"],
+        phase_hint="analysis",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"RiskScore": {"finding_id": input_data["DetectionFinding"]["id"]}}
+
+
+PLAN = RoutePlan(steps=[
+    RouteStep(agent_name="detector_agent", reason="detect"),
+    RouteStep(agent_name="risk_agent", reason="score", iterate_over="List[DetectionFinding]"),
+])
+
+
+def _registry():
+    registry = AgentRegistry()
+    registry.register(Detector())
+    registry.register(Risk())
+    return registry
+
+
+def _orchestrator(**kwargs):
+    async def route(ctx):
+        return PLAN
+
+    router = MagicMock()
+    router.run = route
+    return Orchestrator(router=router, registry=_registry(), release_dead=True, **kwargs)
+
+
+def test_last_uses_follows_iterate_over():
+    assert last_uses(PLAN, _registry()) == {
+        "List[OktaEvent]": 0,
+        "List[DetectionFinding]": 1,
+    }
+
+
+def test_dead_data_is_released():
+    ctx = asyncio.run(_orchestrator().run(
+        initial_data={"List[OktaEvent]": [{"id": "e1"}]},
+        metadata={},
+    ))
+    assert ctx.data == {}
+
+
+def test_retained_data_is_kept_in_memory_without_spill_store():
+    ctx = asyncio.run(_orchestrator(retain=["List[RiskScore]"]).run(
+        initial_data={"List[OktaEvent]": [{"id": "e1"}]},
+        metadata={},
+    ))
+    assert list(ctx.data) == ["List[RiskScore]"]
+
+
+def test_retained_data_is_spilled_and_readable(tmp_path):
+    spill = SpillStore(tmp_path / "spill")
+    ctx = asyncio.run(_orchestrator(retain=["List[DetectionFinding]"], spill=spill).run(
+        initial_data={"List[OktaEvent]": [{"id": "e1"}, {"id": "e2"}]},
+        metadata={},
+    ))
+    assert "List[DetectionFinding]" not in ctx.data
+    assert ctx.get("List[DetectionFinding]") == [{"id": "f-e1"}, {"id": "f-e2"}]
+    assert "List[OktaEvent]" not in spill
+
+    spill.clear()
+    assert not (tmp_path / "spill").exists()
@@ -0,0 +1,127 @@
+"""Tests for signature-based memoization of risk scores and response plans."""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from okta_soc.agents.planner_agent import PlannerAgent
+from okta_soc.agents.risk_agent import LLMRiskAgent
+from okta_soc.core.memo import SignatureMemo, finding_signature, incident_signature
+from okta_soc.core.models import DetectionFinding, FindingType, SecurityIncident, Severity
+
+
+def _make_finding(finding_id: str, count: int, user: str = "alice") -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=FindingType.FAILED_LOGIN_BURST,
+        description=f"{count} failed logins for actor {user}.",
+        okta_event_ids=["e1"],
+        user_id=user,
+        created_at=datetime.now(timezone.utc),
+        metadata={"count": count, "window_seconds": 600.0},
+    )
+
+
+def _make_incident(incident_id: str, severity: Severity) -> SecurityIncident:
+    return SecurityIncident(
+        id=incident_id,
+        finding_id="f-1",
+        title="Incident from failed_login_burst",
+        description="burst",
+        severity=severity,
+        risk_score=0.7,
+        created_at=datetime.now(timezone.utc),
+        metadata={"finding_type": "failed_login_burst", "count": 6},
+    )
+
+
+def test_finding_signature_buckets_counts():
+    assert finding_signature(_make_finding("a", 5)) == finding_signature(_make_finding("b", 7, user="bob"))
+    assert finding_signature(_make_finding("a", 5)) != finding_signature(_make_finding("b", 20))
+
+
+def test_incident_signature_includes_severity():
+    assert incident_signature(_make_incident("i1", Severity.HIGH)) != incident_signature(
+        _make_incident("i2", Severity.CRITICAL)
+    )
+
+
+def test_memo_expires_after_ttl():
+    now = [1000.0]
+    memo = SignatureMemo(ttl_seconds=60, clock=lambda: now[0])
+    memo.put("sig", {"x": 1})
+    assert memo.get("sig") == {"x": 1}
+    now[0] += 61
+    assert memo.get("sig") is None
+
+
+def test_memo_revalidates_after_max_reuses():
+    memo = SignatureMemo(max_reuses=2)
+    memo.put("sig", {"x": 1})
+    assert memo.get("sig") is not None
+    assert memo.get("sig") is not None
+    assert memo.get("sig") is None
+    memo.put("sig", {"x": 2})
+    assert memo.get("sig") == {"x": 2}
+
+
+def test_memo_round_trips_through_file(tmp_path):
+    path = tmp_path / "memo.json"
+    memo = SignatureMemo(path=path)
+    memo.put("sig", {"x": 1})
+    memo.save()
+    assert SignatureMemo(path=path).get("sig") == {"x": 1}
+
+
+def test_risk_agent_reuses_cached_score_for_same_shape():
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.return_value = {
+        "severity": "high",
+        "likelihood": 0.8,
+        "impact": 0.7,
+        "score": 0.75,
+        "rationale": "burst of failures",
+    }
+    agent = LLMRiskAgent(llm, memo=SignatureMemo())
+
+    first = asyncio.run(agent.run({"DetectionFinding": _make_finding("f-1", 5)}))
+    second = asyncio.run(agent.run({"DetectionFinding": _make_finding("f-2", 6, user="bob")}))
+
+    assert llm.chat_json.call_count == 1
+    assert second["RiskScore"].finding_id == "f-2"
+    assert second["RiskScore"].score == first["RiskScore"].score
+    assert second["SecurityIncident"].finding_id == "f-2"
+
+
+def test_planner_agent_rebinds_cached_plan():
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.return_value = {
+        "overall_goal": "Contain",
+        "steps": [{"step_id": "lock_account", "description": "d", "rationale": "r"}],
+    }
+    agent = PlannerAgent(llm, memo=SignatureMemo())
+
+    asyncio.run(agent.run({"SecurityIncident": _make_incident("i-1", Severity.HIGH)}))
+    out = asyncio.run(agent.run({"SecurityIncident": _make_incident("i-2", Severity.HIGH)}))
+
+    assert llm.chat_json.call_count == 1
+    assert out["ResponsePlan"].incident_id == "i-2"
+    assert out["ResponsePlan"].steps[0].step_id == "lock_account"
+
+
+def test_concurrent_misses_share_one_computation():
+    memo = SignatureMemo()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"x": 1}
+
+    async def fan_out():
+        return await asyncio.gather(*(memo.get_or_compute("sig", compute) for _ in range(5)))
+
+    results = asyncio.run(fan_out())
+    assert len(calls) == 1
+    assert all(r == {"x": 1} for r in results)
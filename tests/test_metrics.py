@@ -0,0 +1,140 @@
+"""Tests for the metrics registry and the components that record into it."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+import pytest
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.concurrency import AdaptiveLimiter
+from okta_soc.core.llm import LLMClient
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import OktaEvent
+from okta_soc.core.router_models import RoutePlan, RouteStep
+
+
+def test_render_text_exposition_format():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs run.", ["queue"]).inc(2, queue='a"b')
+    registry.gauge("depth", "Queue depth.").set(3)
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.1)
+    latency.observe(5)
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter\n" in text
+    assert 'jobs_total{queue="a\\"b"} 2\n' in text
+    assert "# TYPE depth gauge\ndepth 3\n" in text
+    assert 'latency_seconds_bucket{le="0.1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_sum 5.15\n" in text
+    assert "latency_seconds_count 3\n" in text
+
+
+def test_registry_returns_existing_metric_and_rejects_conflicts():
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "Calls.", ["outcome"])
+    assert registry.counter("calls_total", "Calls.", ["outcome"]) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("calls_total", "Calls.")
+    with pytest.raises(ValueError):
+        counter.inc(outcome="ok", extra="x")
+    with pytest.raises(ValueError):
+        counter.inc(-1, outcome="ok")
+
+
+def test_write_dumps_to_file(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("runs_total", "Runs.").inc()
+    registry.write(tmp_path / "out" / "metrics.prom")
+    assert "runs_total 1" in (tmp_path / "out" / "metrics.prom").read_text()
+
+
+class _Echo(BaseAgent):
+    contract = AgentContract(
+        name="echo", description="d", consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"], phase_hint="ingest",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"List[DetectionFinding]": list(input_data["List[OktaEvent]"])}
+
+
+class _Boom(BaseAgent):
+    contract = AgentContract(
+        name="boom", description="d", consumes=["DetectionFinding"],
+        produces=["RiskScore"], phase_hint="analysis",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        raise RuntimeError("failed")
+
+
+def test_orchestrator_records_agent_latency_outputs_and_failures():
+    registry = AgentRegistry()
+    registry.register(_Echo())
+    registry.register(_Boom())
+    router = MagicMock()
+
+    async def route(ctx):
+        return RoutePlan(steps=[
+            RouteStep(agent_name="echo", reason="r"),
+            RouteStep(agent_name="boom", reason="r", iterate_over="List[DetectionFinding]"),
+        ])
+
+    router.run = route
+    metrics = MetricsRegistry()
+    orchestrator = Orchestrator(router=router, registry=registry, metrics=metrics)
+    with pytest.raises(RuntimeError):
+        asyncio.run(orchestrator.run(initial_data={"List[OktaEvent]": [1, 2]}, metadata={}))
+
+    assert metrics.get("agent_runs_total").value(agent="echo", outcome="ok") == 1
+    assert metrics.get("agent_runs_total").value(agent="boom", outcome="error") == 2
+    assert metrics.get("agent_seconds").count(agent="boom") == 2
+    assert metrics.get("agent_outputs_total").value(type="DetectionFinding") == 2
+    assert metrics.get("pipeline_runs_total").value(mode="run", outcome="error") == 1
+
+
+def test_detector_counts_findings_by_type():
+    metrics = MetricsRegistry()
+    base = datetime(2025, 11, 12, tzinfo=timezone.utc)
+    events = [
+        OktaEvent(
+            id=f"e{i}", event_type="user.session.start", actor_id="alice", actor_type="User",
+            target_id=None, ip_address=None, user_agent=None, outcome="FAILURE",
+            timestamp=base + timedelta(minutes=i),
+        )
+        for i in range(5)
+    ]
+    asyncio.run(DetectorAgent(metrics=metrics).run({"List[OktaEvent]": events}))
+    assert metrics.get("detector_events_total").value() == 5
+    assert metrics.get("detector_findings_total").value(finding_type="failed_login_burst") == 1
+    assert metrics.get("detector_seconds").count(detector="impossible_travel") == 1
+
+
+def test_llm_client_records_calls_and_tokens():
+    metrics = MetricsRegistry()
+    llm = LLMClient(base_url="http://localhost:1/v1", api_key="k", model="m",
+                    limiter=AdaptiveLimiter(), metrics=metrics)
+    response = MagicMock()
+    response.choices[0].message.content = '{"ok": true}'
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 3
+    llm.client = MagicMock()
+    llm.client.chat.completions.create.side_effect = [response, RuntimeError("down")]
+
+    assert llm.chat_json("s", "u") == {"ok": True}
+    with pytest.raises(RuntimeError):
+        llm.chat("s", "u")
+
+    assert metrics.get("llm_calls_total").value(outcome="ok") == 1
+    assert metrics.get("llm_calls_total").value(outcome="error") == 1
+    assert metrics.get("llm_call_seconds").count() == 2
+    assert metrics.get("llm_tokens_total").value(kind="prompt") == 10
+    assert metrics.get("llm_in_flight").value() == 0
@@ -0,0 +1,102 @@
+"""Tests for attaching repeat findings to open incidents instead of opening new ones."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from okta_soc.agents.risk_agent import LLMRiskAgent
+from okta_soc.core.models import DetectionFinding, FindingType, RiskScore, SecurityIncident, Severity
+from okta_soc.storage.open_incidents import OpenIncidentIndex, finding_family
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = T0
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _finding(finding_id: str, user: str = "alice", kind: FindingType = FindingType.FAILED_LOGIN_BURST,
+             **metadata) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id, finding_type=kind, description="d", okta_event_ids=["e1"],
+        user_id=user, created_at=T0, metadata=metadata,
+    )
+
+
+def _risk(finding_id: str, severity: Severity, score: float) -> RiskScore:
+    return RiskScore(finding_id=finding_id, severity=severity, likelihood=score,
+                     impact=score, score=score, rationale="r")
+
+
+def _incident(severity: Severity = Severity.HIGH) -> SecurityIncident:
+    return SecurityIncident(
+        id="i-1", finding_id="f1", user_id="alice", title="t", description="d",
+        severity=severity, risk_score=0.7, created_at=T0,
+    )
+
+
+def test_finding_family_groups_related_types():
+    assert finding_family(_finding("f", kind=FindingType.MFA_FATIGUE)) == "credential_attack"
+    correlated = _finding("f", kind=FindingType.CORRELATED, finding_types="failed_login_burst+impossible_travel")
+    assert finding_family(correlated) == "account_takeover"
+
+
+def test_attach_raises_severity_only_upwards():
+    index = OpenIncidentIndex()
+    index.open(_incident(), "credential_attack")
+
+    updated, escalated = index.attach("credential_attack", _finding("f2"), _risk("f2", Severity.MEDIUM, 0.5))
+    assert not escalated
+    assert updated.id == "i-1" and updated.severity == Severity.HIGH and updated.risk_score == 0.7
+    assert updated.metadata["finding_ids"] == ["f1", "f2"]
+
+    updated, escalated = index.attach("credential_attack", _finding("f3"), _risk("f3", Severity.CRITICAL, 0.95))
+    assert escalated
+    assert updated.severity == Severity.CRITICAL and updated.risk_score == 0.95
+    assert index.get("alice", "credential_attack").metadata["finding_ids"] == ["f1", "f2", "f3"]
+
+
+def test_stale_incidents_expire_and_snapshot_round_trips(tmp_path):
+    clock = _Clock()
+    path = tmp_path / "open_incidents.json"
+    index = OpenIncidentIndex(path, ttl=timedelta(hours=1), clock=clock)
+    index.open(_incident(), "credential_attack")
+    index.save()
+
+    reloaded = OpenIncidentIndex(path, ttl=timedelta(hours=1), clock=clock)
+    assert reloaded.get("alice", "credential_attack").id == "i-1"
+    assert reloaded.get("alice", "account_takeover") is None
+
+    clock.now = T0 + timedelta(hours=2)
+    assert reloaded.get("alice", "credential_attack") is None
+    reloaded.save()
+    assert len(OpenIncidentIndex(path, clock=clock)) == 0
+
+
+def test_risk_agent_attaches_repeat_findings_and_replans_only_on_escalation():
+    risks = {
+        "f1": _risk("f1", Severity.HIGH, 0.8),
+        "f2": _risk("f2", Severity.HIGH, 0.85),
+        "f3": _risk("f3", Severity.CRITICAL, 0.95),
+        "f4": _risk("f4", Severity.LOW, 0.1),
+    }
+    agent = LLMRiskAgent(MagicMock(), open_incidents=OpenIncidentIndex())
+
+    async def score(finding):
+        return risks[finding.id]
+
+    agent._score_with_llm = score
+
+    def run(finding):
+        return asyncio.run(agent.run({"DetectionFinding": finding}))
+
+    first = run(_finding("f1"))["SecurityIncident"]
+    repeat = run(_finding("f2"))
+    assert "SecurityIncident" not in repeat
+    assert repeat["IncidentUpdate"].id == first.id
+    escalated = run(_finding("f3"))["SecurityIncident"]
+    assert escalated.id == first.id and escalated.severity == Severity.CRITICAL
+    assert set(run(_finding("f4", user="bob"))) == {"RiskScore"}
@@ -91,3 +91,67 @@ def test_orchestrator_handles_iterate_over():
     assert "List[RiskScore]" in ctx.data
     assert len(ctx.data["List[RiskScore]"]) == 2
     assert len(ctx.history) == 2
+
+
+class CountingDetector(BaseAgent):
+    contract = AgentContract(
+        name="detector_agent",
+        description="Detects things",
+        consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"],
+        phase_hint="ingest",
+        deterministic=True,
+    )
+
+    def __init__(self):
+        self.runs = 0
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.runs += 1
+        events = input_data["List[OktaEvent]"]
+        return {"List[DetectionFinding]": [{"id": f"f-{e['id']}"} for e in events]}
+
+
+def _speculative_orchestrator(steps):
+    registry = AgentRegistry()
+    detector = CountingDetector()
+    registry.register(detector)
+    registry.register(MockRisk())
+
+    async def slow_route(ctx):
+        await asyncio.sleep(0.01)
+        # Speculative outputs must not leak into the context before adoption
+        assert "List[DetectionFinding]" not in ctx.data
+        return RoutePlan(steps=steps)
+
+    router = MagicMock()
+    router.run = slow_route
+    return Orchestrator(router=router, registry=registry, speculate=True), detector
+
+
+def test_speculative_detection_is_adopted_when_plan_agrees():
+    orchestrator, detector = _speculative_orchestrator([
+        RouteStep(agent_name="detector_agent", reason="detect"),
+        RouteStep(agent_name="risk_agent", reason="score", iterate_over="List[DetectionFinding]"),
+    ])
+    ctx = asyncio.run(orchestrator.run(
+        initial_data={"List[OktaEvent]": [{"id": "e1"}, {"id": "e2"}]},
+        metadata={"source": "test"},
+    ))
+
+    assert detector.runs == 1
+    assert len(ctx.data["List[RiskScore]"]) == 2
+    assert ctx.history[0].speculative is True
+    assert ctx.history[1].speculative is False
+
+
+def test_speculative_detection_is_discarded_when_plan_disagrees():
+    orchestrator, detector = _speculative_orchestrator([])
+    ctx = asyncio.run(orchestrator.run(
+        initial_data={"List[OktaEvent]": [{"id": "e1"}]},
+        metadata={"source": "test"},
+    ))
+
+    assert detector.runs == 1
+    assert "List[DetectionFinding]" not in ctx.data
+    assert ctx.history == []
@@ -0,0 +1,203 @@
+"""Tests for priority ordering of findings under a per-run LLM budget."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from okta_soc.agents.planner_agent import PlannerAgent
+from okta_soc.agents.priority_agent import PriorityAgent, pre_score
+from okta_soc.agents.risk_agent import LLMRiskAgent
+from okta_soc.agents.risk_agent import RISK_SYSTEM_PROMPT
+from okta_soc.core.budget import LLMBudget, LLMBudgetExceeded
+from okta_soc.core.config import Settings
+from okta_soc.core.models import DetectionFinding, FindingType, OktaEvent, SecurityIncident, Severity
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.ingest.pipeline import Pipeline
+from okta_soc.storage.backlog import FindingBacklog
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+def _finding(finding_id: str, kind: FindingType, user: str = "alice", minute: int = 0) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id, finding_type=kind, description="d", okta_event_ids=["e1", "e2"],
+        user_id=user, created_at=T0 + timedelta(minutes=minute), metadata={"count": 5},
+    )
+
+
+def test_pre_score_ranks_type_and_privileged_actors():
+    burst = _finding("b", FindingType.FAILED_LOGIN_BURST)
+    travel = _finding("t", FindingType.IMPOSSIBLE_TRAVEL)
+    admin_burst = _finding("a", FindingType.FAILED_LOGIN_BURST, user="it-admin")
+    assert pre_score(travel) > pre_score(burst)
+    assert pre_score(admin_burst) > pre_score(travel)
+    assert pre_score(burst, frozenset({"alice"})) == pre_score(admin_burst)
+
+
+def test_budget_caps_calls_and_tokens():
+    budget = LLMBudget(max_calls=2)
+    budget.reserve()
+    budget.reserve()
+    with pytest.raises(LLMBudgetExceeded):
+        budget.reserve()
+    budget.reset()
+    assert budget.remaining_calls == 2
+
+    tokens = LLMBudget(max_tokens=100)
+    tokens.reserve()
+    tokens.charge(150)
+    assert tokens.exhausted
+    with pytest.raises(LLMBudgetExceeded):
+        tokens.reserve()
+
+
+def test_overflow_is_deferred_and_ranked_again_next_run(tmp_path):
+    path = tmp_path / "backlog.json"
+    backlog = FindingBacklog(path)
+    agent = PriorityAgent(budget=LLMBudget(max_calls=2), backlog=backlog)
+    findings = [
+        _finding("b1", FindingType.FAILED_LOGIN_BURST, minute=0),
+        _finding("b2", FindingType.FAILED_LOGIN_BURST, minute=1),
+        _finding("t1", FindingType.IMPOSSIBLE_TRAVEL, minute=2),
+        _finding("m1", FindingType.MFA_FATIGUE, minute=3),
+    ]
+    result = asyncio.run(agent.run({"List[DetectionFinding]": findings}))
+    assert [f.id for f in result["List[DetectionFinding]"]] == ["t1", "m1"]
+    backlog.save()
+
+    # The next run takes the backlog first and ranks it with new findings
+    reloaded = FindingBacklog(path)
+    assert len(reloaded) == 2
+    agent = PriorityAgent(budget=LLMBudget(max_calls=2), backlog=reloaded)
+    new = [_finding("a1", FindingType.FAILED_LOGIN_BURST, user="admin", minute=9)]
+    result = asyncio.run(agent.run({"List[DetectionFinding]": new}))
+    assert [f.id for f in result["List[DetectionFinding]"]] == ["a1", "b1"]
+    assert [f.id for f in reloaded.take()] == ["b2"]
+
+
+def test_without_a_cap_everything_is_admitted_in_priority_order():
+    agent = PriorityAgent(backlog=FindingBacklog())
+    findings = [_finding("b", FindingType.FAILED_LOGIN_BURST), _finding("t", FindingType.IMPOSSIBLE_TRAVEL)]
+    result = asyncio.run(agent.run({"List[DetectionFinding]": findings}))
+    assert [f.id for f in result["List[DetectionFinding]"]] == ["t", "b"]
+
+
+def test_agents_degrade_when_the_budget_runs_out():
+    backlog = FindingBacklog()
+    risk = LLMRiskAgent(MagicMock(), backlog=backlog)
+
+    async def over_budget(*args):
+        raise LLMBudgetExceeded("spent")
+
+    risk._score_batch_with_llm = over_budget
+    findings = [_finding("b1", FindingType.FAILED_LOGIN_BURST), _finding("b2", FindingType.MFA_FATIGUE)]
+    outputs = asyncio.run(risk.run_batch([{"DetectionFinding": f} for f in findings]))
+    assert outputs == [{}, {}]
+    assert sorted(f.id for f in backlog.take()) == ["b1", "b2"]
+
+    planner = PlannerAgent(MagicMock())
+    planner._plan_with_llm = over_budget
+    incident = SecurityIncident(
+        id="i-1", finding_id="b1", user_id="alice", title="t", description="d",
+        severity=Severity.HIGH, risk_score=0.8, created_at=T0,
+    )
+    assert asyncio.run(planner.run({"SecurityIncident": incident})) == {}
+
+    # With a backlog, the incident waits there for the next run
+    planner = PlannerAgent(MagicMock(), backlog=backlog)
+    planner._plan_with_llm = over_budget
+    assert asyncio.run(planner.run({"SecurityIncident": incident})) == {}
+    assert [i.id for i in backlog.take_incidents()] == ["i-1"]
+
+
+def test_a_refused_retry_defers_only_what_the_batch_left_unscored():
+    backlog = FindingBacklog()
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.side_effect = [
+        {"results": [{"finding_id": "b1", "severity": "low", "likelihood": 0.1, "impact": 0.1,
+                      "score": 0.1, "rationale": "r"}]},
+        LLMBudgetExceeded("spent"),  # the retry for b2
+    ]
+    risk = LLMRiskAgent(llm, backlog=backlog)
+    findings = [_finding("b1", FindingType.FAILED_LOGIN_BURST), _finding("b2", FindingType.MFA_FATIGUE)]
+    outputs = asyncio.run(risk.run_batch([{"DetectionFinding": f} for f in findings]))
+    assert outputs[0]["RiskScore"].finding_id == "b1" and outputs[1] == {}
+    assert [f.id for f in backlog.take()] == ["b2"]
+
+    llm.chat_json.side_effect = [
+        {"plans": [{"incident_id": "i-1", "overall_goal": "g", "steps": []}]},
+        LLMBudgetExceeded("spent"),  # the retry for i-2
+    ]
+    planner = PlannerAgent(llm, backlog=backlog)
+    incidents = [
+        SecurityIncident(
+            id=f"i-{n}", finding_id=f"b{n}", user_id="alice", title="t", description="d",
+            severity=Severity.HIGH, risk_score=0.8, created_at=T0,
+        )
+        for n in (1, 2)
+    ]
+    outputs = asyncio.run(planner.run_batch([{"SecurityIncident": i} for i in incidents]))
+    assert outputs[0]["ResponsePlan"].incident_id == "i-1" and outputs[1] == {}
+    assert [i.id for i in backlog.take_incidents()] == ["i-2"]
+
+
+def _completion(system_prompt: str) -> MagicMock:
+    if system_prompt == RISK_SYSTEM_PROMPT:
+        content = '{"severity": "high", "likelihood": 0.9, "impact": 0.9, "score": 0.9, "rationale": "r"}'
+    else:
+        content = '{"overall_goal": "contain", "steps": [], "notes": null}'
+    response = MagicMock(usage=None)
+    response.choices[0].message.content = content
+    return response
+
+
+def _pipeline() -> Pipeline:
+    pipeline = Pipeline(Settings(llm_max_calls_per_run=1))
+
+    async def route(context):
+        steps = [RouteStep(agent_name="planner_agent", reason="r", iterate_over="List[SecurityIncident]")]
+        if "List[OktaEvent]" in context.data:
+            steps[:0] = [
+                RouteStep(agent_name="detector_agent", reason="r"),
+                RouteStep(agent_name="priority_agent", reason="r"),
+                RouteStep(agent_name="risk_agent", reason="r", iterate_over="List[DetectionFinding]"),
+            ]
+        return RoutePlan(steps=steps)
+
+    pipeline.router.run = route
+    pipeline.llm.client.chat.completions.create = lambda messages, **kwargs: _completion(messages[0]["content"])
+    return pipeline
+
+
+def test_incidents_left_unplanned_are_planned_first_next_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # every data/ path of the default settings
+    events = [
+        OktaEvent(
+            id=f"e{i}", event_type="user.session.start", actor_id="alice", actor_type="User",
+            target_id=None, ip_address=None, user_agent=None, outcome="FAILURE",
+            timestamp=T0 + timedelta(minutes=i),
+        )
+        for i in range(5)
+    ]
+
+    async def process(pipeline: Pipeline, batch):
+        await pipeline.start()
+        try:
+            await pipeline.process(batch, {"source": "test"})
+        finally:
+            await pipeline.close()
+
+    # The run's single LLM call scores the finding; the incident cannot be planned
+    first = _pipeline()
+    asyncio.run(process(first, events))
+    assert first.backlog.incident_count == 1
+    assert first.metrics.get("agent_outputs_total").value(type="ResponsePlan") == 0
+
+    # The next run, even one without new events, plans it before anything else
+    second = _pipeline()
+    assert second.backlog.incident_count == 1
+    asyncio.run(process(second, []))
+    assert second.backlog.incident_count == 0
+    assert second.metrics.get("agent_outputs_total").value(type="ResponsePlan") == 1
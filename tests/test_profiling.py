@@ -0,0 +1,103 @@
+"""Tests for the opt-in profiler: per-span pstats and allocation reports, collapsed stacks."""
+import asyncio
+import pstats
+import threading
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.profiling import Profiler, maybe_span
+from okta_soc.core.router_models import RoutePlan, RouteStep
+
+
+def _work(n: int) -> list:
+    return [str(i) * 10 for i in range(n)]
+
+
+def test_span_writes_pstats_and_allocation_report(tmp_path):
+    profiler = Profiler(tmp_path, sample_interval=0.001)
+    with profiler.span("detector-burst"):
+        kept = _work(20_000)
+    run_dir = profiler.close()
+
+    stats = pstats.Stats(str(run_dir / "001-detector-burst.pstats"))
+    assert any(func[2] == "_work" for func in stats.stats)
+    report = (run_dir / "001-detector-burst.alloc.txt").read_text()
+    assert "test_profiling.py" in report
+    assert profiler.spans[0].allocated_bytes > 0
+    assert kept
+
+
+def test_nested_span_is_profiled_in_its_own_file(tmp_path):
+    profiler = Profiler(tmp_path)
+    with profiler.span("outer"):
+        with profiler.span("inner"):
+            _work(1000)
+    run_dir = profiler.close()
+
+    inner = pstats.Stats(str(run_dir / "002-inner.pstats"))
+    outer = pstats.Stats(str(run_dir / "001-outer.pstats"))
+    assert any(func[2] == "_work" for func in inner.stats)
+    assert not any(func[2] == "_work" for func in outer.stats)
+    assert [s.name for s in profiler.spans] == ["inner", "outer"]
+
+
+def test_close_writes_collapsed_stacks_and_summary(tmp_path):
+    profiler = Profiler(tmp_path, sample_interval=0.001)
+    with profiler.span("busy"):
+        for _ in range(30):
+            _work(5000)
+    run_dir = profiler.close()
+
+    summary = (run_dir / "summary.txt").read_text()
+    assert "busy" in summary
+    for line in (run_dir / "stacks.collapsed").read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and ";" in stack
+    assert profiler.close() == run_dir
+
+
+def test_span_off_the_owner_thread_is_a_no_op(tmp_path):
+    profiler = Profiler(tmp_path)
+
+    def worker():
+        with profiler.span("elsewhere"):
+            _work(10)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    with maybe_span(None, "off"):
+        _work(10)
+    profiler.close()
+    assert profiler.spans == []
+
+
+class _Echo(BaseAgent):
+    contract = AgentContract(
+        name="echo", description="d", consumes=["List[OktaEvent]"],
+        produces=["List[DetectionFinding]"], phase_hint="ingest",
+    )
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"List[DetectionFinding]": list(input_data["List[OktaEvent]"])}
+
+
+def test_orchestrator_profiles_routing_and_each_step(tmp_path):
+    registry = AgentRegistry()
+    registry.register(_Echo())
+    router = MagicMock()
+
+    async def route(ctx):
+        return RoutePlan(steps=[RouteStep(agent_name="echo", reason="r")])
+
+    router.run = route
+    profiler = Profiler(tmp_path)
+    orchestrator = Orchestrator(router=router, registry=registry, profiler=profiler)
+    asyncio.run(orchestrator.run(initial_data={"List[OktaEvent]": [1]}, metadata={}))
+    run_dir = profiler.close()
+
+    assert [s.name for s in profiler.spans] == ["route", "step01-echo"]
+    assert (run_dir / "002-step01-echo.pstats").exists()
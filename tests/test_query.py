@@ -0,0 +1,155 @@
+"""Tests for the filtered, paginated query API over stored artifacts."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from okta_soc.core.models import (
+    DetectionFinding, FindingType, ResponsePlan, SecurityIncident, Severity,
+)
+from okta_soc.storage.query import JsonlQueryEngine, Query, SqliteQueryEngine, shared_index
+from okta_soc.storage.repositories import FindingsRepo, IncidentsRepo, PlansRepo
+from okta_soc.storage.sqlite_repositories import (
+    SqliteFindingsRepo,
+    SqliteIncidentsRepo,
+    SqlitePlansRepo,
+    SqliteStore,
+)
+
+BASE = datetime(2025, 11, 10, tzinfo=timezone.utc)
+
+
+def _records():
+    findings, incidents = [], []
+    for i in range(10):
+        user = "bob" if i % 2 else "alice"
+        findings.append(DetectionFinding(
+            id=f"f-{i}",
+            finding_type=FindingType.FAILED_LOGIN_BURST,
+            description="burst",
+            okta_event_ids=["e1"],
+            user_id=user,
+            created_at=BASE + timedelta(hours=i),
+        ))
+        incidents.append(SecurityIncident(
+            id=f"i-{i}",
+            finding_id=f"f-{i}",
+            user_id=user,
+            title="t",
+            description="d",
+            severity=Severity.CRITICAL if i % 3 == 0 else Severity.LOW,
+            risk_score=0.5,
+            created_at=BASE + timedelta(hours=i),
+            status="closed" if i == 9 else "open",
+            metadata={"finding_type": "failed_login_burst"},
+        ))
+    return findings, incidents
+
+
+def _plans():
+    return [ResponsePlan(incident_id=f"i-{i}", overall_goal=f"contain {i}", steps=[]) for i in (0, 3, 3)]
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def engine(request, tmp_path):
+    findings, incidents = _records()
+    if request.param == "jsonl":
+        for f in findings:
+            FindingsRepo(tmp_path / "findings").save(f)
+        for i in incidents:
+            IncidentsRepo(tmp_path / "incidents").save(i)
+        for p in _plans():
+            PlansRepo(tmp_path / "plans").save(p)
+        yield JsonlQueryEngine(tmp_path)
+    else:
+        store = SqliteStore(tmp_path / "soc.db")
+        with store.transaction():
+            for f in findings:
+                SqliteFindingsRepo(store).save(f)
+            for i in incidents:
+                SqliteIncidentsRepo(store).save(i)
+            for p in _plans():
+                SqlitePlansRepo(store).save(p)
+        yield SqliteQueryEngine(store)
+        store.close()
+
+
+def test_filters_combine(engine):
+    query = Query(
+        severity="critical",
+        user_id="bob",
+        status="open",
+        since=BASE,
+        until=BASE + timedelta(days=1),
+    )
+    assert [i.id for i in engine.iter(query)] == ["i-3"]
+
+
+def test_cursor_pagination_covers_everything_once(engine):
+    seen, cursor = [], None
+    while True:
+        page = engine.page(Query(kind="findings", descending=True, limit=3, cursor=cursor))
+        seen.extend(f.id for f in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [f"f-{i}" for i in reversed(range(10))]
+
+
+def test_plans_for_a_page_of_incidents(engine):
+    page = engine.page(Query(severity="critical", limit=2))
+    assert [i.id for i in page.items] == ["i-0", "i-3"]
+    plans = engine.plans_for(page.items)
+    assert [p.overall_goal for p in plans["i-0"]] == ["contain 0"]
+    assert len(plans["i-3"]) == 2
+    assert engine.plans_for([]) == {}
+
+
+def test_findings_reject_incident_only_filters():
+    with pytest.raises(ValueError):
+        Query(kind="findings", severity="high")
+
+
+def test_jsonl_index_picks_up_appends(tmp_path):
+    findings, _ = _records()
+    repo = FindingsRepo(tmp_path / "findings")
+    repo.save(findings[0])
+    engine = JsonlQueryEngine(tmp_path)
+    assert len(list(engine.iter(Query(kind="findings")))) == 1
+
+    repo.save(findings[1])
+    assert [f.id for f in engine.iter(Query(kind="findings"))] == ["f-0", "f-1"]
+    # A fresh engine reuses the sidecar instead of rescanning
+    segment = repo.log.segments()[0]
+    assert segment.with_name(segment.name + ".idx").read_text().count("\n") == 2
+    assert len(list(JsonlQueryEngine(tmp_path).iter(Query(kind="findings")))) == 2
+
+
+def test_jsonl_index_ids_follow_appends_and_rewrites(tmp_path):
+    findings, _ = _records()
+    repo = FindingsRepo(tmp_path / "findings")
+    repo.save(findings[0])
+    segment = repo.log.segments()[0]
+    index = shared_index(segment, "findings")
+    wanted = {"f-0", "f-1"}
+    assert index.select(wanted) == {"f-0"}
+
+    repo.save(findings[1])
+    assert index.select(wanted) == {"f-0", "f-1"}
+
+    # A replaced (shorter) segment is indexed again from scratch
+    segment.write_text(findings[1].model_dump_json() + "\n")
+    assert index.select(wanted) == {"f-1"}
+
+
+def test_repos_and_engine_share_one_index_per_segment(tmp_path):
+    findings, _ = _records()
+    repo = FindingsRepo(tmp_path / "findings")
+    repo.save(findings[0])
+    engine = JsonlQueryEngine(tmp_path)
+    assert len(list(engine.iter(Query(kind="findings")))) == 1
+    assert repo.known_ids([findings[0]]) == {"f-0"}
+
+    segment = repo.log.segments()[0]
+    assert shared_index(segment, "findings") is shared_index(tmp_path / "findings" / segment.name, "findings")
+    # Both looked the segment up, yet every record is indexed once
+    assert segment.with_name(segment.name + ".idx").read_text().count("\n") == 1
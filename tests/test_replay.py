@@ -0,0 +1,150 @@
+"""Tests for accelerated replay of archived events on a simulated clock."""
+import asyncio
+import gzip
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+
+from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.agents.router_agent import RouterAgent
+from okta_soc.core.clock import SimulatedClock
+from okta_soc.core.config import Settings
+from okta_soc.core.llm import LLMClient
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import OktaEvent
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.ingest.replay import load_archive, replay, run_replay
+from okta_soc.storage.background import BackgroundWriter
+from okta_soc.storage.entity_index import EntityIndex
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+class _Monotonic:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _failure(i: int, minute: float) -> OktaEvent:
+    return OktaEvent(
+        id=f"e{i}", event_type="user.session.start", actor_id="alice", actor_type="User",
+        target_id=None, ip_address=None, user_agent=None, outcome="FAILURE",
+        timestamp=T0 + timedelta(minutes=minute),
+    )
+
+
+def test_simulated_clock_runs_at_speed_and_skips_idle_time_at_max():
+    wall = _Monotonic()
+    clock = SimulatedClock(T0, speed=100, monotonic=wall)
+    wall.now = 1.5
+    assert clock() == T0 + timedelta(seconds=150)
+
+    fast = SimulatedClock(T0, speed=math.inf, monotonic=wall)
+    asyncio.run(fast.sleep_until(T0 + timedelta(hours=2)))
+    assert fast() == T0 + timedelta(hours=2)
+    wall.now = 3.5  # work still takes real time
+    assert fast() == T0 + timedelta(hours=2, seconds=2)
+
+
+def test_load_archive_reads_gzipped_ndjson_in_event_order(tmp_path):
+    records = [
+        {"id": "late", "event_type": "x", "actor_id": "a", "timestamp": "2025-11-12T10:00:00Z"},
+        {"id": "early", "event_type": "x", "actor_id": "a", "timestamp": "2025-11-12T09:00:00Z"},
+    ]
+    path = tmp_path / "day.ndjson.gz"
+    with gzip.open(path, "wt") as f:
+        f.write("\n".join(json.dumps(r) for r in records))
+    assert [e.id for e in load_archive([path])] == ["early", "late"]
+
+
+class _ReplayPipeline:
+    """Detector with lookback plus a writer measuring lag on the replay clock."""
+
+    def __init__(self, clock: SimulatedClock):
+        self.metrics = MetricsRegistry()
+        self.detector = DetectorAgent(lookback=timedelta(minutes=60))
+        self.writer = BackgroundWriter(MagicMock(), metrics=self.metrics, clock=clock)
+        self.batches: List[Dict[str, Any]] = []
+
+    async def process(self, events: List[OktaEvent], metadata: Dict[str, Any]) -> None:
+        self.batches.append({"ids": [e.id for e in events], "until": metadata["until"]})
+        outputs = await self.detector.run({"List[OktaEvent]": events})
+        await self.writer.publish(outputs)
+
+
+def test_replay_polls_in_event_time_and_reports_lag():
+    # Failures at minutes 1-5 form one burst that straddles two polls; an
+    # old event falls before the cutoff and a late one after a quiet hour
+    events = [_failure(0, -120)] + [_failure(i, i) for i in range(1, 6)] + [_failure(6, 180)]
+    clock = SimulatedClock(T0, speed=math.inf, monotonic=_Monotonic())
+    pipeline = _ReplayPipeline(clock)
+
+    report = asyncio.run(replay(pipeline, events, clock, interval=180, since=T0 - timedelta(hours=1)))
+
+    assert [b["ids"] for b in pipeline.batches] == [["e1", "e2"], ["e3", "e4", "e5"], ["e6"]]
+    assert [b["until"] for b in pipeline.batches] == [
+        (T0 + timedelta(minutes=m)).isoformat() for m in (3, 6, 183)
+    ]
+    assert report.skipped == 1 and report.events == 6 and report.cycles == 3
+    # The burst ends at minute 5 and is seen at the minute-6 poll
+    assert report.findings == 1
+    assert 30 <= report.lag_p50_seconds <= 60
+    assert report.simulated_seconds == 183 * 60
+    assert report.peak_rss_mib > 0
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    registry = MetricsRegistry()
+    lag = registry.histogram("lag", "Lag.", buckets=(10.0, 20.0))
+    assert lag.quantile(0.5) is None
+    for value in (1, 12, 14, 18):
+        lag.observe(value)
+    assert lag.quantile(0.25) == 10.0
+    assert lag.quantile(0.5) == pytest.approx(10.0 + 10.0 / 3)
+    assert lag.sum() == 45
+
+
+def test_replays_are_isolated_from_live_data_and_reproducible(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the live data/ directory of the default settings
+
+    async def route(self, context):
+        return RoutePlan(steps=[
+            RouteStep(agent_name="detector_agent", reason="r"),
+            RouteStep(agent_name="risk_agent", reason="r", iterate_over="List[DetectionFinding]"),
+            RouteStep(agent_name="planner_agent", reason="r", iterate_over="List[SecurityIncident]"),
+        ])
+
+    def score(self, system_prompt, user_prompt):
+        return {"severity": "high", "likelihood": 0.9, "impact": 0.9, "score": 0.9, "rationale": "r"}
+
+    monkeypatch.setattr(RouterAgent, "run", route)
+    monkeypatch.setattr(LLMClient, "chat_json", score)
+    archive = tmp_path / "day.ndjson"
+    archive.write_text("\n".join(e.model_dump_json() for e in [_failure(i, i) for i in range(5)]))
+
+    def run(out_dir=None):
+        return asyncio.run(run_replay([archive], math.inf, 600, settings=Settings(), out_dir=out_dir))
+
+    first, second = run(), run()
+    assert (first.findings, first.incidents) == (second.findings, second.incidents) == (1, 1)
+    assert first.out_dir != second.out_dir
+    assert not (tmp_path / "data").exists()
+
+    out = tmp_path / "replay-out"
+    report = run(out)
+    assert report.out_dir == out and report.incidents == 1
+    assert list((out / "incidents").glob("*.jsonl"))
+    # The plan has no timestamp of its own; its timeline entry is stamped on the simulated clock
+    index = EntityIndex(out / "entity_index.db")
+    assert [e.kind for e in index.timeline("alice")][-1] == "plan"
+    assert max(e.ts for e in index.timeline("alice")) < T0 + timedelta(hours=1)
+    index.close()
+    with pytest.raises(ValueError):
+        run(out)
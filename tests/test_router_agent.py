@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from typing import Any, Dict
 
 from okta_soc.agents.router_agent import RouterAgent
@@ -43,6 +43,7 @@ def _make_registry() -> AgentRegistry:
 def test_validate_type_compatible_plan():
     """A valid plan where each agent's inputs are available."""
     mock_llm = MagicMock()
+    mock_llm.achat_json = AsyncMock(side_effect=mock_llm.chat_json)
     mock_llm.chat_json.return_value = {
         "steps": [
             {"agent_name": "detector_agent", "reason": "detect"},
@@ -67,6 +68,7 @@ def test_validate_type_compatible_plan():
 def test_validate_removes_invalid_agent():
     """An agent whose inputs aren't available gets removed."""
     mock_llm = MagicMock()
+    mock_llm.achat_json = AsyncMock(side_effect=mock_llm.chat_json)
     mock_llm.chat_json.return_value = {
         "steps": [
             {"agent_name": "risk_agent", "reason": "score first"},  # needs DetectionFinding, not available
@@ -92,6 +94,7 @@ def test_validate_removes_invalid_agent():
 def test_validate_rejects_unknown_agent():
     """An agent not in the registry is removed."""
     mock_llm = MagicMock()
+    mock_llm.achat_json = AsyncMock(side_effect=mock_llm.chat_json)
     mock_llm.chat_json.return_value = {
         "steps": [
             {"agent_name": "nonexistent_agent", "reason": "???"},
@@ -140,6 +143,7 @@ class StubEscalation(BaseAgent):
 def test_auto_iterate_when_list_available():
     """If agent consumes T but only List[T] is available, auto-set iterate_over."""
     mock_llm = MagicMock()
+    mock_llm.achat_json = AsyncMock(side_effect=mock_llm.chat_json)
     # LLM forgets to set iterate_over for planner
     mock_llm.chat_json.return_value = {
         "steps": [
@@ -170,6 +174,7 @@ def test_auto_iterate_when_list_available():
 def test_iterated_step_only_produces_list_types():
     """After an iterated step, only List[T] should be available, not bare T."""
     mock_llm = MagicMock()
+    mock_llm.achat_json = AsyncMock(side_effect=mock_llm.chat_json)
     mock_llm.chat_json.return_value = {
         "steps": [
             {"agent_name": "detector_agent", "reason": "detect"},
@@ -198,6 +203,7 @@ def test_iterated_step_only_produces_list_types():
 def test_escalation_included_when_incidents_available():
     """Router can include escalation_agent alongside planner_agent."""
     mock_llm = MagicMock()
+    mock_llm.achat_json = AsyncMock(side_effect=mock_llm.chat_json)
     mock_llm.chat_json.return_value = {
         "steps": [
             {"agent_name": "detector_agent", "reason": "detect"},
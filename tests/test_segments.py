@@ -0,0 +1,116 @@
+"""Tests for time-partitioned, compressed artifact segments."""
+import json
+from datetime import datetime, timedelta, timezone
+
+from okta_soc.core.models import DetectionFinding, FindingType, SecurityIncident, Severity
+from okta_soc.storage.query import JsonlQueryEngine, Query
+from okta_soc.storage.repositories import FindingsRepo, IncidentsRepo, JsonlStore
+from okta_soc.storage.segments import prune_artifacts
+
+DAY1 = datetime(2025, 11, 10, 12, tzinfo=timezone.utc)
+DAY2 = DAY1 + timedelta(days=1)
+
+
+def _finding(finding_id: str, created_at: datetime) -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=FindingType.FAILED_LOGIN_BURST,
+        description="burst",
+        okta_event_ids=["e1"],
+        user_id="alice",
+        created_at=created_at,
+    )
+
+
+def _names(directory):
+    return sorted(p.name for p in directory.iterdir())
+
+
+def test_records_are_partitioned_by_day_and_old_days_sealed(tmp_path):
+    repo = FindingsRepo(tmp_path / "findings")
+    repo.save(_finding("f-1", DAY1))
+    repo.save(_finding("f-2", DAY2))
+
+    assert _names(tmp_path / "findings") == [
+        "2025-11-10.0000.jsonl.gz",
+        "2025-11-11.0000.jsonl",
+        "manifest.json",
+    ]
+    manifest = json.loads((tmp_path / "findings" / "manifest.json").read_text())
+    assert manifest["2025-11-10.0000.jsonl.gz"] == {
+        "min_ts": DAY1.timestamp(), "max_ts": DAY1.timestamp(), "count": 1,
+    }
+    assert [json.loads(l)["id"] for l in repo.read_lines()] == ["f-1", "f-2"]
+    assert [json.loads(l)["id"] for l in repo.read_lines(since=DAY2)] == ["f-2"]
+
+
+def test_segments_rotate_at_size_threshold(tmp_path):
+    store = JsonlStore(tmp_path)
+    repo = FindingsRepo(tmp_path / "findings", store=store, max_segment_bytes=600)
+    with store.transaction():
+        for i in range(5):
+            repo.save(_finding(f"f-{i}", DAY1 + timedelta(minutes=i)))
+
+    segments = repo.log.segments()
+    assert len(segments) > 1
+    assert all(p.suffix == ".gz" for p in segments[:-1])
+    assert [json.loads(l)["id"] for l in repo.read_lines()] == [f"f-{i}" for i in range(5)]
+
+
+def test_query_reads_sealed_and_open_segments(tmp_path):
+    repo = FindingsRepo(tmp_path / "findings")
+    for i, day in enumerate([DAY1, DAY1, DAY2]):
+        repo.save(_finding(f"f-{i}", day + timedelta(minutes=i)))
+
+    engine = JsonlQueryEngine(tmp_path)
+    assert [f.id for f in engine.iter(Query(kind="findings", descending=True))] == ["f-2", "f-1", "f-0"]
+    assert [f.id for f in engine.iter(Query(kind="findings", until=DAY2))] == ["f-0", "f-1"]
+
+
+def test_late_updates_go_to_the_open_segment(tmp_path):
+    store = JsonlStore(tmp_path)
+    repo = IncidentsRepo(tmp_path / "incidents", store=store)
+    old = SecurityIncident(
+        id="i-1", finding_id="f-1", user_id="alice", title="t", description="d",
+        severity=Severity.HIGH, risk_score=0.9, created_at=DAY1,
+    )
+    with store.transaction():
+        repo.save(old)
+    with store.transaction():
+        repo.save(old.model_copy(update={"id": "i-2", "created_at": DAY2}))
+    for status in ("triaged", "escalated", "closed"):
+        with store.transaction():
+            repo.save(old.model_copy(update={"status": status}))
+
+    assert _names(tmp_path / "incidents") == [
+        "2025-11-10.0000.jsonl.gz",
+        "2025-11-11.0000.jsonl",
+        "manifest.json",
+    ]
+    engine = JsonlQueryEngine(tmp_path)
+    window = Query(kind="incidents", since=DAY1, until=DAY2)
+    assert [(i.id, i.status) for i in engine.iter(window)] == [("i-1", "closed")]
+
+    repo.log.seal_all()
+    manifest = json.loads((tmp_path / "incidents" / "manifest.json").read_text())
+    assert manifest["2025-11-11.0000.jsonl.gz"]["min_ts"] == DAY1.timestamp()
+    assert [(i.id, i.status) for i in engine.iter(window)] == [("i-1", "closed")]
+
+
+def test_legacy_flat_file_is_still_read(tmp_path):
+    (tmp_path / "findings.jsonl").write_text(_finding("old", DAY1).model_dump_json() + "\n")
+    repo = FindingsRepo(tmp_path / "findings")
+    repo.save(_finding("new", DAY2))
+    assert [json.loads(l)["id"] for l in repo.read_lines()] == ["old", "new"]
+
+
+def test_prune_drops_segments_before_cutoff(tmp_path):
+    repo = FindingsRepo(tmp_path / "findings")
+    repo.save(_finding("f-1", DAY1))
+    repo.save(_finding("f-2", DAY2))
+
+    removed = prune_artifacts(tmp_path, before=DAY2)
+
+    assert removed["findings"] == 1
+    assert [json.loads(l)["id"] for l in repo.read_lines()] == ["f-2"]
+    assert json.loads((tmp_path / "findings" / "manifest.json").read_text()) == {}
@@ -0,0 +1,134 @@
+"""Tests for load shedding and bounded in-flight work under overload."""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from unittest.mock import AsyncMock, MagicMock
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.agents.orchestrator import Orchestrator
+from okta_soc.agents.priority_agent import PriorityAgent
+from okta_soc.agents.risk_agent import LLMRiskAgent
+from okta_soc.core.budget import LLMBudgetExceeded
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.core.metrics import MetricsRegistry
+from okta_soc.core.models import DetectionFinding, FindingType, OktaEvent
+from okta_soc.core.router_models import RoutePlan, RouteStep
+from okta_soc.core.shedding import LoadShedder
+from okta_soc.storage.backlog import FindingBacklog
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+def _event(i: int, actor: str, outcome: str = "SUCCESS", country: str = "US", seconds: int = 0) -> OktaEvent:
+    return OktaEvent(
+        id=f"e{i}", event_type="user.session.start", actor_id=actor, actor_type="User",
+        target_id=None, ip_address=None, user_agent=None, country=country, outcome=outcome,
+        timestamp=T0 + timedelta(seconds=seconds or i),
+    )
+
+
+def test_sampling_keeps_signal_events_and_is_stable():
+    metrics = MetricsRegistry()
+    shedder = LoadShedder(max_events=10, metrics=metrics)
+    noise = [_event(i, "bob") for i in range(100)]
+    failures = [_event(100 + i, "alice", outcome="FAILURE") for i in range(3)]
+    travel = _event(200, "bob", country="FR", seconds=50)
+
+    kept = shedder.sample_events(noise + failures + [travel])
+    ids = {e.id for e in kept}
+    assert len(kept) == 10
+    # Failures, bob's first event, and both country changes (to FR and back)
+    assert {"e100", "e101", "e102", "e0", "e200", "e51"} <= ids
+    assert {e.id for e in shedder.sample_events(noise + failures + [travel])} == ids
+    assert metrics.get("shed_total").value(policy="sample") == 2 * 94
+
+
+def test_signal_beyond_the_cap_keeps_the_newest():
+    metrics = MetricsRegistry()
+    failures = [_event(i, "alice", outcome="FAILURE") for i in range(20)]
+    kept = LoadShedder(max_events=5, metrics=metrics).sample_events(failures)
+    assert [e.id for e in kept] == ["e15", "e16", "e17", "e18", "e19"]
+    assert metrics.get("shed_total").value(policy="truncate") == 15
+
+
+def test_event_flood_yields_bounded_findings():
+    metrics = MetricsRegistry()
+    flood = [_event(i, "alice", outcome="FAILURE") for i in range(2000)]
+    shedder = LoadShedder(max_events=1000, max_findings_per_actor=5, metrics=metrics)
+    result = asyncio.run(DetectorAgent(shedder=shedder).run({"List[OktaEvent]": flood}))
+
+    findings = result["List[DetectionFinding]"]
+    assert len(findings) == 1
+    assert findings[0].finding_type == FindingType.FAILED_LOGIN_BURST
+    assert findings[0].metadata["count"] == 1000
+    assert findings[0].metadata["collapsed_findings"] == 996
+    assert metrics.get("shed_total").value(policy="collapse") == 995
+
+
+def _finding(i: int) -> DetectionFinding:
+    return DetectionFinding(
+        id=f"f{i}", finding_type=FindingType.FAILED_LOGIN_BURST, description="d",
+        okta_event_ids=[f"e{i}"], user_id=f"user{i}", created_at=T0 + timedelta(minutes=i),
+    )
+
+
+def test_full_backlog_drops_the_least_urgent():
+    metrics = MetricsRegistry()
+    backlog = FindingBacklog(max_findings=2)
+    agent = PriorityAgent(backlog=backlog, max_findings=1, metrics=metrics)
+    asyncio.run(agent.run({"List[DetectionFinding]": [_finding(i) for i in range(5)]}))
+    assert [f.id for f in backlog.take()] == ["f1", "f2"]
+    assert metrics.get("shed_total").value(policy="drop") == 2
+
+
+def test_findings_a_full_backlog_refuses_at_scoring_are_counted(caplog):
+    metrics = MetricsRegistry()
+    backlog = FindingBacklog(max_findings=1)
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.side_effect = LLMBudgetExceeded("spent")
+    agent = LLMRiskAgent(llm, backlog=backlog, metrics=metrics)
+    with caplog.at_level(logging.WARNING):
+        outputs = asyncio.run(agent.run_batch([{"DetectionFinding": _finding(i)} for i in range(3)]))
+    assert outputs == [{}, {}, {}]
+    assert [f.id for f in backlog.take()] == ["f0"]
+    assert metrics.get("shed_total").value(policy="drop") == 2
+    assert "2 unscored finding(s) dropped" in caplog.text
+
+
+class _Slow(BaseAgent):
+    contract = AgentContract(
+        name="slow", description="d", consumes=["DetectionFinding"],
+        produces=["Seen"], phase_hint="analysis",
+    )
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        return {"Seen": input_data["DetectionFinding"].id}
+
+
+def test_orchestrator_bounds_items_in_flight():
+    agent = _Slow()
+    registry = AgentRegistry()
+    registry.register(agent)
+    router = MagicMock()
+
+    async def route(ctx):
+        return RoutePlan(steps=[RouteStep(agent_name="slow", reason="r", iterate_over="List[DetectionFinding]")])
+
+    router.run = route
+    orchestrator = Orchestrator(router=router, registry=registry, max_in_flight=4)
+    findings = [_finding(i) for i in range(50)]
+    context = asyncio.run(orchestrator.run(initial_data={"List[DetectionFinding]": findings}, metadata={}))
+
+    assert agent.peak == 4
+    assert context.data["List[Seen]"] == [f.id for f in findings]
@@ -0,0 +1,127 @@
+"""Tests for the streaming, filterable show-all viewer."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from okta_soc.core.models import (
+    CommandSuggestion,
+    DetectionFinding,
+    FindingType,
+    SecurityIncident,
+    Severity,
+)
+from okta_soc.core.config import Settings
+from okta_soc.interface.cli import parse_since
+from okta_soc.interface.show_all import ArtifactReaders, ShowFilters, _IncidentFilter, _select, iter_records
+from okta_soc.storage import segments
+from okta_soc.storage.backends import open_repositories
+
+T0 = datetime(2025, 11, 10, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def readers(tmp_path, request):
+    settings = Settings(
+        storage_backend=request.param, data_dir=str(tmp_path), sqlite_path=str(tmp_path / "soc.db")
+    )
+    repos = open_repositories(settings)
+    for day in range(3):
+        for user, severity in (("alice", Severity.CRITICAL), ("bob", Severity.LOW)):
+            ts = T0 + timedelta(days=day)
+            fid, iid = f"f-{user}-{day}", f"i-{user}-{day}"
+            repos.findings.save(DetectionFinding(
+                id=fid, finding_type=FindingType.MFA_FATIGUE, description="push",
+                okta_event_ids=["e1"], user_id=user, created_at=ts,
+            ))
+            repos.incidents.save(SecurityIncident(
+                id=iid, finding_id=fid, user_id=user, title="t", description="d",
+                severity=severity, risk_score=0.5, created_at=ts,
+            ))
+            repos.commands.save(iid, CommandSuggestion(
+                step_id="lock_account", incident_id=iid, description="d", command="c", system="okta_api",
+            ))
+    repos.close()
+    readers = ArtifactReaders(settings)
+    yield readers
+    readers.close()
+
+
+def _records(readers, kind, filters, incidents=None):
+    return list(_select(kind, iter_records(readers, kind, filters.since), filters, incidents))
+
+
+def _ids(readers, kind, filters):
+    return [r["id"] for r in _records(readers, kind, filters)]
+
+
+def test_newest_first_with_limit(readers):
+    assert _ids(readers, "findings", ShowFilters(limit=3)) == ["f-bob-2", "f-alice-2", "f-bob-1"]
+
+
+def test_user_severity_and_since_filters(readers):
+    filters = ShowFilters(user="alice", severity="high", since=T0 + timedelta(days=1))
+    assert _ids(readers, "incidents", filters) == ["i-alice-2", "i-alice-1"]
+    assert _ids(readers, "incidents", ShowFilters(severity="medium", user="bob")) == []
+
+
+def test_linked_sections_follow_incident_filters(readers):
+    filters = ShowFilters(user="bob", limit=0)
+    incidents = _IncidentFilter(iter_records(readers, "incidents"), filters)
+    commands = _records(readers, "commands", filters, incidents)
+    assert [c["incident_id"] for c in commands] == ["i-bob-2", "i-bob-1", "i-bob-0"]
+
+
+def test_linked_filter_reads_incidents_only_as_far_as_needed(readers):
+    read = []
+
+    def incidents():
+        for record in iter_records(readers, "incidents"):
+            read.append(record["id"])
+            yield record
+
+    filters = ShowFilters(user="bob", limit=1)
+    commands = _records(readers, "commands", filters, _IncidentFilter(incidents(), filters))
+    assert [c["incident_id"] for c in commands] == ["i-bob-2"]
+    assert len(read) == 1
+
+
+def test_first_rows_only_read_newest_segment(readers, request):
+    if request.node.callspec.params["readers"] != "jsonl":
+        pytest.skip("segments are a JSONL layout")
+    opened = []
+    real_open = segments.open_segment
+
+    def tracking_open(path):
+        opened.append(path.name)
+        return real_open(path)
+
+    with patch.object(segments, "open_segment", tracking_open):
+        assert _ids(readers, "findings", ShowFilters(limit=1)) == ["f-bob-2"]
+    assert opened == ["2025-11-12.0000.jsonl"]
+
+
+def test_readers_neither_recover_nor_seal(tmp_path):
+    settings = Settings(data_dir=str(tmp_path))
+    repos = open_repositories(settings)
+    with repos.transaction():
+        repos.findings.save(DetectionFinding(
+            id="f-old", finding_type=FindingType.MFA_FATIGUE, description="push",
+            okta_event_ids=["e1"], user_id="alice", created_at=T0,
+        ))
+    # A writer mid-commit (its journal is still there) and a day it has moved past
+    journal = tmp_path / ".commit-journal.json"
+    journal.write_text("[]")
+    (tmp_path / "findings" / "2025-11-11.0000.jsonl").write_text("")
+    before = sorted(p.name for p in (tmp_path / "findings").iterdir())
+
+    readers = ArtifactReaders(settings)
+    assert [r["id"] for r in iter_records(readers, "findings")] == ["f-old"]
+    readers.close()
+    assert journal.exists()
+    assert sorted(p.name for p in (tmp_path / "findings").iterdir()) == before
+
+
+def test_parse_since():
+    assert parse_since("2025-11-12") == datetime(2025, 11, 12, tzinfo=timezone.utc)
+    assert datetime.now(timezone.utc) - parse_since("2h") < timedelta(hours=2, seconds=5)
@@ -0,0 +1,111 @@
+"""Tests for the SQLite storage backend."""
+import json
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from okta_soc.core.models import (
+    CommandSuggestion,
+    DetectionFinding,
+    FindingType,
+    ResponsePlan,
+    ResponseStep,
+    SecurityIncident,
+    Severity,
+)
+from okta_soc.storage.sqlite_repositories import (
+    SqliteCommandsRepo,
+    SqliteFindingsRepo,
+    SqliteIncidentsRepo,
+    SqlitePlansRepo,
+    SqliteStore,
+    import_jsonl,
+)
+
+
+def _finding(finding_id: str, user: str = "alice") -> DetectionFinding:
+    return DetectionFinding(
+        id=finding_id,
+        finding_type=FindingType.IMPOSSIBLE_TRAVEL,
+        description="travel",
+        okta_event_ids=["e1", "e2"],
+        user_id=user,
+        created_at=datetime(2025, 11, 12, 18, 0, tzinfo=timezone.utc),
+    )
+
+
+def _incident(incident_id: str, finding_id: str, user=None) -> SecurityIncident:
+    return SecurityIncident(
+        id=incident_id,
+        finding_id=finding_id,
+        user_id=user,
+        title="Incident from impossible_travel",
+        description="travel",
+        severity=Severity.HIGH,
+        risk_score=0.8,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_store_uses_wal_mode(tmp_path):
+    store = SqliteStore(tmp_path / "soc.db")
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_round_trip_and_indexed_lookups(tmp_path):
+    store = SqliteStore(tmp_path / "soc.db")
+    findings, incidents = SqliteFindingsRepo(store), SqliteIncidentsRepo(store)
+    with store.transaction():
+        findings.save(_finding("f-1"))
+        findings.save(_finding("f-2", user="bob"))
+        incidents.save(_incident("i-1", "f-1"))
+
+    assert findings.get("f-1") == _finding("f-1")
+    assert [f.id for f in findings.find_by_user("bob")] == ["f-2"]
+    assert [i.id for i in incidents.find_by_finding("f-1")] == ["i-1"]
+    # user_id is back-filled from the linked finding
+    assert [i.id for i in incidents.find_by_user("alice")] == ["i-1"]
+
+
+def test_foreign_keys_reject_orphan_incident(tmp_path):
+    store = SqliteStore(tmp_path / "soc.db")
+    with pytest.raises(sqlite3.IntegrityError):
+        SqliteIncidentsRepo(store).save(_incident("i-1", "missing"))
+    assert store.is_empty()
+
+
+def test_commands_link_to_incident(tmp_path):
+    store = SqliteStore(tmp_path / "soc.db")
+    cmd = CommandSuggestion(step_id="lock_account", description="d", command="curl", system="okta_api")
+    with store.transaction():
+        SqliteFindingsRepo(store).save(_finding("f-1"))
+        SqliteIncidentsRepo(store).save(_incident("i-1", "f-1"))
+        SqlitePlansRepo(store).save(ResponsePlan(
+            incident_id="i-1",
+            overall_goal="contain",
+            steps=[ResponseStep(step_id="lock_account", description="d", rationale="r")],
+        ))
+        SqliteCommandsRepo(store).save("i-1", cmd)
+        SqliteCommandsRepo(store).save("", cmd)
+
+    assert SqliteCommandsRepo(store).find_by_incident("i-1") == [cmd]
+    assert len(SqlitePlansRepo(store).find_by_incident("i-1")) == 1
+
+
+def test_import_jsonl(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "findings.jsonl").write_text(_finding("f-1").model_dump_json() + "\n")
+    (data_dir / "incidents.jsonl").write_text(_incident("i-1", "f-1").model_dump_json() + "\n")
+    (data_dir / "commands.jsonl").write_text(json.dumps({
+        "incident_id": "",
+        "command": {"step_id": "lock_account", "description": "d", "command": "c", "system": "okta_api"},
+    }) + "\n")
+
+    store = SqliteStore(tmp_path / "soc.db")
+    counts = import_jsonl(store, data_dir)
+    assert counts == {"findings": 1, "risks": 0, "incidents": 1, "plans": 0, "commands": 1, "escalations": 0}
+
+    with pytest.raises(ValueError, match="already has data"):
+        import_jsonl(store, data_dir)
@@ -0,0 +1,162 @@
+"""Tests for watch mode: detector lookback, router plan caching and the polling loop."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List
+from unittest.mock import AsyncMock, MagicMock
+
+from okta_soc.agents.base import BaseAgent, AgentContract
+from okta_soc.agents.detector_agent import DetectorAgent
+from okta_soc.agents.registry import AgentRegistry
+from okta_soc.agents.router_agent import RouterAgent
+from okta_soc.core.checkpoint import NoCheckpointError
+from okta_soc.core.models import OktaEvent
+from okta_soc.core.pipeline_context import PipelineContext
+from okta_soc.ingest.pipeline import watch
+
+T0 = datetime(2025, 11, 12, 9, 0, tzinfo=timezone.utc)
+
+
+def _failures(start: int, count: int) -> List[OktaEvent]:
+    return [
+        OktaEvent(
+            id=f"e{i}",
+            event_type="user.session.start",
+            actor_id="alice",
+            actor_type="User",
+            target_id=None,
+            ip_address="10.0.0.1",
+            user_agent="test",
+            outcome="FAILURE",
+            timestamp=T0 + timedelta(minutes=i),
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def _detect(agent: DetectorAgent, events: List[OktaEvent]):
+    return asyncio.run(agent.run({"List[OktaEvent]": events}))["List[DetectionFinding]"]
+
+
+def test_lookback_detects_burst_straddling_two_polls():
+    agent = DetectorAgent(lookback=timedelta(minutes=60))
+    assert _detect(agent, _failures(0, 3)) == []
+    findings = _detect(agent, _failures(3, 2))
+    assert len(findings) == 1
+    assert findings[0].okta_event_ids == ["e0", "e1", "e2", "e3", "e4"]
+
+
+def test_without_lookback_each_poll_is_detected_alone():
+    agent = DetectorAgent()
+    assert _detect(agent, _failures(0, 3)) == []
+    assert _detect(agent, _failures(3, 2)) == []
+
+
+def test_lookback_rerun_of_same_batch_is_stable():
+    agent = DetectorAgent(lookback=timedelta(minutes=60))
+    _detect(agent, _failures(0, 3))
+    first = _detect(agent, _failures(3, 2))
+    again = _detect(agent, _failures(3, 2))
+    assert [f.okta_event_ids for f in again] == [f.okta_event_ids for f in first]
+
+
+def test_lookback_drops_events_older_than_window():
+    agent = DetectorAgent(lookback=timedelta(minutes=5))
+    _detect(agent, _failures(0, 3))
+    _detect(agent, _failures(20, 1))
+    # e0..e2 are more than 5 minutes older than e20 and are forgotten
+    assert _detect(agent, _failures(21, 3)) == []
+
+
+class _Source(BaseAgent):
+    contract = AgentContract(
+        name="source", description="d", consumes=["A"], produces=["B"], phase_hint="ingest",
+    )
+
+    async def run(self, input_data):
+        return {"B": 1}
+
+
+def test_router_reuses_cached_plan():
+    registry = AgentRegistry()
+    registry.register(_Source())
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.return_value = {
+        "reasoning": "r",
+        "steps": [{"agent_name": "source", "reason": "x"}],
+    }
+    router = RouterAgent(llm=llm, registry=registry, cache_plans=True)
+
+    first = asyncio.run(router.run(PipelineContext(data={"A": 1}, metadata={})))
+    second = asyncio.run(router.run(PipelineContext(data={"A": 2}, metadata={})))
+
+    assert llm.chat_json.call_count == 1
+    assert [s.agent_name for s in second.steps] == ["source"]
+    assert second is not first
+
+
+def test_router_without_cache_asks_every_time():
+    registry = AgentRegistry()
+    registry.register(_Source())
+    llm = MagicMock()
+    llm.achat_json = AsyncMock(side_effect=llm.chat_json)
+    llm.chat_json.return_value = {"reasoning": "r", "steps": [{"agent_name": "source", "reason": "x"}]}
+    router = RouterAgent(llm=llm, registry=registry)
+
+    asyncio.run(router.run(PipelineContext(data={"A": 1}, metadata={})))
+    asyncio.run(router.run(PipelineContext(data={"A": 1}, metadata={})))
+    assert llm.chat_json.call_count == 2
+
+
+class _FakePipeline:
+    def __init__(self, stop: asyncio.Event, cycles: int, fail_on=()):
+        self.stop = stop
+        self.cycles = cycles
+        self.fail_on = set(fail_on)
+        self.calls = []
+        self.running = 0
+        self.overlapped = False
+
+    async def run_once(self, since, resume=False):
+        self.running += 1
+        self.overlapped = self.overlapped or self.running > 1
+        self.calls.append((since, resume))
+        try:
+            await asyncio.sleep(0)
+            if resume:
+                raise NoCheckpointError("nothing to resume")
+            if len(self.calls) in self.fail_on:
+                raise RuntimeError("llm down")
+            if sum(1 for _, r in self.calls if not r) >= self.cycles:
+                self.stop.set()
+            return 0
+        finally:
+            self.running -= 1
+
+
+def test_watch_polls_since_previous_cycle_until_stopped():
+    ticks = iter(T0 + timedelta(seconds=s) for s in range(0, 100))
+
+    async def scenario():
+        stop = asyncio.Event()
+        pipeline = _FakePipeline(stop, cycles=3)
+        await watch(pipeline, T0 - timedelta(hours=1), interval=0, jitter=0.5, stop=stop,
+                    clock=lambda: next(ticks))
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    sinces = [since for since, _ in pipeline.calls]
+    # Each cycle starts where the previous one started (two clock reads per cycle)
+    assert sinces == [T0 - timedelta(hours=1), T0, T0 + timedelta(seconds=2)]
+    assert not pipeline.overlapped
+
+
+def test_watch_resumes_failed_cycle_and_keeps_its_window():
+    async def scenario():
+        stop = asyncio.Event()
+        pipeline = _FakePipeline(stop, cycles=2, fail_on=[1])
+        await watch(pipeline, T0, interval=0, jitter=0, stop=stop, clock=lambda: T0)
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    assert pipeline.calls == [(T0, False), (None, True), (T0, False)]